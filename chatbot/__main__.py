@@ -8,23 +8,20 @@ import sys
 import logging
 import signal
 from chatbot.config import get_config, ConfigurationError
+from chatbot.log_pipeline import TEXT_FORMAT, configure_logging
 from chatbot.server import run_server
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('chatbot.log')
-    ]
-)
+# Log startup and configuration errors to stdout until the logging pipeline is configured
+logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT, handlers=[logging.StreamHandler(sys.stdout)])
 
 logger = logging.getLogger(__name__)
 
 
 def signal_handler(sig, frame):
-    """Handle shutdown signals gracefully.
+    """Handle shutdown signals in threaded server mode.
+    
+    The async server installs its own handlers, which drain in-flight
+    chat turns before exiting.
     
     Args:
         sig: Signal number
@@ -37,10 +34,6 @@ def signal_handler(sig, frame):
 def main():
     """Main function to start the chatbot service."""
     try:
-        # Register signal handlers for graceful shutdown
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
-        
         logger.info("=" * 60)
         logger.info("Shopping Assistant Chatbot Service")
         logger.info("=" * 60)
@@ -49,16 +42,22 @@ def main():
         logger.info("Loading configuration...")
         config = get_config()
         
-        # Update logging level from config
-        log_level = getattr(logging, config.log_level.upper(), logging.INFO)
-        logging.getLogger().setLevel(log_level)
+        # Switch to asynchronous, structured logging at the configured level
+        configure_logging(config)
         
         logger.info("Configuration loaded successfully")
         logger.info(f"AWS Region: {config.aws_region}")
         logger.info(f"Backend API: {config.backend_api_url}")
         logger.info(f"Chatbot Port: {config.chatbot_port}")
         logger.info(f"Session Storage: {config.session_storage_dir}")
-        logger.info(f"Log Level: {config.log_level}")
+        logger.info(f"Log Level: {config.log_level} ({config.log_format}, file: {config.log_file or 'none'})")
+        logger.info(f"Server Mode: {config.server_mode}")
+        logger.info(f"Server Workers: {config.server_workers}")
+        
+        # The threaded dev server cannot drain requests, so just exit on signals
+        if config.server_mode == 'threaded':
+            signal.signal(signal.SIGINT, signal_handler)
+            signal.signal(signal.SIGTERM, signal_handler)
         
         # Start the HTTP server
         logger.info("Starting HTTP server...")
@@ -0,0 +1,385 @@
+"""Admission control for the Shopping Assistant Chatbot.
+
+Protects Bedrock capacity and latency for everyone from chatty clients and
+traffic spikes:
+
+- Token-bucket rate limits per session_id and per client IP reject excess chat
+  requests with 429 before they reach the agent.
+- A global cap on concurrent model calls, shared by every agent in the
+  process, makes further model calls wait in a bounded queue. New chat turns
+  are rejected with 503 while that queue is full, so the server fails fast
+  instead of piling up Bedrock calls.
+
+Rejections carry a Retry-After estimate and are counted by reason in
+chatbot_requests_rejected_total.
+"""
+
+import asyncio
+import contextvars
+import ipaddress
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from strands.hooks import AfterModelCallEvent, BeforeModelCallEvent, HookProvider, HookRegistry
+from chatbot.config import get_config
+from chatbot.metrics import REGISTRY, Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+REQUESTS_REJECTED = REGISTRY.register(Counter(
+    'chatbot_requests_rejected_total', 'Chat requests rejected by admission control.', ['reason']))
+
+# Idle rate-limit buckets kept per scope before the least recently used are dropped
+_MAX_BUCKETS = 100000
+
+
+class AdmissionError(Exception):
+    """Raised when a chat request is rejected by admission control."""
+
+    def __init__(self, message: str, status: int, error_type: str, reason: str, retry_after: float):
+        """Initialize the error.
+
+        Args:
+            message: User-facing error message
+            status: HTTP status code (429 or 503)
+            error_type: error_type of the JSON error body
+            reason: Rejection reason label for metrics
+            retry_after: Seconds the client should wait before retrying
+        """
+        super().__init__(message)
+        self.status = status
+        self.error_type = error_type
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After header value in whole seconds."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RateLimiter:
+    """Token buckets keyed by session ID or client IP."""
+
+    def __init__(self, per_minute: float, burst: int, max_keys: int = _MAX_BUCKETS):
+        """Initialize the rate limiter.
+
+        Args:
+            per_minute: Sustained requests allowed per key per minute (0 disables the limit)
+            burst: Requests a key may make at once after being idle
+            max_keys: Buckets kept before the least recently used are dropped
+        """
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_keys = max_keys
+        # key -> (tokens, last refill time)
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the limit is enforced."""
+        return self.rate > 0
+
+    def acquire(self, key: str) -> float:
+        """Take a token from a key's bucket.
+
+        Args:
+            key: Session ID or client IP
+
+        Returns:
+            0 if the request is allowed, otherwise seconds until a token is available
+        """
+        if not self.enabled:
+            return 0.0
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            self.rejected += 1
+            return (1 - bucket[0]) / self.rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter settings and counters for monitoring."""
+        with self._lock:
+            return {
+                'per_minute': round(self.rate * 60, 2),
+                'burst': self.burst,
+                'tracked_keys': len(self._buckets),
+                'rejected': self.rejected
+            }
+
+
+class ModelCallLimiter:
+    """Caps concurrent model calls across all agents, threads and event loops.
+
+    Agent turns run on the async server's event loop or on per-request loops
+    in the threaded server, so waiters are futures on their own loops and a
+    freed slot is handed directly to the oldest one.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        """Initialize the limiter.
+
+        Args:
+            max_concurrency: Maximum model calls running at once
+            max_queue: Model calls allowed to wait before new chat turns are rejected
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.active = 0
+        self.rejected = 0
+        self._waiters: "deque[Any]" = deque()
+        self._lock = threading.Lock()
+        # Smoothed model call duration, used to estimate Retry-After
+        self._avg_call_seconds = 1.0
+
+    @property
+    def waiting(self) -> int:
+        """Model calls waiting for a slot."""
+        return len(self._waiters)
+
+    def check_admission(self):
+        """Reject a new chat turn while model calls are saturated and the wait queue is full.
+
+        Raises:
+            AdmissionError: With status 503 when the server is overloaded
+        """
+        with self._lock:
+            if self.active < self.max_concurrency or len(self._waiters) < self.max_queue:
+                return
+            self.rejected += 1
+            retry_after = self._avg_call_seconds * (len(self._waiters) / self.max_concurrency + 1)
+        raise AdmissionError('The assistant is busy right now. Please try again in a moment.',
+                             503, 'overloaded', 'model_capacity', retry_after)
+
+    async def acquire(self):
+        """Wait for a model call slot."""
+        with self._lock:
+            if self.active < self.max_concurrency and not self._waiters:
+                self.active += 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was handed over as the wait was cancelled; pass it on
+            if waiter[1].done() and not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def release(self, call_seconds: Optional[float] = None):
+        """Free a slot, handing it to the oldest waiter if there is one.
+
+        Args:
+            call_seconds: Duration of the finished model call, if known
+        """
+        with self._lock:
+            if call_seconds is not None:
+                self._avg_call_seconds += 0.1 * (call_seconds - self._avg_call_seconds)
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+            self.active -= 1
+
+    def _grant(self, future: asyncio.Future):
+        """Complete a waiter's future on its own loop, or pass the slot on if it gave up."""
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get model call concurrency and rejection counters for monitoring."""
+        with self._lock:
+            return {
+                'active': self.active,
+                'waiting': len(self._waiters),
+                'rejected': self.rejected,
+                'max_concurrency': self.max_concurrency,
+                'max_queue': self.max_queue,
+                'avg_call_ms': round(self._avg_call_seconds * 1000, 1)
+            }
+
+
+# Number of model call slots held by the current chat turn, released when the turn
+# ends even if a model call was cancelled before its after-call hook ran
+_turn_slots: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar('turn_model_slots', default=None)
+
+
+class ModelCallLimitHooks(HookProvider):
+    """Agent hooks that hold a model call slot for the duration of each model call."""
+
+    def __init__(self, limiter: 'ModelCallLimiter'):
+        """Initialize the hooks.
+
+        Args:
+            limiter: Process-wide model call limiter
+        """
+        self.limiter = limiter
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        """Register model call callbacks."""
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+        registry.add_callback(AfterModelCallEvent, self._after_model_call)
+
+    async def _before_model_call(self, event: BeforeModelCallEvent):
+        await self.limiter.acquire()
+        slots = _turn_slots.get()
+        if slots is not None:
+            slots[0] += 1
+        event.invocation_state['model_slot_start'] = time.perf_counter()
+
+    def _after_model_call(self, event: AfterModelCallEvent):
+        start = event.invocation_state.pop('model_slot_start', None)
+        if start is None:
+            return
+        slots = _turn_slots.get()
+        if slots is not None:
+            slots[0] -= 1
+        self.limiter.release(time.perf_counter() - start)
+
+
+@contextmanager
+def model_call_scope() -> Iterator[None]:
+    """Release any model call slots a chat turn still holds when it ends."""
+    slots = [0]
+    token = _turn_slots.set(slots)
+    try:
+        yield
+    finally:
+        _turn_slots.reset(token)
+        for _ in range(slots[0]):
+            get_model_call_limiter().release()
+
+
+# Process-wide limiters (created lazily from configuration)
+_limiters: Dict[str, Any] = {}
+_limiters_lock = threading.Lock()
+
+
+def _get_limiters() -> Dict[str, Any]:
+    """Get the global limiters, creating them on first use."""
+    if not _limiters:
+        with _limiters_lock:
+            if not _limiters:
+                config = get_config()
+                _limiters['session'] = RateLimiter(config.rate_limit_session_per_minute,
+                                                   config.rate_limit_session_burst)
+                _limiters['ip'] = RateLimiter(config.rate_limit_ip_per_minute, config.rate_limit_ip_burst)
+                _limiters['model'] = ModelCallLimiter(config.model_max_concurrency, config.model_queue_size)
+    return _limiters
+
+
+def get_model_call_limiter() -> ModelCallLimiter:
+    """Get the process-wide model call limiter."""
+    return _get_limiters()['model']
+
+
+def client_ip(remote_addr: Optional[str], forwarded_for: Optional[str]) -> str:
+    """Determine the client IP a request is rate limited by.
+
+    X-Forwarded-For is only trusted when the request came from one of
+    RATE_LIMIT_TRUSTED_PROXIES, such as the scale-out router.
+
+    Args:
+        remote_addr: Address of the connecting peer
+        forwarded_for: X-Forwarded-For header value, if any
+
+    Returns:
+        Client IP address
+    """
+    remote_addr = remote_addr or 'unknown'
+    if forwarded_for and remote_addr in get_config().rate_limit_trusted_proxies:
+        # The proxy appends the peer it saw last; the original client is first
+        candidate = forwarded_for.split(',')[0].strip()
+        try:
+            return str(ipaddress.ip_address(candidate))
+        except ValueError:
+            pass
+    return remote_addr
+
+
+def reject(reason: str):
+    """Count a chat request rejected outside admission control (e.g. a busy session or server).
+
+    Args:
+        reason: Rejection reason label
+    """
+    REQUESTS_REJECTED.inc(reason=reason)
+
+
+def check_admission(session_id: str, ip: str):
+    """Admit a chat request or reject it.
+
+    Args:
+        session_id: Session the request belongs to
+        ip: Client IP address
+
+    Raises:
+        AdmissionError: 429 if the session or client is over its rate limit,
+            503 if model calls are saturated and their wait queue is full
+    """
+    limiters = _get_limiters()
+    try:
+        wait = limiters['session'].acquire(session_id)
+        if wait:
+            raise AdmissionError("You're sending messages too quickly. Please wait a moment and try again.",
+                                 429, 'rate_limited', 'session_rate', wait)
+        wait = limiters['ip'].acquire(ip)
+        if wait:
+            raise AdmissionError('Too many requests from your network. Please wait a moment and try again.',
+                                 429, 'rate_limited', 'ip_rate', wait)
+        limiters['model'].check_admission()
+    except AdmissionError as e:
+        REQUESTS_REJECTED.inc(reason=e.reason)
+        logger.warning(f"Rejecting chat request for session {session_id} from {ip}: {e.reason}")
+        raise
+
+
+def get_admission_stats() -> Dict[str, Any]:
+    """Get rate limit and model call limiter statistics.
+
+    Returns:
+        Dictionary of per-session and per-IP rate limits and model call concurrency
+    """
+    limiters = _get_limiters()
+    return {
+        'session_rate_limit': limiters['session'].get_stats(),
+        'ip_rate_limit': limiters['ip'].get_stats(),
+        'model_calls': limiters['model'].get_stats()
+    }
+
+
+REGISTRY.register(Gauge(
+    'chatbot_model_calls_in_flight', 'Model calls holding a concurrency slot.',
+    callback=lambda: get_model_call_limiter().active))
+REGISTRY.register(Gauge(
+    'chatbot_model_calls_waiting', 'Model calls waiting for a concurrency slot.',
+    callback=lambda: get_model_call_limiter().waiting))
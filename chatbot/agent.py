@@ -3,16 +3,48 @@
 This module manages the Strands Agent lifecycle, conversation context, and session management.
 """
 
+import asyncio
+import atexit
+import contextvars
 import logging
-import os
-import boto3
-from typing import Dict, Optional
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
 from strands import Agent
-from strands.models import BedrockModel
-from strands.session.file_session_manager import FileSessionManager
+from strands.session.repository_session_manager import RepositorySessionManager
+from strands.session.session_manager import SessionManager
+from strands.session.session_repository import SessionRepository
+from chatbot.bedrock import get_bedrock_model
 from chatbot.config import get_config
-from chatbot.tools import ALL_TOOLS
+from chatbot.conversation import WindowedSummaryConversationManager
+from chatbot.hash_ring import HashRing
+from chatbot.intent_router import IntentMatch, IntentRouter
+from chatbot.admission import ModelCallLimitHooks, get_model_call_limiter, model_call_scope, reject
+from chatbot.agent_pool import AgentPool
+from chatbot.cart_mirror import cart_session
+from chatbot.model_router import ModelTierHooks, get_model_router
+from chatbot.metrics import (
+    AGENT_CREATE_SECONDS,
+    AGENT_POOL_CLAIM_SECONDS,
+    REGISTRY,
+    SESSION_LOOKUP_SECONDS,
+    TOOL_CALL_SECONDS,
+    TURN_SECONDS,
+    TURNS_IN_PROGRESS,
+    AgentMetricsHooks,
+    Gauge
+)
+from chatbot.session_db import SQLiteSessionRepository
+from chatbot.session_store import InstrumentedFileSessionRepository, SessionStore
+from chatbot.tracing import TracingHooks, span
+from chatbot.tool_executor import OrderedConcurrentToolExecutor
+from chatbot.turn_queue import SessionTurnQueue, TurnQueueFullError
+from chatbot.tools import ALL_TOOLS, CART_TOOLS
+from chatbot.write_behind import WriteBehindSessionRepository
 
 logger = logging.getLogger(__name__)
 
@@ -30,76 +62,312 @@ Guidelines:
 - When recommending products, explain why they might be a good fit
 - If a customer asks about a product not in the catalog, politely let them know it's not available
 - Always confirm actions like adding to cart or removing items
+- Cart changes report the updated cart total, so there is no need to call get_cart just to confirm them
+- When a request changes more than one cart item, make all the changes in one apply_cart_changes call
 - If you encounter an error, apologize and suggest an alternative action
 
 You have access to tools that let you:
 - list_products: Get all available products
+- search_products: Find products matching a description, optionally under a maximum price
 - get_product_details: Get detailed info about a specific product
+- get_products_details: Compare several products at once in a single call
+- recommend_products: Get recommendations related to a product or to the customer's cart
 - get_cart: View the customer's current cart
 - add_to_cart: Add items to the cart
 - update_cart_item: Change quantities in the cart
 - remove_from_cart: Remove items from the cart
+- apply_cart_changes: Add, update and remove several cart items in a single call
 
 Use these tools to help customers accomplish their shopping goals."""
 
+# User-facing reply when a message cannot be processed
+ERROR_RESPONSE = (
+    "I apologize, but I encountered an error while processing your request. "
+    "Please try again or rephrase your question."
+)
 
-# Global session storage
-_sessions: Dict[str, Dict] = {}
 
+# Reply when a session already has too many messages waiting to be processed
+SESSION_BUSY_RESPONSE = "I'm still working on your previous messages. Please wait for my reply before sending more."
 
-def create_agent(session_id: str) -> Agent:
-    """Create and configure a Strands Agent with Bedrock Nova Pro.
+# Per-session turn queue (created lazily from configuration)
+_turn_queue: Optional[SessionTurnQueue] = None
+
+# Number of recent turn durations kept for percentile estimates
+_TURN_SAMPLE_SIZE = 256
+
+# Wall-clock timing of agent turns
+_turn_stats: Dict[str, Any] = {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                               'samples': deque(maxlen=_TURN_SAMPLE_SIZE)}
+_turn_stats_lock = threading.Lock()
+
+# Global session storage (created lazily from configuration)
+_sessions: Optional[SessionStore] = None
+_sessions_lock = threading.Lock()
+
+# Shared session repository for the configured backend (created lazily)
+_session_repository: Optional[SessionRepository] = None
+
+# Pre-warmed agents for new sessions (created lazily from configuration)
+_agent_pool: Optional[AgentPool] = None
+
+# Deterministic router for simple commands (created lazily from configuration)
+_intent_router: Optional[IntentRouter] = None
+
+# Latest worker membership received from the cluster router (scale-out mode only)
+_cluster_view: Dict[str, Any] = {'epoch': 0, 'workers': [], 'worker': None}
+
+# Longest a rebalance waits for the turns of handed-off sessions to finish, in seconds
+_HANDOFF_DRAIN_TIMEOUT = 20.0
+
+
+def _get_session_store() -> SessionStore:
+    """Get the global session store, creating it on first use.
+
+    Returns:
+        The bounded session store
+    """
+    global _sessions
+
+    if _sessions is None:
+        with _sessions_lock:
+            if _sessions is None:
+                config = get_config()
+                _sessions = SessionStore(
+                    max_sessions=config.session_max_active,
+                    idle_ttl=config.session_idle_ttl_seconds,
+                    memory_budget_bytes=config.session_memory_budget_mb * 1024 * 1024
+                )
+
+    return _sessions
+
+
+def _get_turn_queue() -> SessionTurnQueue:
+    """Get the global per-session turn queue, creating it on first use.
+
+    Returns:
+        The session turn queue
+    """
+    global _turn_queue
+
+    if _turn_queue is None:
+        with _sessions_lock:
+            if _turn_queue is None:
+                config = get_config()
+                _turn_queue = SessionTurnQueue(
+                    max_pending=config.session_max_pending_turns,
+                    coalesce_window=config.turn_coalesce_window_seconds
+                )
+
+    return _turn_queue
+
+
+def _get_session_repository() -> SessionRepository:
+    """Get the shared session repository, opening it on first use.
+
+    Sessions are stored in the SQLite database or as files depending on
+    SESSION_BACKEND. Unless SESSION_WRITE_BEHIND_MS is 0, writes are queued and
+    applied by a background writer so turns don't wait on storage.
+
+    Returns:
+        The session repository shared by all session managers
+    """
+    global _session_repository
+
+    if _session_repository is None:
+        with _sessions_lock:
+            if _session_repository is None:
+                config = get_config()
+                if config.session_backend == 'sqlite':
+                    repository = SQLiteSessionRepository(
+                        config.session_db_path,
+                        flush_interval=config.session_db_flush_ms / 1000,
+                        max_batch=config.session_db_max_batch
+                    )
+                    logger.info(f"Using SQLite session database at {config.session_db_path}")
+                else:
+                    # Time each session file write
+                    repository = InstrumentedFileSessionRepository(config.session_storage_dir)
+
+                if config.session_write_behind_ms > 0:
+                    repository = WriteBehindSessionRepository(
+                        repository,
+                        flush_interval=config.session_write_behind_ms / 1000,
+                        max_pending=config.session_write_behind_max_pending
+                    )
+                    logger.info(f"Session writes are applied in the background every {config.session_write_behind_ms:g}ms")
+
+                # Write everything still queued or uncommitted on shutdown
+                if hasattr(repository, 'close'):
+                    atexit.register(repository.close)
+                _session_repository = repository
+
+    return _session_repository
+
+
+def _create_session_manager(session_id: str) -> RepositorySessionManager:
+    """Create the session manager for a session on the shared repository.
+
+    Args:
+        session_id: Unique identifier for the conversation session
+
+    Returns:
+        Session manager that persists and restores the agent's conversation
+    """
+    return RepositorySessionManager(session_id=session_id, session_repository=_get_session_repository())
+
+
+def _has_persisted_session(session_id: str) -> bool:
+    """Check whether a session has conversation data in session storage.
+
+    Args:
+        session_id: Unique identifier for the conversation session
+
+    Returns:
+        True if the session exists in session storage or is queued to be written
+    """
+    return _get_session_repository().has_session(session_id)
+
+
+def _build_agent(session_manager: SessionManager) -> Agent:
+    """Build a Strands Agent with the Bedrock model, the shopping tools and hooks.
+
+    Args:
+        session_manager: Session manager to persist the agent with; pooled agents get a
+            DeferredSessionManager that is bound to a session when the agent is claimed
+
+    Returns:
+        Configured Agent instance
+    """
+    config = get_config()
+
+    # Keep recent turns verbatim and fold older ones into a running summary
+    conversation_manager = WindowedSummaryConversationManager(
+        window_turns=config.context_window_turns,
+        token_budget=config.context_token_budget,
+        max_summary_chars=config.context_summary_max_chars
+    )
+
+    # Model calls wait for a slot under the process-wide concurrency cap. The limiter is
+    # registered first so model call latency and spans exclude the wait for a slot.
+    hooks = [ModelCallLimitHooks(get_model_call_limiter()), AgentMetricsHooks(), TracingHooks()]
+    router = get_model_router()
+    if router is not None:
+        # Registered after the limiter so tier latency excludes the wait for a slot
+        hooks.append(ModelTierHooks(router))
+
+    return Agent(
+        # Reuse the process-wide Bedrock model and connection pool; each turn picks its tier
+        model=get_bedrock_model(),
+        tools=ALL_TOOLS,
+        system_prompt=SYSTEM_PROMPT,
+        session_manager=session_manager,
+        conversation_manager=conversation_manager,
+        # Independent tool calls run in parallel; cart tools keep their order
+        tool_executor=OrderedConcurrentToolExecutor(tool.tool_name for tool in CART_TOOLS),
+        # Responses go to HTTP clients; don't also print every token to stdout
+        callback_handler=None,
+        hooks=hooks,
+        name="ShoppingAssistant"
+    )
+
+
+def _get_agent_pool() -> Optional[AgentPool]:
+    """Get the global pre-warmed agent pool, creating it on first use.
+
+    Returns:
+        The agent pool, or None when AGENT_POOL_SIZE is 0
+    """
+    global _agent_pool
+
+    config = get_config()
+    if config.agent_pool_size <= 0:
+        return None
+
+    if _agent_pool is None:
+        with _sessions_lock:
+            if _agent_pool is None:
+                _agent_pool = AgentPool(
+                    _build_agent,
+                    target_size=config.agent_pool_size,
+                    refill_per_second=config.agent_pool_refill_per_second
+                )
+
+    return _agent_pool
+
+
+def _get_intent_router() -> Optional[IntentRouter]:
+    """Get the global intent router, creating it on first use.
+
+    Returns:
+        The intent router, or None when FAST_PATH_ENABLED is false
+    """
+    global _intent_router
+
+    config = get_config()
+    if not config.fast_path_enabled:
+        return None
+
+    if _intent_router is None:
+        with _sessions_lock:
+            if _intent_router is None:
+                _intent_router = IntentRouter(min_confidence=config.fast_path_min_confidence)
+
+    return _intent_router
+
+
+def warm_agent_pool() -> bool:
+    """Fill the agent pool before the server starts taking traffic.
+
+    Building the first agents also sets up the shared Bedrock client and tool
+    registry, so the first sessions don't pay for it.
+
+    Returns:
+        True if the pool is full (or disabled), False if warm-up timed out
+    """
+    pool = _get_agent_pool()
+    if pool is None:
+        return True
+    return pool.warm(get_config().agent_pool_warmup_timeout)
+
+
+def create_agent(session_id: str) -> Tuple[Agent, SessionManager]:
+    """Create and configure a Strands Agent backed by Bedrock.
+
+    A pre-built agent is claimed from the agent pool when one is ready;
+    otherwise one is built for the session.
     
     Args:
         session_id: Unique identifier for the conversation session
     
     Returns:
-        Configured Agent instance
+        Tuple of the configured Agent and the session manager persisting it
     
     Raises:
         Exception: If agent creation fails
     """
     try:
-        config = get_config()
-        
-        # Create boto3 session with credentials
-        boto_session = boto3.Session(
-            aws_access_key_id=config.aws_access_key_id,
-            aws_secret_access_key=config.aws_secret_access_key,
-            aws_session_token=config.aws_session_token,
-            region_name=config.aws_region
-        )
-        
-        # Create Bedrock model
-        logger.info(f"Initializing Bedrock Nova Pro model in region {config.aws_region}")
-        bedrock_model = BedrockModel(
-            model_id="us.amazon.nova-pro-v1:0",
-            boto_session=boto_session,
-            temperature=0.7,
-            streaming=True
-        )
-        
-        # Ensure session storage directory exists
-        os.makedirs(config.session_storage_dir, exist_ok=True)
-        
-        # Create session manager
-        session_manager = FileSessionManager(
-            session_id=session_id,
-            storage_dir=config.session_storage_dir
-        )
-        
-        # Create agent with model, tools, and session management
-        logger.info(f"Creating agent for session {session_id}")
-        agent = Agent(
-            model=bedrock_model,
-            tools=ALL_TOOLS,
-            system_prompt=SYSTEM_PROMPT,
-            session_manager=session_manager,
-            name="ShoppingAssistant"
-        )
-        
-        logger.info(f"Agent created successfully for session {session_id}")
-        return agent
+        start = time.perf_counter()
+        logger.info(f"Creating agent for session {session_id}", extra={'category': 'session'})
+
+        pool = _get_agent_pool()
+        pooled = pool.claim() if pool is not None else None
+        claimed = pooled is not None
+        # Create session manager for the configured storage backend
+        session_manager = _create_session_manager(session_id)
+        if pooled is not None:
+            agent, deferred_session_manager = pooled
+            deferred_session_manager.bind(session_manager, agent)
+        else:
+            agent = _build_agent(session_manager)
+
+        elapsed = time.perf_counter() - start
+        AGENT_CREATE_SECONDS.observe(elapsed)
+        if pool is not None:
+            AGENT_POOL_CLAIM_SECONDS.observe(elapsed, result='hit' if claimed else 'miss')
+            pool.record_claim(elapsed)
+        logger.info(f"Agent created successfully for session {session_id}", extra={'category': 'session'})
+        return agent, session_manager
     
     except Exception as e:
         logger.error(f"Failed to create agent: {str(e)}", exc_info=True)
@@ -108,6 +376,9 @@ def create_agent(session_id: str) -> Agent:
 
 def get_or_create_session(session_id: str) -> Dict:
     """Get an existing session or create a new one.
+
+    Sessions evicted from memory are rebuilt from session storage, which
+    restores their conversation history.
     
     Args:
         session_id: Unique identifier for the conversation session
@@ -115,73 +386,468 @@ def get_or_create_session(session_id: str) -> Dict:
     Returns:
         Dictionary containing session data including the agent
     """
-    global _sessions
+    store = _get_session_store()
+    with SESSION_LOOKUP_SECONDS.time(result='hit') as labels, span('session.lookup') as lookup_span:
+        session = store.get(session_id)
+
+        if session is None:
+            rehydrated = _has_persisted_session(session_id)
+            if rehydrated:
+                labels['result'] = 'rehydrated'
+                logger.info(f"Restoring session from storage: {session_id}", extra={'category': 'session'})
+            else:
+                labels['result'] = 'created'
+                logger.info(f"Creating new session: {session_id}", extra={'category': 'session'})
+            
+            # Create new agent for this session
+            with span('agent.create'):
+                agent, session_manager = create_agent(session_id)
+            
+            # Store session data
+            session = store.put(session_id, {
+                'session_id': session_id,
+                'agent': agent,
+                'session_manager': session_manager,
+                'created_at': datetime.now(),
+                'last_accessed': datetime.now()
+            }, rehydrated=rehydrated)
+        else:
+            # Update last accessed time
+            session['last_accessed'] = datetime.now()
+            logger.info(f"Using existing session: {session_id}", extra={'category': 'session'})
+
+        if lookup_span is not None:
+            lookup_span.set_attribute('result', labels['result'])
     
-    if session_id not in _sessions:
-        logger.info(f"Creating new session: {session_id}")
-        
-        # Create new agent for this session
-        agent = create_agent(session_id)
-        
-        # Store session data
-        _sessions[session_id] = {
-            'session_id': session_id,
-            'agent': agent,
-            'created_at': datetime.now(),
-            'last_accessed': datetime.now()
-        }
-    else:
-        # Update last accessed time
-        _sessions[session_id]['last_accessed'] = datetime.now()
-        logger.info(f"Using existing session: {session_id}")
+    return session
+
+
+def _record_turn_time(elapsed_ms: float, error: bool):
+    """Record the wall-clock duration of an agent turn.
+
+    Args:
+        elapsed_ms: Time from the start of the turn to its final response
+        error: Whether the turn failed
+    """
+    TURN_SECONDS.observe(elapsed_ms / 1000, outcome='error' if error else 'success')
+    with _turn_stats_lock:
+        _turn_stats['count'] += 1
+        _turn_stats['errors'] += int(error)
+        _turn_stats['total_ms'] += elapsed_ms
+        _turn_stats['max_ms'] = max(_turn_stats['max_ms'], elapsed_ms)
+        _turn_stats['samples'].append(elapsed_ms)
+
+
+def get_turn_stats() -> Dict[str, Any]:
+    """Get wall-clock timing statistics for agent turns.
+
+    Returns:
+        Dictionary with turn counts and latency figures in milliseconds
+    """
+    with _turn_stats_lock:
+        stats = dict(_turn_stats, samples=sorted(_turn_stats['samples']))
+
+    samples = stats['samples']
+    if not samples:
+        return {'count': 0, 'errors': 0}
+
+    return {
+        'count': stats['count'],
+        'errors': stats['errors'],
+        'avg_ms': round(stats['total_ms'] / stats['count'], 2),
+        'p50_ms': round(samples[int(0.50 * (len(samples) - 1))], 2),
+        'p95_ms': round(samples[int(0.95 * (len(samples) - 1))], 2),
+        'max_ms': round(stats['max_ms'], 2)
+    }
+
+
+def _extract_response_text(result) -> str:
+    """Extract the response text from an agent result.
+    
+    Args:
+        result: The value returned by the agent
     
-    return _sessions[session_id]
+    Returns:
+        The agent's response as a string
+    """
+    if hasattr(result, 'content'):
+        # Handle AgentResult object
+        return result.content
+    elif isinstance(result, str):
+        return result
+    return str(result)
 
 
-def process_message(message: str, session_id: str) -> str:
-    """Process a user message and return the agent's response.
+async def _run_fast_path(agent: Agent, session_manager: SessionManager, message: str,
+                         match: IntentMatch) -> Optional[Tuple[str, str]]:
+    """Answer a routed command by running its tool directly, without the model.
+    
+    The exchange is added to the agent's history as the same user message,
+    tool call, tool result and reply the model would have produced, so later
+    turns and the stored session see it like any other turn.
     
     Args:
+        agent: The session's agent
+        session_manager: Session manager persisting the agent
         message: The user's message
-        session_id: Unique identifier for the conversation session
+        match: Intent matched by the router
     
     Returns:
-        The agent's response as a string
+        Tuple of (tool use ID, reply), or None if the tool failed and the model should answer instead
+    """
+    router = _get_intent_router()
+    start = time.perf_counter()
+    tool_use_id = f"tooluse_fastpath_{uuid.uuid4().hex[:16]}"
+    with span(f"fast_path.{match.intent}", confidence=round(match.confidence, 2)):
+        try:
+            with span(f"tool.{match.tool_name}", tool_use_id=tool_use_id):
+                result = await asyncio.to_thread(match.tool, **match.arguments)
+        except Exception as e:
+            TOOL_CALL_SECONDS.observe(time.perf_counter() - start, tool=match.tool_name, status='error')
+            router.record(match, (time.perf_counter() - start) * 1000, error=True)
+            logger.warning(f"Fast path {match.intent} failed, falling back to the model: {str(e)}")
+            return None
+        TOOL_CALL_SECONDS.observe(time.perf_counter() - start, tool=match.tool_name, status='success')
+
+        reply = match.render(result)
+        messages = [
+            {'role': 'user', 'content': [{'text': message}]},
+            {'role': 'assistant', 'content': [
+                {'toolUse': {'toolUseId': tool_use_id, 'name': match.tool_name, 'input': match.arguments}}
+            ]},
+            {'role': 'user', 'content': [
+                {'toolResult': {'toolUseId': tool_use_id, 'status': 'success', 'content': [{'text': result}]}}
+            ]},
+            {'role': 'assistant', 'content': [{'text': reply}]}
+        ]
+        # Session writes block on file or queue I/O, so keep them off the event loop
+        await asyncio.to_thread(_record_fast_path, agent, session_manager, messages)
+
+    router.record(match, (time.perf_counter() - start) * 1000)
+    logger.info(f"Answered {match.intent} without the model (confidence {match.confidence:.2f})",
+                extra={'category': 'turn'})
+    return tool_use_id, reply
+
+
+def _record_fast_path(agent: Agent, session_manager: SessionManager, messages: List[Dict[str, Any]]):
+    """Add a fast-path exchange to the agent's history and persist it.
     
-    Raises:
-        Exception: If message processing fails
+    Messages are persisted one by one, as the agent does for each message it adds.
+    
+    Args:
+        agent: The session's agent
+        session_manager: Session manager persisting the agent
+        messages: User message, tool call, tool result and reply
+    """
+    for added in messages:
+        agent.messages.append(added)
+        session_manager.append_message(added, agent)
+    agent.conversation_manager.apply_management(agent)
+    session_manager.sync_agent(agent)
+
+
+def _route_intent(message: str) -> Optional[IntentMatch]:
+    """Match a message to a single tool call the fast path can answer."""
+    router = _get_intent_router()
+    return router.route(message) if router is not None else None
+
+
+def _select_model(agent: Agent, message: str) -> Dict[str, Any]:
+    """Put the agent on the model tier suited to a turn.
+
+    Args:
+        agent: Agent that will run the turn
+        message: The user's message
+
+    Returns:
+        Invocation state for the turn's model tier hooks (empty when tiering is disabled)
+    """
+    router = get_model_router()
+    if router is None:
+        return {}
+    state = router.start_turn(message)
+    agent.model = router.model_for(state['tier'])
+    return {'model_tier': state}
+
+
+def _finish_model_turn(invocation_state: Dict[str, Any], elapsed_ms: float):
+    """Record a model turn's duration under the tier it finished on."""
+    router = get_model_router()
+    if router is not None and 'model_tier' in invocation_state:
+        router.finish_turn(invocation_state['model_tier'], elapsed_ms)
+
+
+async def _run_turn(message: str, session_id: str) -> str:
+    """Run one agent turn and return the agent's response.
+    
+    Args:
+        message: The user's message
+        session_id: Unique identifier for the conversation session
+    
+    Returns:
+        The agent's response, or a user-friendly error message
     """
+    start = time.perf_counter()
+    TURNS_IN_PROGRESS.inc()
     try:
-        logger.info(f"Processing message for session {session_id}: {message[:100]}...")
+        logger.info(f"Processing message for session {session_id} ({len(message)} chars)", extra={'category': 'turn'})
+        logger.debug(f"Message for session {session_id}: {message[:100]}")
         
-        # Get or create session
-        session = get_or_create_session(session_id)
+        # Get or create session (may touch session storage, so keep it off the event loop)
+        session = await asyncio.to_thread(get_or_create_session, session_id)
         agent = session['agent']
+        session_manager = session['session_manager']
         
-        # Process message with agent
-        result = agent(message)
-        
-        # Extract response text
-        if hasattr(result, 'content'):
-            # Handle AgentResult object
-            response = result.content
-        elif isinstance(result, str):
-            response = result
+        # Answer simple commands directly; everything else goes to the model
+        match = _route_intent(message)
+        fast_path = await _run_fast_path(agent, session_manager, message, match) if match is not None else None
+        if fast_path is not None:
+            response = fast_path[1]
         else:
-            response = str(result)
+            invocation_state = _select_model(agent, message)
+            with model_call_scope():
+                result = await agent.invoke_async(message, invocation_state=invocation_state)
+            response = _extract_response_text(result)
+            _finish_model_turn(invocation_state, (time.perf_counter() - start) * 1000)
+
+        # Re-account the session's memory now that its history has grown
+        _get_session_store().update_size(session_id)
         
-        logger.info(f"Generated response for session {session_id}: {response[:100]}...")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        _record_turn_time(elapsed_ms, error=False)
+        logger.info(f"Generated response for session {session_id} in {elapsed_ms:.0f}ms ({len(response)} chars)",
+                    extra={'category': 'turn'})
+        logger.debug(f"Response for session {session_id}: {response[:100]}")
         return response
     
     except Exception as e:
+        _record_turn_time((time.perf_counter() - start) * 1000, error=True)
         error_msg = f"Error processing message: {str(e)}"
         logger.error(error_msg, exc_info=True)
         
         # Return user-friendly error message
-        return (
-            "I apologize, but I encountered an error while processing your request. "
-            "Please try again or rephrase your question."
-        )
+        return ERROR_RESPONSE
+
+    finally:
+        TURNS_IN_PROGRESS.dec()
+
+
+async def process_message_async(message: str, session_id: str) -> str:
+    """Process a user message on the running event loop and return the agent's response.
+    
+    Turns for the same session run one at a time in arrival order, and an
+    identical message re-sent within the coalesce window shares the earlier
+    turn's response instead of calling the model again.
+    
+    Args:
+        message: The user's message
+        session_id: Unique identifier for the conversation session
+    
+    Returns:
+        The agent's response as a string
+    
+    Raises:
+        TurnQueueFullError: If the session already has too many pending messages
+    """
+    with span('turn_queue.wait'):
+        ticket = await _get_turn_queue().join(session_id, message)
+    if ticket.duplicate:
+        with span('turn_queue.coalesced'):
+            return await ticket.wait() or ERROR_RESPONSE
+    
+    response = None
+    try:
+        with span('process_message', session_id=session_id), cart_session(session_id):
+            response = await _run_turn(message, session_id)
+        return response
+    finally:
+        ticket.finish(response)
+
+
+def process_message(message: str, session_id: str) -> str:
+    """Process a user message and return the agent's response.
+    
+    Synchronous wrapper around process_message_async for threaded servers.
+    
+    Args:
+        message: The user's message
+        session_id: Unique identifier for the conversation session
+    
+    Returns:
+        The agent's response as a string
+    """
+    return asyncio.run(process_message_async(message, session_id))
+
+
+def _to_stream_events(event: Dict[str, Any], seen_tool_uses: Set[str]) -> List[Dict[str, Any]]:
+    """Convert a Strands stream event into client-facing stream events.
+    
+    Args:
+        event: Event yielded by Agent.stream_async
+        seen_tool_uses: Tool use IDs already announced in this turn
+    
+    Returns:
+        Zero or more stream events for the client
+    """
+    if 'data' in event and event['data']:
+        return [{'type': 'token', 'text': event['data']}]
+
+    tool_use = event.get('current_tool_use')
+    if tool_use and tool_use.get('toolUseId') not in seen_tool_uses and tool_use.get('name'):
+        seen_tool_uses.add(tool_use.get('toolUseId'))
+        return [{'type': 'tool_call', 'tool': tool_use['name'], 'tool_use_id': tool_use.get('toolUseId')}]
+
+    message = event.get('message')
+    if isinstance(message, dict) and message.get('role') == 'user':
+        return [
+            {
+                'type': 'tool_result',
+                'tool_use_id': block['toolResult'].get('toolUseId'),
+                'status': block['toolResult'].get('status')
+            }
+            for block in message.get('content', [])
+            if 'toolResult' in block
+        ]
+
+    if 'result' in event:
+        return [{'type': 'done', 'response': _extract_response_text(event['result'])}]
+
+    return []
+
+
+async def _stream_turn(message: str, session_id: str,
+                       cancel_signal: Optional[threading.Event]) -> AsyncIterator[Dict[str, Any]]:
+    """Run one agent turn and yield response events as they are generated.
+    
+    Args:
+        message: The user's message
+        session_id: Unique identifier for the conversation session
+        cancel_signal: Optional event that cancels the agent turn when set
+    
+    Yields:
+        Event dictionaries with a 'type' of token, tool_call, tool_result, done or error
+    """
+    start = time.perf_counter()
+    TURNS_IN_PROGRESS.inc()
+    try:
+        logger.info(f"Streaming message for session {session_id} ({len(message)} chars)", extra={'category': 'turn'})
+        logger.debug(f"Message for session {session_id}: {message[:100]}")
+        session = await asyncio.to_thread(get_or_create_session, session_id)
+        agent = session['agent']
+        session_manager = session['session_manager']
+        seen_tool_uses: Set[str] = set()
+
+        match = _route_intent(message)
+        fast_path = await _run_fast_path(agent, session_manager, message, match) if match is not None else None
+        if fast_path is not None:
+            tool_use_id, reply = fast_path
+            yield {'type': 'tool_call', 'tool': match.tool_name, 'tool_use_id': tool_use_id}
+            yield {'type': 'tool_result', 'tool_use_id': tool_use_id, 'status': 'success'}
+            yield {'type': 'token', 'text': reply}
+            yield {'type': 'done', 'response': reply}
+        else:
+            invocation_state = _select_model(agent, message)
+            with model_call_scope():
+                async for event in agent.stream_async(message, cancel_signal=cancel_signal,
+                                                      invocation_state=invocation_state):
+                    for stream_event in _to_stream_events(event, seen_tool_uses):
+                        yield stream_event
+            _finish_model_turn(invocation_state, (time.perf_counter() - start) * 1000)
+
+        # Re-account the session's memory now that its history has grown
+        _get_session_store().update_size(session_id)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        _record_turn_time(elapsed_ms, error=False)
+        logger.info(f"Finished streaming response for session {session_id} in {elapsed_ms:.0f}ms",
+                    extra={'category': 'turn'})
+
+    except Exception as e:
+        _record_turn_time((time.perf_counter() - start) * 1000, error=True)
+        logger.error(f"Error streaming message: {str(e)}", exc_info=True)
+        yield {'type': 'error', 'error': ERROR_RESPONSE, 'error_type': 'llm'}
+
+    finally:
+        TURNS_IN_PROGRESS.dec()
+
+
+async def stream_message_async(message: str, session_id: str,
+                               cancel_signal: Optional[threading.Event] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Process a user message and yield response events as they are generated.
+    
+    Turns are serialized and coalesced per session as in process_message_async;
+    a coalesced duplicate receives only the final 'done' event.
+    
+    Args:
+        message: The user's message
+        session_id: Unique identifier for the conversation session
+        cancel_signal: Optional event that cancels the agent turn when set
+    
+    Yields:
+        Event dictionaries with a 'type' of token, tool_call, tool_result, done or error
+    """
+    try:
+        with span('turn_queue.wait'):
+            ticket = await _get_turn_queue().join(session_id, message)
+    except TurnQueueFullError as e:
+        logger.warning(str(e))
+        reject('session_busy')
+        yield {'type': 'error', 'error': SESSION_BUSY_RESPONSE, 'error_type': 'session_busy'}
+        return
+
+    if ticket.duplicate:
+        with span('turn_queue.coalesced'):
+            response = await ticket.wait()
+        yield {'type': 'done', 'response': response or ERROR_RESPONSE}
+        return
+
+    response = None
+    try:
+        with span('process_message', session_id=session_id, stream=True), cart_session(session_id):
+            async for event in _stream_turn(message, session_id, cancel_signal):
+                if event['type'] == 'done':
+                    response = event['response']
+                yield event
+    finally:
+        ticket.finish(response)
+
+
+def stream_message(message: str, session_id: str) -> Iterator[Dict[str, Any]]:
+    """Process a user message and yield response events as they are generated.
+    
+    The agent runs on a background thread so that callers can consume
+    tokens and tool-call progress synchronously. Closing the iterator early
+    (for example when the client disconnects) cancels the agent turn.
+    
+    Args:
+        message: The user's message
+        session_id: Unique identifier for the conversation session
+    
+    Yields:
+        Event dictionaries with a 'type' of token, tool_call, tool_result, done or error
+    """
+    events: queue.Queue = queue.Queue()
+    cancel_signal = threading.Event()
+
+    async def _produce():
+        try:
+            async for event in stream_message_async(message, session_id, cancel_signal):
+                events.put(event)
+        finally:
+            events.put(None)
+
+    # Run in a copy of this context so the turn's spans join the caller's trace
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(asyncio.run, _produce()), name=f"stream-{session_id}",
+                     daemon=True).start()
+
+    try:
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            yield event
+    finally:
+        cancel_signal.set()
 
 
 def clear_session(session_id: str) -> bool:
@@ -193,20 +859,149 @@ def clear_session(session_id: str) -> bool:
     Returns:
         True if session was cleared, False if session didn't exist
     """
-    global _sessions
-    
-    if session_id in _sessions:
+    if _get_session_store().remove(session_id):
         logger.info(f"Clearing session: {session_id}")
-        del _sessions[session_id]
         return True
     
     return False
 
 
+def apply_cluster_view(workers: List[str], worker: str, epoch: int, virtual_nodes: int) -> Dict[str, Any]:
+    """Hand off sessions this worker no longer owns after the cluster router rebalanced.
+
+    A session is kept in memory only if this worker owns it on the new ring and
+    also owned it on the ring it last heard about: if ownership moved away and
+    back in between, another worker may have changed the conversation since.
+    After a missed update every session is dropped. Turns already running or
+    queued for a dropped session finish first (for up to _HANDOFF_DRAIN_TIMEOUT
+    seconds), so no turn writes to a session after it has been handed off.
+    Dropped sessions, here and on the new owner, are restored from session
+    storage, so queued session writes are flushed before returning.
+
+    Args:
+        workers: Worker names on the new ring
+        worker: This worker's name on the ring
+        epoch: Ring version, incremented by the router on every change
+        virtual_nodes: Ring positions per worker, matching the router's ring
+
+    Returns:
+        Dictionary with the applied epoch and the number of sessions handed off
+    """
+    global _cluster_view
+
+    previous = _cluster_view
+    new_ring = HashRing(workers, virtual_nodes)
+    if previous['epoch'] == epoch - 1 and previous['worker'] == worker and worker in previous['workers']:
+        old_ring: Optional[HashRing] = HashRing(previous['workers'], virtual_nodes)
+    elif previous['epoch'] == 0:
+        # First view since startup: sessions in memory were only ever served here
+        old_ring = new_ring
+    else:
+        old_ring = None
+
+    def handed_off(session_id: str) -> bool:
+        return old_ring is None or old_ring.get(session_id) != worker or new_ring.get(session_id) != worker
+
+    if not _get_turn_queue().wait_idle(handed_off, _HANDOFF_DRAIN_TIMEOUT):
+        logger.warning(f"Turns for handed-off sessions still running after {_HANDOFF_DRAIN_TIMEOUT:g}s; "
+                       f"handing off anyway")
+    released = _get_session_store().evict_where(handed_off, 'handoff')
+    flush_session_storage()
+    _cluster_view = {'epoch': epoch, 'workers': list(workers), 'worker': worker}
+
+    logger.info(f"Cluster view {epoch}: {len(workers)} worker(s), handed off {released} session(s)")
+    return {'epoch': epoch, 'released': released}
+
+
 def get_active_sessions() -> int:
     """Get the number of active sessions.
     
     Returns:
         Number of active sessions
     """
-    return len(_sessions)
+    return len(_get_session_store())
+
+
+def get_turn_queue_stats() -> Dict:
+    """Get per-session turn queue statistics.
+    
+    Returns:
+        Dictionary of turn, coalesced and rejected counts
+    """
+    return _get_turn_queue().get_stats()
+
+
+def get_session_storage_stats() -> Dict:
+    """Get session persistence statistics.
+    
+    Returns:
+        Dictionary naming the storage backend, with write and commit counters for SQLite
+        and queue counters when writes are applied in the background
+    """
+    repository = _get_session_repository()
+    if isinstance(repository, WriteBehindSessionRepository):
+        return dict(repository.repository.get_stats(), write_behind=repository.get_stats())
+    return repository.get_stats()
+
+
+def flush_session_storage():
+    """Apply all queued session writes and commit them now, e.g. before the server stops."""
+    repository = _get_session_repository()
+    if isinstance(repository, WriteBehindSessionRepository):
+        repository.flush()
+        repository = repository.repository
+    if isinstance(repository, SQLiteSessionRepository):
+        repository.flush()
+
+
+def get_agent_pool_stats() -> Dict:
+    """Get pre-warmed agent pool statistics.
+
+    Returns:
+        Dictionary of pool depth, hit rate and claim latency, or {'enabled': False}
+    """
+    pool = _get_agent_pool()
+    return dict(pool.get_stats(), enabled=True) if pool is not None else {'enabled': False}
+
+
+def get_fast_path_stats() -> Dict:
+    """Get intent router statistics.
+
+    Returns:
+        Dictionary of fast-path matches per intent, fall-throughs and latency, or {'enabled': False}
+    """
+    router = _get_intent_router()
+    return dict(router.get_stats(), enabled=True) if router is not None else {'enabled': False}
+
+
+def is_agent_pool_warming() -> bool:
+    """Check whether the agent pool is still filling during startup warm-up."""
+    pool = _get_agent_pool()
+    return pool is not None and pool.state == 'warming'
+
+
+def get_session_stats() -> Dict:
+    """Get session store statistics.
+    
+    Returns:
+        Dictionary of session store hit/miss/eviction counters
+    """
+    return _get_session_store().get_stats()
+
+
+# Session and queue gauges, read from the stores when /metrics is scraped
+REGISTRY.register(Gauge(
+    'chatbot_active_sessions', 'Sessions held in memory.',
+    callback=get_active_sessions))
+REGISTRY.register(Gauge(
+    'chatbot_session_memory_bytes', 'Estimated memory held by in-memory sessions.',
+    callback=lambda: get_session_stats()['memory_bytes']))
+REGISTRY.register(Gauge(
+    'chatbot_pending_turns', 'Chat messages running or queued in per-session turn queues.',
+    callback=lambda: get_turn_queue_stats()['pending']))
+REGISTRY.register(Gauge(
+    'chatbot_agent_pool_depth', 'Pre-warmed agents ready to be claimed by new sessions.',
+    callback=lambda: _agent_pool.depth if _agent_pool is not None else 0))
+REGISTRY.register(Gauge(
+    'chatbot_cluster_worker_info', 'CLUSTER_WORKER_ID of this process when it runs as a cluster worker.', ['worker'],
+    callback=lambda: {(get_config().cluster_worker_id,): 1} if get_config().cluster_worker_id else {}))
@@ -0,0 +1,211 @@
+"""Pre-warmed agent pool for the Shopping Assistant Chatbot.
+
+Building an agent means constructing its conversation manager and tool
+executor and registering every tool spec. This module keeps a pool of agents
+built ahead of time, refilled in the background at a configurable rate, so a
+new session can claim one and only bind its session storage. Each pooled agent
+is built with a DeferredSessionManager that has no session yet and is bound to
+one when the agent is claimed. When the pool is empty a session falls back to
+building its own agent, and the refill thread catches up.
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+from strands import Agent
+from strands.session.session_manager import SessionManager
+from strands.types.content import Message
+
+logger = logging.getLogger(__name__)
+
+# Number of recent claim latencies kept for percentile estimates
+_CLAIM_SAMPLE_SIZE = 256
+
+
+class DeferredSessionManager(SessionManager):
+    """Session manager of a pooled agent, bound to a session's manager when the agent is claimed.
+
+    Until then the agent has no session: nothing is restored or persisted. The
+    agent's session_id property keeps the random ID it was built with; the bound
+    session's ID is read from this manager.
+    """
+
+    def __init__(self):
+        """Initialize an unbound session manager."""
+        self.session_manager: Optional[SessionManager] = None
+
+    @property
+    def session_id(self) -> Optional[str]:
+        """ID of the bound session, or None before the agent is claimed."""
+        return self.session_manager.session_id if self.session_manager is not None else None
+
+    def bind(self, session_manager: SessionManager, agent: Agent):
+        """Attach a session to the agent, restoring any persisted conversation.
+
+        Args:
+            session_manager: Session manager of the session claiming the agent
+            agent: The pooled agent this manager was built with
+        """
+        self.session_manager = session_manager
+        session_manager.initialize(agent)
+
+    def initialize(self, agent: Agent, **kwargs: Any) -> None:
+        """Restore the agent from its session; does nothing while unbound."""
+        if self.session_manager is not None:
+            self.session_manager.initialize(agent, **kwargs)
+
+    def append_message(self, message: Message, agent: Agent, **kwargs: Any) -> None:
+        """Persist a message added to the agent; does nothing while unbound."""
+        if self.session_manager is not None:
+            self.session_manager.append_message(message, agent, **kwargs)
+
+    def redact_latest_message(self, redact_message: Message, agent: Agent, **kwargs: Any) -> None:
+        """Replace the latest persisted message; does nothing while unbound."""
+        if self.session_manager is not None:
+            self.session_manager.redact_latest_message(redact_message, agent, **kwargs)
+
+    def sync_agent(self, agent: Agent, **kwargs: Any) -> None:
+        """Persist the agent's state; does nothing while unbound."""
+        if self.session_manager is not None:
+            self.session_manager.sync_agent(agent, **kwargs)
+
+
+class AgentPool:
+    """Pool of ready-to-bind agents maintained by a background refill thread."""
+
+    def __init__(self, factory: Callable[[SessionManager], Agent], target_size: int, refill_per_second: float):
+        """Initialize the pool. Agents are not built until start() is called.
+
+        Args:
+            factory: Function building an agent with the given session manager
+            target_size: Number of idle agents to keep ready
+            refill_per_second: Most agents built per second while refilling (0 for no limit)
+        """
+        self.factory = factory
+        self.target_size = target_size
+        self.refill_per_second = refill_per_second
+
+        self._agents: "deque[Tuple[Agent, DeferredSessionManager]]" = deque()
+        self._lock = threading.Lock()
+        self._refill = threading.Event()
+        self._warm = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {'built': 0, 'build_errors': 0, 'hits': 0, 'misses': 0}
+        self._claim_samples: "deque[float]" = deque(maxlen=_CLAIM_SAMPLE_SIZE)
+
+    def start(self):
+        """Start the refill thread if it is not running yet."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='agent-pool-refill', daemon=True)
+            self._thread.start()
+        logger.info(f"Warming agent pool to {self.target_size} agent(s)")
+
+    def warm(self, timeout: float) -> bool:
+        """Start the pool and wait until it holds its target number of agents.
+
+        Args:
+            timeout: Longest time to wait in seconds
+
+        Returns:
+            True if the pool was filled before the timeout
+        """
+        self.start()
+        warmed = self._warm.wait(timeout)
+        if not warmed:
+            logger.warning(f"Agent pool holds {self.depth} of {self.target_size} agent(s) after {timeout:g}s warm-up")
+        return warmed
+
+    def stop(self):
+        """Stop the refill thread and drop idle agents."""
+        self._stopped.set()
+        self._refill.set()
+        with self._lock:
+            self._agents.clear()
+
+    @property
+    def depth(self) -> int:
+        """Number of idle agents ready to be claimed."""
+        return len(self._agents)
+
+    @property
+    def state(self) -> str:
+        """Pool lifecycle state: idle (not started), warming or ready."""
+        if self._warm.is_set():
+            return 'ready'
+        return 'idle' if self._thread is None else 'warming'
+
+    def claim(self) -> Optional[Tuple[Agent, DeferredSessionManager]]:
+        """Take an idle agent from the pool and trigger a refill.
+
+        Returns:
+            A pre-built agent and its unbound session manager, or None if the pool is empty
+        """
+        self.start()
+        with self._lock:
+            pooled = self._agents.popleft() if self._agents else None
+            self._stats['hits' if pooled is not None else 'misses'] += 1
+        self._refill.set()
+        return pooled
+
+    def record_claim(self, seconds: float):
+        """Record how long a session took to get a ready agent.
+
+        Args:
+            seconds: Time from the claim to a session-bound agent
+        """
+        with self._lock:
+            self._claim_samples.append(seconds * 1000)
+
+    def _run(self):
+        """Build agents until the pool is full, then wait for claims."""
+        interval = 1.0 / self.refill_per_second if self.refill_per_second > 0 else 0.0
+        while not self._stopped.is_set():
+            if self.depth >= self.target_size:
+                self._warm.set()
+                self._refill.wait()
+                self._refill.clear()
+                continue
+
+            try:
+                session_manager = DeferredSessionManager()
+                agent = self.factory(session_manager)
+            except Exception as e:
+                self._stats['build_errors'] += 1
+                logger.error(f"Failed to build pooled agent: {str(e)}")
+                # Back off instead of retrying a failing build in a tight loop
+                self._stopped.wait(max(interval, 1.0))
+                continue
+
+            with self._lock:
+                self._agents.append((agent, session_manager))
+                self._stats['built'] += 1
+
+            if interval and self.depth < self.target_size:
+                self._stopped.wait(interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool depth, hit rate and claim latency for monitoring.
+
+        Returns:
+            Dictionary of pool counters and claim latency in milliseconds
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            samples = sorted(self._claim_samples)
+            stats['depth'] = len(self._agents)
+
+        claims = stats['hits'] + stats['misses']
+        stats.update(
+            state=self.state,
+            target_size=self.target_size,
+            refill_per_second=self.refill_per_second,
+            hit_rate=round(stats['hits'] / claims, 3) if claims else 0.0,
+            claim_p50_ms=round(samples[len(samples) // 2], 3) if samples else 0.0,
+            claim_p99_ms=round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3) if samples else 0.0
+        )
+        return stats
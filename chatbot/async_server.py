@@ -0,0 +1,471 @@
+"""Asyncio HTTP server module for the Shopping Assistant Chatbot.
+
+This module serves the chat API from a single asyncio event loop with
+Starlette and uvicorn. Agent turns run as coroutines, so concurrency is bounded
+by a configurable limit and wait queue rather than one OS thread per request,
+and shutdown drains in-flight turns before the process exits.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+import uvicorn
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from chatbot.admission import AdmissionError, check_admission, client_ip, reject
+from chatbot.agent import (
+    apply_cluster_view,
+    flush_session_storage,
+    process_message_async,
+    stream_message_async,
+    warm_agent_pool
+)
+from chatbot.config import get_config
+from chatbot.metrics import CONTENT_TYPE, REGISTRY, Gauge, render_metrics
+from chatbot.server import (
+    CLUSTER_SECRET_HEADER,
+    CORS_ORIGINS,
+    TRACE_HEADER,
+    admission_error_body,
+    format_sse,
+    get_health_status,
+    parse_trace_limit,
+    session_busy_body,
+    validate_catalog_invalidation,
+    validate_chat_payload,
+    validate_cluster_view
+)
+from chatbot.tools import invalidate_catalog_cache, start_recommendations
+from chatbot.tracing import get_recent_traces, new_trace_id, start_trace
+from chatbot.turn_queue import TurnQueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(Exception):
+    """Raised when the server cannot accept another chat turn."""
+    pass
+
+
+class ConcurrencyLimiter:
+    """Bounds concurrently running chat turns with a bounded wait queue."""
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        """Initialize the limiter.
+
+        Args:
+            max_concurrency: Maximum chat turns running at once
+            max_queue: Maximum chat turns waiting for a slot before new ones are rejected
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        """Wait for a free slot.
+
+        Raises:
+            OverloadedError: If all slots are busy and the wait queue is full
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise OverloadedError("Chat request queue is full")
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self._idle.clear()
+
+    def release(self):
+        """Release a slot acquired with acquire()."""
+        self.active -= 1
+        self._semaphore.release()
+        if self.active == 0:
+            self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait for all running chat turns to finish.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if all turns finished, False if the timeout expired
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter counters for monitoring.
+
+        Returns:
+            Dictionary of active, waiting and rejected turn counts
+        """
+        return {
+            'active': self.active,
+            'waiting': self.waiting,
+            'rejected': self.rejected,
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue
+        }
+
+
+# Limiter of the running app, read by the module-level gauges below
+_current_limiter: Optional[ConcurrencyLimiter] = None
+
+REGISTRY.register(Gauge(
+    'chatbot_server_active_turns', 'Chat turns holding a concurrency slot.',
+    callback=lambda: _current_limiter.active if _current_limiter is not None else 0))
+REGISTRY.register(Gauge(
+    'chatbot_server_waiting_turns', 'Chat turns waiting for a concurrency slot.',
+    callback=lambda: _current_limiter.waiting if _current_limiter is not None else 0))
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """Streaming response that frees its chat turn's concurrency slot however the response ends.
+
+    The body generator's own cleanup does not run if the client disconnects
+    before streaming starts or sending the headers fails, so the slot is also
+    released once the response has been handled.
+    """
+
+    def __init__(self, content: AsyncIterator[str], release: Callable[[], None], **kwargs: Any):
+        """Initialize the response.
+
+        Args:
+            content: Response body generator
+            release: Idempotent callback that frees the concurrency slot
+            **kwargs: Arguments for StreamingResponse
+        """
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+
+def _overloaded_response(session_id: str) -> JSONResponse:
+    """Build the response returned when the server is at capacity.
+
+    Args:
+        session_id: Session ID from the rejected request
+
+    Returns:
+        503 JSON response with a Retry-After header
+    """
+    return JSONResponse({
+        'error': 'The assistant is busy right now. Please try again in a moment.',
+        'error_type': 'overloaded',
+        'session_id': session_id
+    }, status_code=503, headers={'Retry-After': '1'})
+
+
+def _admit(request: Request, session_id: str):
+    """Apply admission control to a chat request.
+
+    Args:
+        request: Incoming Starlette request
+        session_id: Session ID from the request body
+
+    Returns:
+        None if admitted, otherwise a 429 or 503 JSON response with a Retry-After header
+    """
+    peer = request.client.host if request.client else None
+    try:
+        check_admission(session_id, client_ip(peer, request.headers.get('x-forwarded-for')))
+    except AdmissionError as e:
+        return JSONResponse(admission_error_body(e, session_id), status_code=e.status,
+                            headers={'Retry-After': e.retry_after_header})
+    return None
+
+
+async def _read_chat_request(request: Request):
+    """Decode and validate a chat request body.
+
+    Args:
+        request: Incoming Starlette request
+
+    Returns:
+        Tuple of (request data, None) if valid, or (None, error response) if invalid
+    """
+    if 'application/json' not in request.headers.get('content-type', ''):
+        logger.warning("Request received with non-JSON content type")
+        return None, JSONResponse({
+            'error': 'Content-Type must be application/json',
+            'error_type': 'validation'
+        }, status_code=400)
+
+    try:
+        data = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        data = None
+
+    error = validate_chat_payload(data)
+    if error:
+        body, status = error
+        return None, JSONResponse(body, status_code=status)
+
+    return data, None
+
+
+def create_async_app() -> Starlette:
+    """Create and configure the asyncio application.
+
+    Returns:
+        Configured Starlette application
+    """
+    config = get_config()
+    limiter_holder: Dict[str, ConcurrencyLimiter] = {}
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        global _current_limiter
+        # Blocking work (Bedrock streaming, tool HTTP calls, session files) runs on
+        # the default executor, so its size caps the threads the server can use.
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            max_workers=config.server_worker_threads,
+            thread_name_prefix='chatbot-worker'
+        )
+        loop.set_default_executor(executor)
+        limiter_holder['limiter'] = _current_limiter = ConcurrencyLimiter(
+            config.server_max_concurrency,
+            config.server_queue_size
+        )
+        # Build pooled agents before accepting traffic; the recommendation model builds in the background
+        start_recommendations()
+        await loop.run_in_executor(None, warm_agent_pool)
+        logger.info(
+            f"Async server ready (max concurrency {config.server_max_concurrency}, "
+            f"queue size {config.server_queue_size}, worker threads {config.server_worker_threads})"
+        )
+
+        yield
+
+        logger.info("Draining in-flight chat turns...")
+        if not await limiter_holder['limiter'].drain(config.server_shutdown_timeout):
+            logger.warning("Shutdown timeout reached with chat turns still running")
+        # Persist session writes still waiting in the write-behind queue
+        flush_session_storage()
+        executor.shutdown(wait=False)
+        logger.info("Async server stopped")
+
+    async def health_check(request: Request) -> JSONResponse:
+        """Health check endpoint."""
+        status = get_health_status()
+        if 'limiter' in limiter_holder:
+            status['server'] = limiter_holder['limiter'].get_stats()
+        return JSONResponse(status, status_code=200 if status['status'] == 'healthy' else 503)
+
+    async def metrics(request: Request) -> Response:
+        """Prometheus metrics endpoint."""
+        return Response(render_metrics(), headers={'Content-Type': CONTENT_TYPE})
+
+    async def debug_traces(request: Request) -> JSONResponse:
+        """Slowest recent request traces, optionally filtered by session_id."""
+        traces = get_recent_traces(
+            session_id=request.query_params.get('session_id') or None,
+            limit=parse_trace_limit(request.query_params.get('limit'))
+        )
+        return JSONResponse({'traces': traces})
+
+    async def cluster_rebalance(request: Request) -> JSONResponse:
+        """Apply new worker membership from the cluster router, handing off sessions."""
+        try:
+            data = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            data = None
+        error = validate_cluster_view(request.headers.get(CLUSTER_SECRET_HEADER), data)
+        if error:
+            body, status = error
+            return JSONResponse(body, status_code=status)
+        # Flushing handed-off sessions' writes blocks, so keep it off the event loop
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, apply_cluster_view, data['workers'], data['worker'], data['epoch'], data['virtual_nodes']
+        )
+        return JSONResponse(result)
+
+    async def catalog_invalidate(request: Request) -> JSONResponse:
+        """Drop cached catalog data after the catalog changed in the backend."""
+        try:
+            data = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            data = None
+        error = validate_catalog_invalidation(request.headers.get('Authorization'), data)
+        if error:
+            body, status = error
+            return JSONResponse(body, status_code=status)
+        product_id = (data or {}).get('product_id')
+        invalidate_catalog_cache(product_id)
+        return JSONResponse({'invalidated': product_id})
+
+    async def chat(request: Request) -> JSONResponse:
+        """Main chat endpoint for processing user messages."""
+        data, error_response = await _read_chat_request(request)
+        if error_response:
+            return error_response
+
+        message = data['message']
+        session_id = data['session_id']
+        limiter = limiter_holder['limiter']
+
+        rejection = _admit(request, session_id)
+        if rejection:
+            return rejection
+
+        try:
+            await limiter.acquire()
+        except OverloadedError:
+            logger.warning(f"Rejecting chat request for session {session_id}: server overloaded")
+            reject('server_capacity')
+            return _overloaded_response(session_id)
+
+        try:
+            trace_id = new_trace_id()
+            logger.info(f"Chat request - Session: {session_id}, Message length: {len(message)}",
+                        extra={'category': 'request', 'trace_id': trace_id})
+            with start_trace('POST /chat', session_id=session_id, trace_id=trace_id):
+                response = await process_message_async(message, session_id)
+            return JSONResponse({'response': response, 'session_id': session_id}, headers={TRACE_HEADER: trace_id})
+
+        except TurnQueueFullError as e:
+            logger.warning(str(e))
+            reject('session_busy')
+            return JSONResponse(session_busy_body(session_id), status_code=429, headers={'Retry-After': '2'})
+
+        except Exception as e:
+            logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
+            return JSONResponse({
+                'error': 'An internal error occurred. Please try again.',
+                'error_type': 'server',
+                'session_id': session_id
+            }, status_code=500)
+
+        finally:
+            limiter.release()
+
+    async def chat_stream(request: Request):
+        """Streaming chat endpoint using Server-Sent Events."""
+        data, error_response = await _read_chat_request(request)
+        if error_response:
+            return error_response
+
+        message = data['message']
+        session_id = data['session_id']
+        limiter = limiter_holder['limiter']
+
+        rejection = _admit(request, session_id)
+        if rejection:
+            return rejection
+
+        try:
+            await limiter.acquire()
+        except OverloadedError:
+            logger.warning(f"Rejecting chat stream for session {session_id}: server overloaded")
+            reject('server_capacity')
+            return _overloaded_response(session_id)
+
+        released = False
+
+        def release_slot():
+            nonlocal released
+            if not released:
+                released = True
+                limiter.release()
+
+        cancel_signal = threading.Event()
+        trace_id = new_trace_id()
+        logger.info(f"Chat stream request - Session: {session_id}, Message length: {len(message)}",
+                    extra={'category': 'request', 'trace_id': trace_id})
+
+        async def generate() -> AsyncIterator[str]:
+            try:
+                with start_trace('POST /chat/stream', session_id=session_id, trace_id=trace_id):
+                    async for event in stream_message_async(message, session_id, cancel_signal):
+                        event['session_id'] = session_id
+                        yield format_sse(event)
+            finally:
+                cancel_signal.set()
+                release_slot()
+
+        try:
+            return SlotStreamingResponse(
+                generate(),
+                release_slot,
+                media_type='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', TRACE_HEADER: trace_id}
+            )
+        except Exception:
+            release_slot()
+            raise
+
+    routes = [
+        Route('/health', health_check, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+        Route('/debug/traces', debug_traces, methods=['GET']),
+        Route('/chat', chat, methods=['POST']),
+        Route('/chat/stream', chat_stream, methods=['POST'])
+    ]
+    # Only cluster workers, which are started with CLUSTER_SECRET, take membership updates
+    if config.cluster_secret:
+        routes.append(Route('/cluster/rebalance', cluster_rebalance, methods=['POST']))
+    if config.catalog_admin_token:
+        routes.append(Route('/admin/catalog/invalidate', catalog_invalidate, methods=['POST']))
+
+    return Starlette(
+        routes=routes,
+        middleware=[
+            Middleware(
+                CORSMiddleware,
+                allow_origins=CORS_ORIGINS,
+                allow_methods=['GET', 'POST', 'OPTIONS'],
+                allow_headers=['Content-Type']
+            )
+        ],
+        lifespan=lifespan
+    )
+
+
+def run_async_server():
+    """Run the asyncio server.
+
+    uvicorn handles SIGINT/SIGTERM: it stops accepting connections, waits up to
+    SERVER_SHUTDOWN_TIMEOUT seconds for in-flight turns, then exits.
+    """
+    config = get_config()
+    app = create_async_app()
+
+    logger.info(f"Starting async chatbot service on port {config.chatbot_port}")
+    logger.info(f"Backend API URL: {config.backend_api_url}")
+
+    server = uvicorn.Server(uvicorn.Config(
+        app,
+        host=config.chatbot_host,
+        port=config.chatbot_port,
+        timeout_graceful_shutdown=int(config.server_shutdown_timeout),
+        log_config=None
+    ))
+    server.run()
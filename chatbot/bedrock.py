@@ -0,0 +1,123 @@
+"""Bedrock client module for the Shopping Assistant Chatbot.
+
+This module owns the process-wide boto3 session and Bedrock runtime connection
+pool so that every agent shares the same credentials, client and keep-alive
+connections instead of building its own per chat session.
+"""
+
+import logging
+import threading
+import boto3
+from typing import Dict, Optional, Tuple
+from botocore.config import Config as BotocoreConfig
+from strands.models import BedrockModel, Model
+from chatbot.config import get_config
+
+logger = logging.getLogger(__name__)
+
+
+# Shared boto3 session and models, keyed by (model_id, temperature)
+_boto_session: Optional[boto3.Session] = None
+_models: Dict[Tuple[str, float], BedrockModel] = {}
+_lock = threading.Lock()
+
+# Models served in place of Bedrock when set (offline benchmarks and tests), keyed by
+# model ID; the None key replaces every model
+_model_overrides: Dict[Optional[str], Model] = {}
+
+
+def _get_boto_session() -> boto3.Session:
+    """Get the shared boto3 session, creating it on first use.
+
+    Must be called with the module lock held.
+
+    Returns:
+        The process-wide boto3 session
+    """
+    global _boto_session
+
+    if _boto_session is None:
+        config = get_config()
+        logger.info(f"Creating shared boto3 session in region {config.aws_region}")
+        _boto_session = boto3.Session(**config.get_aws_credentials())
+
+    return _boto_session
+
+
+def _build_client_config() -> BotocoreConfig:
+    """Build the botocore configuration for the shared Bedrock connection pool.
+
+    Returns:
+        Botocore configuration with pool size, keep-alive and timeouts applied
+    """
+    config = get_config()
+    return BotocoreConfig(
+        max_pool_connections=config.bedrock_max_pool_connections,
+        tcp_keepalive=True,
+        connect_timeout=config.bedrock_connect_timeout,
+        read_timeout=config.bedrock_read_timeout,
+        retries={'max_attempts': config.bedrock_max_retries, 'mode': 'adaptive'}
+    )
+
+
+def get_bedrock_model(model_id: Optional[str] = None, temperature: Optional[float] = None) -> Model:
+    """Get a shared Bedrock model, creating it on first use.
+
+    Models are stateless between invocations, so a single instance (and its
+    underlying boto3 client and connection pool) is shared by all agents.
+
+    Args:
+        model_id: Bedrock model ID (default: the configured model)
+        temperature: Sampling temperature for the model (default: BEDROCK_TEMPERATURE)
+
+    Returns:
+        Shared BedrockModel instance, or the override model if one is set
+    """
+    config = get_config()
+    model_id = model_id or config.bedrock_model_id
+
+    override = _model_overrides.get(model_id) or _model_overrides.get(None)
+    if override is not None:
+        return override
+
+    temperature = config.bedrock_temperature if temperature is None else temperature
+    key = (model_id, temperature)
+
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        if key not in _models:
+            logger.info(f"Initializing shared Bedrock model {model_id} in region {config.aws_region}")
+            _models[key] = BedrockModel(
+                model_id=model_id,
+                boto_session=_get_boto_session(),
+                boto_client_config=_build_client_config(),
+                temperature=temperature,
+                streaming=True
+            )
+        return _models[key]
+
+
+def set_model_override(model: Optional[Model], model_id: Optional[str] = None):
+    """Serve a different model in place of Bedrock, e.g. a local fake for load tests.
+
+    Args:
+        model: Model returned by get_bedrock_model(), or None to use Bedrock again
+        model_id: Only replace this Bedrock model ID (default: replace every model)
+    """
+    with _lock:
+        if model is None:
+            _model_overrides.pop(model_id, None)
+        else:
+            _model_overrides[model_id] = model
+
+
+def reset_bedrock_models():
+    """Drop the shared boto3 session and models (useful for testing)."""
+    global _boto_session
+
+    with _lock:
+        _models.clear()
+        _boto_session = None
@@ -0,0 +1,5 @@
+"""Offline load-testing harness for the Shopping Assistant Chatbot.
+
+Runs the real chatbot server against an in-process fake backend and a
+scripted fake model; see chatbot/benchmark/__main__.py for usage.
+"""
@@ -0,0 +1,203 @@
+"""Run the offline chatbot load test.
+
+Starts an in-process fake backend, points the real chatbot server at it with
+a scripted fake model in place of Bedrock, replays conversations at a target
+rate, and prints latency, throughput, error and memory figures per scenario.
+No AWS credentials or Node backend are needed.
+
+Usage:
+    python -m chatbot.benchmark --rps 20 --duration 30
+    python -m chatbot.benchmark --trace traces.jsonl --stream --server-mode threaded
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(prog='python -m chatbot.benchmark', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scenario', action='append', dest='scenarios',
+                        help='Built-in scenario to run: browse, cart or mixed (repeatable; default: all)')
+    parser.add_argument('--trace', help='JSONL file of conversations to replay instead of the built-in scenarios')
+    parser.add_argument('--rps', type=float, default=10.0, help='Target chat messages per second (default: 10)')
+    parser.add_argument('--duration', type=float, default=20.0,
+                        help='Seconds to keep starting conversations per scenario (default: 20)')
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help='Seconds a simulated customer waits after each reply (default: 1)')
+    parser.add_argument('--stream', action='store_true', help='Use /chat/stream instead of /chat')
+    parser.add_argument('--server-mode', choices=['async', 'threaded'], default='async',
+                        help='Chatbot server to start (default: async)')
+    parser.add_argument('--max-clients', type=int, default=256, help='Maximum simultaneous simulated customers')
+    parser.add_argument('--model-latency', type=float, default=0.3,
+                        help='Fake model seconds before each response starts (default: 0.3)')
+    parser.add_argument('--token-latency', type=float, default=0.01,
+                        help='Fake model seconds between streamed words (default: 0.01)')
+    parser.add_argument('--backend-latency', type=float, default=0.005,
+                        help='Fake backend seconds per request (default: 0.005)')
+    parser.add_argument('--script', help='JSON file of fake model tool-call rules (pattern, tool, input)')
+    parser.add_argument('--output', help='Also write results as JSON to this file')
+    parser.add_argument('--log-mode', choices=['off', 'sync', 'async'], default='off',
+                        help='Request logging to measure: off (warnings only), sync (every INFO line written '
+                             'by the request thread) or async (queued and sampled) (default: off)')
+    return parser.parse_args(argv)
+
+
+def _free_port() -> int:
+    """Find an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _start_chat_server(mode: str) -> Tuple[str, Callable[[], None]]:
+    """Start the real chatbot server in a background thread.
+
+    Args:
+        mode: 'async' (Starlette/uvicorn) or 'threaded' (Flask/werkzeug)
+
+    Returns:
+        Tuple of (base URL, function that stops the server)
+    """
+    port = _free_port()
+
+    if mode == 'async':
+        import uvicorn
+        from chatbot.async_server import create_async_app
+
+        server = uvicorn.Server(uvicorn.Config(
+            create_async_app(), host='127.0.0.1', port=port, log_config=None, log_level='warning'
+        ))
+        thread = threading.Thread(target=server.run, name='chat-server', daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+
+        def stop():
+            server.should_exit = True
+            thread.join(timeout=30)
+    else:
+        from werkzeug.serving import make_server
+        from chatbot.server import create_app
+
+        # Per-request access logs would drown out the report
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', port, create_app(), threaded=True)
+        thread = threading.Thread(target=server.serve_forever, name='chat-server', daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+def main(argv=None) -> int:
+    """Run the benchmark and print the report."""
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    from chatbot.benchmark.fake_backend import FakeBackend
+    from chatbot.benchmark.fake_model import FakeModel
+    from chatbot.benchmark.runner import BUILTIN_SCENARIOS, format_report, load_traces, run_scenario
+
+    backend = FakeBackend(latency=args.backend_latency)
+    backend.start()
+
+    # Configuration is read once, so point it at the fakes before any chatbot module loads it
+    os.environ['BACKEND_API_URL'] = backend.url
+    os.environ['SESSION_STORAGE_DIR'] = tempfile.mkdtemp(prefix='chatbot-bench-sessions-')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    if args.log_mode == 'off':
+        os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    else:
+        # Log to a scratch file only, so the overhead is measured without flooding the report
+        os.environ['LOG_LEVEL'] = 'INFO'
+        os.environ['LOG_FILE'] = os.path.join(tempfile.mkdtemp(prefix='chatbot-bench-logs-'), 'chatbot.log')
+        if args.log_mode == 'sync':
+            os.environ['LOG_QUEUE_SIZE'] = '0'
+            os.environ['LOG_SAMPLE_RATES'] = ''
+    # Every simulated customer comes from one IP; measure the server, not the rate limits
+    os.environ.setdefault('RATE_LIMIT_SESSION_PER_MINUTE', '0')
+    os.environ.setdefault('RATE_LIMIT_IP_PER_MINUTE', '0')
+
+    from chatbot.bedrock import set_model_override
+    from chatbot.config import get_config
+    from chatbot.log_pipeline import configure_logging, get_logging_stats, stop_logging
+
+    if args.log_mode != 'off':
+        configure_logging(get_config(), stdout=False)
+
+    script = None
+    if args.script:
+        with open(args.script, encoding='utf-8') as script_file:
+            script = json.load(script_file)
+    set_model_override(FakeModel(
+        script=script,
+        first_token_latency=args.model_latency,
+        token_latency=args.token_latency
+    ))
+
+    if args.trace:
+        scenarios = {os.path.splitext(os.path.basename(args.trace))[0]: load_traces(args.trace)}
+    else:
+        names = args.scenarios or list(BUILTIN_SCENARIOS)
+        unknown = [name for name in names if name not in BUILTIN_SCENARIOS]
+        if unknown:
+            print(f"Unknown scenario(s): {', '.join(unknown)}", file=sys.stderr)
+            return 2
+        scenarios = {name: BUILTIN_SCENARIOS[name] for name in names}
+
+    base_url, stop_server = _start_chat_server(args.server_mode)
+    print(f"Chatbot ({args.server_mode}) at {base_url}, fake backend at {backend.url}")
+
+    results = []
+    try:
+        for name, conversations in scenarios.items():
+            if not conversations:
+                print(f"Skipping {name}: no conversations")
+                continue
+            print(f"Running {name}: {len(conversations)} conversation(s) at {args.rps} rps for {args.duration}s...")
+            results.append(run_scenario(
+                name, conversations, base_url,
+                rps=args.rps,
+                duration=args.duration,
+                think_time=args.think_time,
+                stream=args.stream,
+                max_clients=args.max_clients
+            ))
+    finally:
+        stop_server()
+        backend.stop()
+
+    print()
+    print(format_report(results))
+
+    if args.log_mode != 'off':
+        stop_logging()
+        stats = get_logging_stats()
+        log_file = get_config().log_file
+        print(f"\nLogging ({args.log_mode}): {stats['queued']} record(s) queued, {stats['dropped']} dropped, "
+              f"sampled out {stats['sampled_out'] or 'none'}, {os.path.getsize(log_file) / 1024:.0f} KB in {log_file}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    return 1 if any(result['errors'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
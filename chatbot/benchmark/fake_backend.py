@@ -0,0 +1,261 @@
+"""In-process fake of the e-commerce backend API for offline benchmarks.
+
+This module serves the same routes and response shapes as server/index.js
+(products, product details with reviews, and a single shared cart) from
+memory, with configurable latency, so the chatbot can be load tested without
+the Node backend or its SQLite database.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Same catalog as server/initDb.js
+PRODUCTS: List[Dict[str, Any]] = [
+    {'emoji': '📱', 'name': 'Smartphone', 'price': 699, 'description': 'Latest model with advanced features'},
+    {'emoji': '💻', 'name': 'Laptop', 'price': 1299, 'description': 'High-performance laptop for work and play'},
+    {'emoji': '🎧', 'name': 'Headphones', 'price': 199, 'description': 'Noise-canceling wireless headphones'},
+    {'emoji': '⌚', 'name': 'Smartwatch', 'price': 399, 'description': 'Track your fitness and stay connected'},
+    {'emoji': '📷', 'name': 'Camera', 'price': 899, 'description': 'Professional-grade digital camera'},
+    {'emoji': '🖥️', 'name': 'Monitor', 'price': 449, 'description': '4K ultra-wide display'},
+    {'emoji': '⌨️', 'name': 'Keyboard', 'price': 129, 'description': 'Mechanical gaming keyboard'},
+    {'emoji': '🖱️', 'name': 'Mouse', 'price': 79, 'description': 'Ergonomic wireless mouse'},
+    {'emoji': '🎮', 'name': 'Gaming Console', 'price': 499, 'description': 'Next-gen gaming experience'},
+    {'emoji': '📺', 'name': 'Smart TV', 'price': 799, 'description': '55-inch 4K smart television'},
+    {'emoji': '🔊', 'name': 'Speaker', 'price': 149, 'description': 'Bluetooth portable speaker'},
+    {'emoji': '🎤', 'name': 'Microphone', 'price': 99, 'description': 'Studio-quality USB microphone'},
+    {'emoji': '💾', 'name': 'External SSD', 'price': 179, 'description': '1TB portable storage'},
+    {'emoji': '🔌', 'name': 'Power Bank', 'price': 49, 'description': '20000mAh fast charging'},
+    {'emoji': '📡', 'name': 'Router', 'price': 159, 'description': 'WiFi 6 mesh router'},
+    {'emoji': '🖨️', 'name': 'Printer', 'price': 229, 'description': 'All-in-one wireless printer'},
+    {'emoji': '🎥', 'name': 'Webcam', 'price': 89, 'description': '1080p HD webcam'},
+    {'emoji': '🕹️', 'name': 'Controller', 'price': 69, 'description': 'Wireless game controller'},
+    {'emoji': '💡', 'name': 'Smart Bulb', 'price': 29, 'description': 'Color-changing LED bulb'},
+    {'emoji': '🔋', 'name': 'Batteries', 'price': 19, 'description': 'Rechargeable battery pack'}
+]
+
+_PRODUCT_PATH = re.compile(r'^/api/products/(\d+)$')
+_CART_ITEM_PATH = re.compile(r'^/api/cart/(\d+)$')
+
+
+class FakeBackend:
+    """Threaded HTTP server implementing the backend API in memory."""
+
+    def __init__(self, latency: float = 0.0, port: int = 0):
+        """Initialize the fake backend.
+
+        Args:
+            latency: Seconds added to every request
+            port: Port to listen on (default: any free port)
+        """
+        self.latency = latency
+        self.products = [dict(product, id=index) for index, product in enumerate(PRODUCTS, start=1)]
+        self.reviews = {
+            product['id']: [
+                {'id': product['id'] * 2 - 1, 'product_id': product['id'], 'author': 'John Doe',
+                 'rating': 5, 'comment': 'Excellent product! Highly recommend.'},
+                {'id': product['id'] * 2, 'product_id': product['id'], 'author': 'Jane Smith',
+                 'rating': 4, 'comment': 'Good quality, fast shipping.'}
+            ]
+            for product in self.products
+        }
+        self.cart: Dict[int, Dict[str, int]] = {}
+        self.cart_revision = 0
+        self.requests = 0
+
+        self._next_cart_id = 1
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running fake backend."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-backend', daemon=True)
+        self._thread.start()
+        logger.info(f"Fake backend listening on {self.url}")
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _bump_cart_version(self, changed: bool = True) -> Dict[str, str]:
+        """Record a cart change (if anything changed) and return the versions before and after it."""
+        previous_version = f'fake-{self.cart_revision}'
+        if changed:
+            self.cart_revision += 1
+        return {'previous_version': previous_version, 'version': f'fake-{self.cart_revision}'}
+
+    def _cart_items(self) -> List[Dict[str, Any]]:
+        """Cart items shaped like GET /api/cart."""
+        return [
+            {
+                'id': item_id,
+                'product_id': item['product_id'],
+                'quantity': item['quantity'],
+                'product': self.products[item['product_id'] - 1]
+            }
+            for item_id, item in self.cart.items()
+            if 1 <= item['product_id'] <= len(self.products)
+        ]
+
+    def _apply_cart_batch(self, operations: Any) -> Tuple[int, Any]:
+        """Apply a cart batch all-or-nothing, like POST /api/cart/batch."""
+        if not isinstance(operations, list) or not operations:
+            return 400, {'error': 'operations must be a non-empty list'}
+        cart = {item_id: dict(item) for item_id, item in self.cart.items()}
+        next_cart_id = self._next_cart_id
+        results = []
+        for index, operation in enumerate(operations, start=1):
+            op = operation.get('op') if isinstance(operation, dict) else None
+            if op == 'add':
+                product_id = operation.get('product_id')
+                if not isinstance(product_id, int) or not 1 <= product_id <= len(self.products):
+                    return 404, {'error': f'Operation {index}: product {product_id} not found'}
+                item_id = next((key for key, item in cart.items() if item['product_id'] == product_id), None)
+                if item_id is None:
+                    item_id, next_cart_id = next_cart_id, next_cart_id + 1
+                    cart[item_id] = {'product_id': product_id, 'quantity': 0}
+                quantity = operation.get('quantity', 1)
+                cart[item_id]['quantity'] += quantity
+                results.append({'op': op, 'cart_item_id': item_id, 'product_id': product_id,
+                                'name': self.products[product_id - 1]['name'], 'quantity': quantity})
+            elif op in ('update', 'remove'):
+                item_id = operation.get('cart_item_id')
+                if item_id not in cart:
+                    return 404, {'error': f'Operation {index}: cart item {item_id} not found'}
+                result = {'op': op, 'cart_item_id': item_id, 'product_id': cart[item_id]['product_id'],
+                          'name': self.products[cart[item_id]['product_id'] - 1]['name']}
+                if op == 'update':
+                    cart[item_id]['quantity'] = result['quantity'] = operation.get('quantity')
+                else:
+                    del cart[item_id]
+                results.append(result)
+            else:
+                return 400, {'error': f'Operation {index}: op must be add, update or remove'}
+        self.cart, self._next_cart_id = cart, next_cart_id
+        return 200, dict(message='Cart updated', results=results, cart=self._cart_items(), **self._bump_cart_version())
+
+    def handle(self, method: str, path: str, body: Dict[str, Any]) -> Tuple[int, Any, Optional[str]]:
+        """Route a request to the in-memory data.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            body: Decoded JSON body (empty for GET/DELETE)
+
+        Returns:
+            Tuple of (status code, JSON-serializable response, ETag if the route sets its own)
+        """
+        with self._lock:
+            self.requests += 1
+
+            if method == 'GET' and path == '/api/products':
+                return 200, self.products, None
+
+            match = _PRODUCT_PATH.match(path)
+            if method == 'GET' and match:
+                product_id = int(match.group(1))
+                if not 1 <= product_id <= len(self.products):
+                    return 404, {'error': 'Product not found'}, None
+                return 200, dict(self.products[product_id - 1], reviews=self.reviews[product_id]), None
+
+            if path == '/api/cart':
+                if method == 'GET':
+                    return 200, self._cart_items(), f'"fake-{self.cart_revision}"'
+                if method == 'POST':
+                    product_id = int(body.get('product_id', 0))
+                    quantity = int(body.get('quantity', 1))
+                    for item_id, item in self.cart.items():
+                        if item['product_id'] == product_id:
+                            item['quantity'] += quantity
+                            return 200, dict(message='Cart updated', id=item_id, **self._bump_cart_version()), None
+                    item_id = self._next_cart_id
+                    self.cart[item_id] = {'product_id': product_id, 'quantity': quantity}
+                    self._next_cart_id += 1
+                    return 200, dict(message='Added to cart', id=item_id, **self._bump_cart_version()), None
+
+            if method == 'POST' and path == '/api/cart/batch':
+                status, payload = self._apply_cart_batch(body.get('operations'))
+                return status, payload, None
+
+            match = _CART_ITEM_PATH.match(path)
+            if match:
+                item_id = int(match.group(1))
+                if method == 'PUT':
+                    if item_id in self.cart:
+                        self.cart[item_id]['quantity'] = int(body.get('quantity', 1))
+                    return 200, dict(message='Cart updated', **self._bump_cart_version(item_id in self.cart)), None
+                if method == 'DELETE':
+                    removed = self.cart.pop(item_id, None)
+                    return 200, dict(message='Item removed', **self._bump_cart_version(removed is not None)), None
+
+            return 404, {'error': 'Not found'}, None
+
+    def _handler_class(self):
+        """Build the request handler bound to this backend."""
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _dispatch(self, method: str):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length)) if length else {}
+                except json.JSONDecodeError:
+                    body = {}
+
+                if backend.latency:
+                    time.sleep(backend.latency)
+
+                status, payload, etag = backend.handle(method, self.path, body)
+                data = json.dumps(payload).encode('utf-8')
+
+                # Weak ETags like Express, so the chatbot's conditional revalidation is exercised
+                etag = etag or f'W/"{hashlib.md5(data).hexdigest()}"'
+                if method == 'GET' and status == 200 and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                if method == 'GET':
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def do_PUT(self):
+                self._dispatch('PUT')
+
+            def do_DELETE(self):
+                self._dispatch('DELETE')
+
+        return Handler
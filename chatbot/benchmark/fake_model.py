@@ -0,0 +1,148 @@
+"""Deterministic fake model for offline benchmarks.
+
+The fake model speaks the Bedrock Converse stream format that Strands
+expects, so real agents, tools and servers run unchanged. A tool-call script
+maps patterns in the customer's message to the tool calls the model emits;
+once the tool results come back it streams a fixed reply. Latencies are
+configurable, and can be made to occupy a worker thread the way the real
+Bedrock client does.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from strands.models import Model
+
+logger = logging.getLogger(__name__)
+
+# Default tool-call script: the first rule whose pattern matches the message wins.
+# Input values "$message", "$number" and "$numbers" are filled in from the message.
+DEFAULT_SCRIPT: List[Dict[str, Any]] = [
+    {'pattern': r'\bcompare\b', 'tool': 'get_products_details', 'input': {'product_ids': '$numbers'}},
+    {'pattern': r'\brecommend', 'tool': 'recommend_products', 'input': {}},
+    {'pattern': r'\badd\b.*\d', 'tool': 'add_to_cart', 'input': {'product_id': '$number', 'quantity': 1}},
+    {'pattern': r'\bcart\b', 'tool': 'get_cart', 'input': {}},
+    {'pattern': r'\b(product|item) \d+', 'tool': 'get_product_details', 'input': {'product_id': '$number'}},
+    {'pattern': r'\b(search|find|looking for|do you have)\b', 'tool': 'search_products', 'input': {'query': '$message'}},
+    {'pattern': r'\b(products|catalog|sell)\b', 'tool': 'list_products', 'input': {}}
+]
+
+DEFAULT_REPLY = (
+    "Here is what I found for you. Let me know if you would like more details, "
+    "a comparison, or to add something to your cart."
+)
+
+_NUMBER = re.compile(r'\d+')
+
+
+class FakeModel(Model):
+    """Scripted model that emits tool calls and replies with configurable latency."""
+
+    def __init__(self, script: Optional[List[Dict[str, Any]]] = None, reply: str = DEFAULT_REPLY,
+                 first_token_latency: float = 0.3, token_latency: float = 0.01, blocking: bool = True):
+        """Initialize the fake model.
+
+        Args:
+            script: Tool-call rules with 'pattern', 'tool' and 'input' keys (default: DEFAULT_SCRIPT)
+            reply: Text streamed as the final answer
+            first_token_latency: Seconds before the first stream event of each model call
+            token_latency: Seconds between streamed reply words
+            blocking: Sleep on a worker thread, as the Bedrock client does, instead of on the event loop
+        """
+        self.script = [dict(rule, regex=re.compile(rule['pattern'], re.IGNORECASE)) for rule in (script or DEFAULT_SCRIPT)]
+        self.reply = reply
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.blocking = blocking
+        self.calls = 0
+
+    def get_config(self) -> Dict[str, Any]:
+        """Get the model configuration."""
+        return {
+            'model_id': 'fake',
+            'first_token_latency': self.first_token_latency,
+            'token_latency': self.token_latency
+        }
+
+    def update_config(self, **model_config: Any) -> None:
+        """Update latency settings."""
+        for key in ('first_token_latency', 'token_latency', 'blocking', 'reply'):
+            if key in model_config:
+                setattr(self, key, model_config[key])
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Structured output is not used by the chatbot."""
+        raise NotImplementedError("FakeModel does not support structured output")
+        yield  # makes this an async generator like the interface it implements
+
+    async def stream(self, messages: List[Dict[str, Any]], tool_specs: Optional[List[Dict[str, Any]]] = None,
+                     system_prompt: Optional[str] = None, **kwargs: Any) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a scripted response in Converse stream event format.
+
+        Args:
+            messages: Conversation so far
+            tool_specs: Tools available to the agent
+            system_prompt: System prompt (ignored)
+            **kwargs: Additional keyword arguments (ignored)
+
+        Yields:
+            Converse stream events
+        """
+        self.calls += 1
+        await self._sleep(self.first_token_latency)
+        yield {'messageStart': {'role': 'assistant'}}
+
+        available = {spec['name'] for spec in tool_specs or []}
+        tool_use = self._scripted_tool_use(messages[-1], available)
+        if tool_use:
+            yield {'contentBlockStart': {'start': {'toolUse': {'name': tool_use['name'], 'toolUseId': tool_use['toolUseId']}}}}
+            yield {'contentBlockDelta': {'delta': {'toolUse': {'input': json.dumps(tool_use['input'])}}}}
+            yield {'contentBlockStop': {}}
+            yield {'messageStop': {'stopReason': 'tool_use'}}
+        else:
+            for index, word in enumerate(self.reply.split(' ')):
+                if index:
+                    await self._sleep(self.token_latency)
+                yield {'contentBlockDelta': {'delta': {'text': word if index == 0 else ' ' + word}}}
+            yield {'contentBlockStop': {}}
+            yield {'messageStop': {'stopReason': 'end_turn'}}
+
+        input_tokens = len(json.dumps(messages)) // 4
+        yield {'metadata': {
+            'usage': {'inputTokens': input_tokens, 'outputTokens': 40, 'totalTokens': input_tokens + 40},
+            'metrics': {'latencyMs': int(self.first_token_latency * 1000)}
+        }}
+
+    def _scripted_tool_use(self, message: Dict[str, Any], available: set) -> Optional[Dict[str, Any]]:
+        """Pick the tool call for a customer message, or None to reply with text."""
+        if message.get('role') != 'user' or any('toolResult' in block for block in message.get('content', [])):
+            return None
+
+        text = ' '.join(block.get('text', '') for block in message.get('content', []))
+        for rule in self.script:
+            if rule['tool'] in available and rule['regex'].search(text):
+                return {
+                    'name': rule['tool'],
+                    'toolUseId': f"fake-{self.calls}",
+                    'input': self._fill_input(rule['input'], text)
+                }
+        return None
+
+    @staticmethod
+    def _fill_input(template: Dict[str, Any], text: str) -> Dict[str, Any]:
+        """Substitute message-derived placeholders in a tool input template."""
+        numbers = [int(number) for number in _NUMBER.findall(text)]
+        values = {'$message': text, '$number': numbers[0] if numbers else 1, '$numbers': numbers or [1, 2]}
+        return {key: values.get(value, value) if isinstance(value, str) else value for key, value in template.items()}
+
+    async def _sleep(self, seconds: float):
+        """Wait, on a worker thread when simulating a blocking client."""
+        if seconds <= 0:
+            return
+        if self.blocking:
+            await asyncio.to_thread(time.sleep, seconds)
+        else:
+            await asyncio.sleep(seconds)
@@ -0,0 +1,257 @@
+"""Load generation and reporting for offline benchmarks.
+
+Conversations are started at a steady rate so that chat messages arrive at
+the target requests per second. Within a conversation, each message is sent
+after the previous reply plus a think time, the way a customer would.
+Latency, throughput, errors and process memory growth are reported per
+scenario.
+"""
+
+import json
+import logging
+import os
+import resource
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Conversations replayed when no trace file is given
+BUILTIN_SCENARIOS: Dict[str, List[List[str]]] = {
+    'browse': [
+        ["What products do you sell?", "Tell me about product 3", "Compare products 2, 5 and 6"],
+        ["Do you have wireless headphones?", "Tell me about item 3", "Thanks, that's all"]
+    ],
+    'cart': [
+        ["Add product 8 to my cart", "What's in my cart?", "Can you recommend something to go with it?"],
+        ["Add item 14 to my cart please", "Show my cart"]
+    ],
+    'mixed': [
+        ["Hi there!", "What products do you sell?", "Do you have a camera under $1000?",
+         "Add product 5 to my cart", "What's in my cart?"],
+        ["Looking for a gaming keyboard", "Compare products 7, 8 and 18", "Recommend something for gaming"]
+    ]
+}
+
+
+def load_traces(path: str) -> List[List[str]]:
+    """Load conversations from a JSONL trace file.
+
+    Each line is one conversation: {"messages": [...]}, {"message": "..."},
+    or any object with a "body" or "title" text field (such as a request log),
+    which is replayed as a single-message conversation.
+
+    Args:
+        path: Path to the JSONL file
+
+    Returns:
+        List of conversations, each a list of messages
+    """
+    conversations = []
+    with open(path, encoding='utf-8') as trace_file:
+        for line in trace_file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record.get('messages'), list):
+                messages = [str(message) for message in record['messages'] if str(message).strip()]
+            else:
+                text = record.get('message') or record.get('body') or record.get('title') or ''
+                messages = [text[:2000]] if text.strip() else []
+            if messages:
+                conversations.append(messages)
+    return conversations
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Peak rather than current RSS, reported in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentile(samples: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted samples."""
+    if not samples:
+        return None
+    return round(samples[min(len(samples) - 1, int(fraction * len(samples)))], 2)
+
+
+class ScenarioRecorder:
+    """Thread-safe collector of request outcomes for one scenario."""
+
+    def __init__(self):
+        """Initialize empty result lists."""
+        self.latencies_ms: List[float] = []
+        self.first_token_ms: List[float] = []
+        self.statuses: Dict[str, int] = {}
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, status: str, latency_ms: float, first_token_ms: Optional[float], error: bool):
+        """Record one request outcome.
+
+        Args:
+            status: HTTP status code or error label
+            latency_ms: Time until the full response was received
+            first_token_ms: Time until the first streamed token, if streaming
+            error: Whether the request failed
+        """
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.errors += int(error)
+            if not error:
+                self.latencies_ms.append(latency_ms)
+                if first_token_ms is not None:
+                    self.first_token_ms.append(first_token_ms)
+
+
+def _send_message(http: requests.Session, base_url: str, session_id: str, message: str, stream: bool,
+                  recorder: ScenarioRecorder, timeout: float):
+    """Send one chat message and record its outcome."""
+    start = time.perf_counter()
+    first_token_ms = None
+    try:
+        if not stream:
+            response = http.post(f"{base_url}/chat", json={'message': message, 'session_id': session_id},
+                                 timeout=timeout)
+            error = response.status_code != 200
+            recorder.record(str(response.status_code), (time.perf_counter() - start) * 1000, None, error)
+            return
+
+        with http.post(f"{base_url}/chat/stream", json={'message': message, 'session_id': session_id},
+                       timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                recorder.record(str(response.status_code), (time.perf_counter() - start) * 1000, None, True)
+                return
+
+            status = 'stream_incomplete'
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data: '):
+                    continue
+                event = json.loads(line[len('data: '):])
+                if event.get('type') == 'token' and first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                elif event.get('type') == 'error':
+                    status = f"error:{event.get('error_type')}"
+                    break
+                elif event.get('type') == 'done':
+                    status = '200'
+                    break
+
+            recorder.record(status, (time.perf_counter() - start) * 1000, first_token_ms, status != '200')
+
+    except requests.RequestException as e:
+        recorder.record(type(e).__name__, (time.perf_counter() - start) * 1000, None, True)
+
+
+def run_scenario(name: str, conversations: List[List[str]], base_url: str, rps: float, duration: float,
+                 think_time: float = 1.0, stream: bool = False, max_clients: int = 256,
+                 timeout: float = 120.0) -> Dict[str, Any]:
+    """Replay conversations against a running chatbot server.
+
+    Args:
+        name: Scenario name used in session IDs and the report
+        conversations: Conversations to replay, cycling as needed
+        base_url: Chatbot server URL
+        rps: Target chat messages per second
+        duration: Seconds during which new conversations are started
+        think_time: Seconds a simulated customer waits after each reply
+        stream: Use /chat/stream instead of /chat
+        max_clients: Maximum simultaneous simulated customers
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Dictionary of latency percentiles, throughput, errors and RSS growth
+    """
+    recorder = ScenarioRecorder()
+    local = threading.local()
+    average_length = sum(len(conversation) for conversation in conversations) / len(conversations)
+    start_interval = average_length / rps
+
+    def converse(index: int, messages: List[str]):
+        # One simulated customer: a session, its messages in order, and a pause after each reply
+        if not hasattr(local, 'http'):
+            local.http = requests.Session()
+        session_id = f"bench-{name}-{index}-{uuid.uuid4().hex[:8]}"
+        for position, message in enumerate(messages):
+            if position:
+                time.sleep(think_time)
+            _send_message(local.http, base_url, session_id, message, stream, recorder, timeout)
+
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_clients, thread_name_prefix='bench-client') as clients:
+        index = 0
+        while True:
+            scheduled = started + index * start_interval
+            if scheduled - started >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            clients.submit(converse, index, conversations[index % len(conversations)])
+            index += 1
+
+    elapsed = time.perf_counter() - started
+    rss_after = _rss_bytes()
+
+    latencies = sorted(recorder.latencies_ms)
+    first_tokens = sorted(recorder.first_token_ms)
+    completed = len(latencies)
+    total = completed + recorder.errors
+
+    return {
+        'scenario': name,
+        'mode': 'stream' if stream else 'chat',
+        'target_rps': rps,
+        'conversations': index,
+        'requests': total,
+        'errors': recorder.errors,
+        'error_rate': round(recorder.errors / total, 4) if total else 0.0,
+        'statuses': dict(sorted(recorder.statuses.items())),
+        'throughput_rps': round(completed / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': _percentile(latencies, 0.50),
+        'p95_ms': _percentile(latencies, 0.95),
+        'p99_ms': _percentile(latencies, 0.99),
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+        'first_token_p50_ms': _percentile(first_tokens, 0.50),
+        'first_token_p95_ms': _percentile(first_tokens, 0.95),
+        'elapsed_seconds': round(elapsed, 2),
+        'rss_start_mb': round(rss_before / 1024 / 1024, 1),
+        'rss_growth_mb': round((rss_after - rss_before) / 1024 / 1024, 1)
+    }
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    """Render scenario results as a fixed-width table.
+
+    Args:
+        results: Values returned by run_scenario
+
+    Returns:
+        Table text
+    """
+    columns = [
+        ('scenario', 'Scenario', 10), ('mode', 'Mode', 6), ('requests', 'Reqs', 6), ('errors', 'Errs', 5),
+        ('throughput_rps', 'RPS', 7), ('p50_ms', 'p50 ms', 9), ('p95_ms', 'p95 ms', 9), ('p99_ms', 'p99 ms', 9),
+        ('first_token_p50_ms', 'TTFT p50', 9), ('rss_growth_mb', 'RSS +MB', 8)
+    ]
+
+    lines = [' '.join(title.rjust(width) for _, title, width in columns)]
+    for result in results:
+        lines.append(' '.join(
+            ('-' if result.get(key) is None else str(result.get(key))).rjust(width)
+            for key, _, width in columns
+        ))
+        if result['errors']:
+            lines.append(f"    statuses: {result['statuses']}")
+    return '\n'.join(lines)
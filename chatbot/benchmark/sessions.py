@@ -0,0 +1,192 @@
+"""Compare session persistence backends.
+
+Writes the same synthetic conversations through the file and SQLite session
+backends the way a live agent does (session and agent records, then each
+message followed by an agent state update), then restores every session the
+way an evicted session is rebuilt. Reports per-operation latency percentiles,
+total time and on-disk footprint for each backend.
+
+Usage:
+    python -m chatbot.benchmark.sessions --sessions 500 --messages 20
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+from strands.session.file_session_manager import FileSessionManager
+from strands.session.repository_session_manager import RepositorySessionManager
+from strands.types.session import SessionAgent, SessionMessage
+from chatbot.session_db import SQLiteSessionRepository
+
+AGENT_ID = 'default'
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(prog='python -m chatbot.benchmark.sessions', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sessions', type=int, default=200, help='Conversations to write and restore (default: 200)')
+    parser.add_argument('--messages', type=int, default=20, help='Messages per conversation (default: 20)')
+    parser.add_argument('--message-bytes', type=int, default=600, help='Approximate size of each message (default: 600)')
+    parser.add_argument('--flush-ms', type=float, default=50.0,
+                        help='SQLite commit interval in milliseconds (default: 50)')
+    parser.add_argument('--backend', action='append', dest='backends', choices=['file', 'sqlite'],
+                        help='Backend to benchmark (repeatable; default: both)')
+    parser.add_argument('--output', help='Also write results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    return round(samples[min(len(samples) - 1, int(fraction * len(samples)))], 3) if samples else 0.0
+
+
+def _disk_usage(path: str) -> Dict[str, int]:
+    """Count files and bytes under a directory."""
+    files = size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(root, name))
+    return {'files': files, 'bytes': size}
+
+
+def _message(index: int, size: int) -> Dict[str, Any]:
+    """Build a synthetic conversation message of roughly the given size."""
+    role = 'user' if index % 2 == 0 else 'assistant'
+    return {'role': role, 'content': [{'text': f"Message {index}: " + 'lorem ipsum ' * (size // 12)}]}
+
+
+def run_backend(name: str, make_manager: Callable[[str], RepositorySessionManager], sessions: int, messages: int,
+                message_bytes: int, flush: Callable[[], None]) -> Dict[str, Any]:
+    """Write then restore conversations through one backend.
+
+    Args:
+        name: Backend name for the report
+        make_manager: Function creating a session manager for a session ID
+        sessions: Number of conversations
+        messages: Messages per conversation
+        message_bytes: Approximate size of each message
+        flush: Function that makes pending writes durable
+
+    Returns:
+        Dictionary of latency percentiles in milliseconds and totals
+    """
+    create_ms: List[float] = []
+    append_ms: List[float] = []
+    restore_ms: List[float] = []
+    session_ids = [f"bench-{index}" for index in range(sessions)]
+
+    write_start = time.perf_counter()
+    for session_id in session_ids:
+        start = time.perf_counter()
+        manager = make_manager(session_id)
+        repository = manager.session_repository
+        agent = SessionAgent(agent_id=AGENT_ID, state={}, conversation_manager_state={})
+        repository.create_agent(session_id, agent)
+        create_ms.append((time.perf_counter() - start) * 1000)
+
+        for index in range(messages):
+            start = time.perf_counter()
+            repository.create_message(session_id, AGENT_ID, SessionMessage.from_message(_message(index, message_bytes), index))
+            # The agent's state is synced after each message, as a live agent does
+            agent.conversation_manager_state = {'removed_message_count': 0, 'messages_seen': index + 1}
+            repository.update_agent(session_id, agent)
+            append_ms.append((time.perf_counter() - start) * 1000)
+    flush()
+    write_seconds = time.perf_counter() - write_start
+
+    restore_start = time.perf_counter()
+    for session_id in session_ids:
+        start = time.perf_counter()
+        manager = make_manager(session_id)
+        repository = manager.session_repository
+        repository.read_agent(session_id, AGENT_ID)
+        restored = repository.list_messages(session_id, AGENT_ID)
+        restore_ms.append((time.perf_counter() - start) * 1000)
+        if len(restored) != messages:
+            raise RuntimeError(f"{name}: restored {len(restored)} of {messages} messages for {session_id}")
+    restore_seconds = time.perf_counter() - restore_start
+
+    create_ms.sort()
+    append_ms.sort()
+    restore_ms.sort()
+    return {
+        'backend': name,
+        'sessions': sessions,
+        'messages': sessions * messages,
+        'create_p50_ms': _percentile(create_ms, 0.50),
+        'create_p95_ms': _percentile(create_ms, 0.95),
+        'append_p50_ms': _percentile(append_ms, 0.50),
+        'append_p95_ms': _percentile(append_ms, 0.95),
+        'append_p99_ms': _percentile(append_ms, 0.99),
+        'restore_p50_ms': _percentile(restore_ms, 0.50),
+        'restore_p95_ms': _percentile(restore_ms, 0.95),
+        'write_seconds': round(write_seconds, 2),
+        'restore_seconds': round(restore_seconds, 2)
+    }
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    """Render backend results as a fixed-width table."""
+    columns = [
+        ('backend', 'Backend', 8), ('append_p50_ms', 'Append p50', 11), ('append_p99_ms', 'Append p99', 11),
+        ('create_p50_ms', 'Create p50', 11), ('restore_p50_ms', 'Restore p50', 12), ('restore_p95_ms', 'Restore p95', 12),
+        ('write_seconds', 'Write s', 8), ('restore_seconds', 'Restore s', 10), ('files', 'Files', 8), ('mb', 'MB', 7)
+    ]
+    lines = [' '.join(title.rjust(width) for _, title, width in columns)]
+    for result in results:
+        lines.append(' '.join(str(result.get(key, '-')).rjust(width) for key, _, width in columns))
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    """Run the session backend benchmark and print the report."""
+    args = _parse_args(argv)
+    backends = args.backends or ['file', 'sqlite']
+    results = []
+
+    for backend in backends:
+        directory = tempfile.mkdtemp(prefix=f'chatbot-bench-{backend}-')
+        try:
+            if backend == 'file':
+                result = run_backend(
+                    'file',
+                    lambda session_id: FileSessionManager(session_id=session_id, storage_dir=directory),
+                    args.sessions, args.messages, args.message_bytes, flush=lambda: None
+                )
+            else:
+                repository = SQLiteSessionRepository(
+                    os.path.join(directory, 'sessions.db'), flush_interval=args.flush_ms / 1000
+                )
+                try:
+                    result = run_backend(
+                        'sqlite',
+                        lambda session_id: RepositorySessionManager(session_id=session_id, session_repository=repository),
+                        args.sessions, args.messages, args.message_bytes, flush=repository.flush
+                    )
+                finally:
+                    repository.close()
+
+            usage = _disk_usage(directory)
+            result.update(files=usage['files'], mb=round(usage['bytes'] / 1024 / 1024, 1))
+            results.append(result)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{args.sessions} session(s) x {args.messages} message(s) of ~{args.message_bytes} bytes")
+    print(format_report(results))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
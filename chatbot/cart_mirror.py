@@ -0,0 +1,259 @@
+"""Per-session cart mirror for the Shopping Assistant Chatbot.
+
+The agent often changes the cart and then reads it back to confirm the
+result, paying a backend round-trip and a model step each time. Instead, each
+session keeps a local copy of the cart:
+
+- Reads are served from the mirror while it was synced within
+  CART_MIRROR_TTL_SECONDS, and revalidated with If-None-Match after that.
+- Mutations are written through to /api/cart, and their expected effect is
+  applied to the mirror as soon as the backend accepts them, without reading
+  the cart back.
+- Cart responses carry the backend's cart version. If a mutation's
+  previous_version is not the version the mirror was built from, someone else
+  (another session or the web shop) changed the cart, and the mirror is
+  reloaded before it is used again.
+"""
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from chatbot.metrics import REGISTRY, Counter
+
+CART_READS = REGISTRY.register(Counter(
+    'chatbot_cart_reads_total', 'Cart reads by tools, by where the cart came from.', ['source']))
+CART_MIRROR_RECONCILES = REGISTRY.register(Counter(
+    'chatbot_cart_mirror_reconciles_total', 'Cart mirrors dropped because they no longer matched the backend.',
+    ['reason']))
+
+# Read sources and reconcile reasons counted for /health
+_counts: Dict[str, Dict[str, int]] = {'reads': {}, 'reconciles': {}}
+_counts_lock = threading.Lock()
+
+# Session whose cart the running tools use (set for the duration of a chat turn)
+_cart_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('cart_session', default=None)
+
+
+def _count(kind: str, label: str):
+    with _counts_lock:
+        _counts[kind][label] = _counts[kind].get(label, 0) + 1
+
+
+def record_read(source: str):
+    """Count a cart read by where the cart came from (mirror, revalidated or backend)."""
+    CART_READS.inc(source=source)
+    _count('reads', source)
+
+
+def cart_totals(items: List[Dict[str, Any]]) -> Tuple[int, float]:
+    """Get the number of units in a list of cart items and their total price."""
+    units = 0
+    total = 0.0
+    for item in items:
+        product = item.get('product', item)
+        units += item.get('quantity', 0)
+        total += product.get('price', 0) * item.get('quantity', 0)
+    return units, total
+
+
+def version_from_etag(etag: Optional[str]) -> Optional[str]:
+    """Extract the cart version from a /api/cart ETag.
+
+    Args:
+        etag: ETag response header
+
+    Returns:
+        The version, or None for a missing or weak (content hash) ETag
+    """
+    if not etag or etag.startswith('W/'):
+        return None
+    return etag.strip('"')
+
+
+class CartMirror:
+    """Local copy of the cart for one session."""
+
+    def __init__(self, ttl: float):
+        """Initialize an empty (not yet loaded) mirror.
+
+        Args:
+            ttl: Seconds the mirror is served without checking the backend
+        """
+        self.ttl = ttl
+        self.items: Optional[List[Dict[str, Any]]] = None
+        self.version: Optional[str] = None
+        self.synced_at = 0.0
+        # Held by tools for a whole read or mutation of this session's cart
+        self.lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the mirror holds a copy of the cart."""
+        return self.items is not None
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the mirror can be served without checking the backend."""
+        return self.loaded and time.monotonic() - self.synced_at < self.ttl
+
+    def load(self, items: List[Dict[str, Any]], version: Optional[str]):
+        """Replace the mirror with the cart as read from the backend.
+
+        Args:
+            items: Cart items from GET /api/cart
+            version: Cart version from the response's ETag
+        """
+        self.items = [dict(item) for item in items]
+        self.version = version
+        self.synced_at = time.monotonic()
+
+    def touch(self):
+        """Mark the mirror as confirmed current by the backend."""
+        self.synced_at = time.monotonic()
+
+    def invalidate(self):
+        """Drop the mirror so the next read loads the cart from the backend."""
+        self.items = None
+        self.version = None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Get a copy of the mirrored cart items."""
+        return [dict(item) for item in self.items or []]
+
+    def confirm(self, change: Dict[str, Any]) -> bool:
+        """Check a mutation response against the mirror's version.
+
+        Args:
+            change: Backend response of a cart mutation
+
+        Returns:
+            True if the mirror was current before the mutation (it now has the new
+            version), False if it is not loaded or was dropped because the cart changed elsewhere
+        """
+        if not self.loaded:
+            return False
+        version = change.get('version')
+        if version is None or change.get('previous_version') != self.version:
+            reason = 'version' if version is not None else 'unversioned'
+            CART_MIRROR_RECONCILES.inc(reason=reason)
+            _count('reconciles', reason)
+            self.invalidate()
+            return False
+        self.version = version
+        self.touch()
+        return True
+
+    def apply_add(self, product_id: int, quantity: int, cart_item_id: Optional[int],
+                  load_product: Callable[[], Optional[Dict[str, Any]]]) -> bool:
+        """Apply an accepted add_to_cart to the mirror.
+
+        Args:
+            product_id: Product added
+            quantity: Quantity added
+            cart_item_id: Cart item the backend created or increased
+            load_product: Returns the product's details, called when the product was not in the cart yet
+
+        Returns:
+            True if applied, False if the mirror cannot tell the result
+        """
+        for item in self.items or []:
+            if item.get('product_id') == product_id:
+                item['quantity'] = item.get('quantity', 0) + quantity
+                return True
+        product = load_product() if self.items is not None and cart_item_id is not None else None
+        if self.items is None or product is None:
+            return False
+        self.items.append({'id': cart_item_id, 'product_id': product_id, 'quantity': quantity, 'product': product})
+        return True
+
+    def apply_update(self, cart_item_id: int, quantity: int) -> bool:
+        """Apply an accepted update_cart_item to the mirror.
+
+        Returns:
+            True if applied, False if the item was not in the mirror
+        """
+        for item in self.items or []:
+            if item.get('id') == cart_item_id:
+                item['quantity'] = quantity
+                return True
+        return False
+
+    def apply_remove(self, cart_item_id: int) -> bool:
+        """Apply an accepted remove_from_cart to the mirror.
+
+        Returns:
+            True if applied, False if the item was not in the mirror
+        """
+        if self.items is None:
+            return False
+        before = len(self.items)
+        self.items = [item for item in self.items if item.get('id') != cart_item_id]
+        return len(self.items) < before
+
+    def totals(self) -> Tuple[int, float]:
+        """Get the number of units in the cart and its total price."""
+        return cart_totals(self.items or [])
+
+
+class CartMirrors:
+    """Cart mirrors keyed by session ID, dropping the least recently used."""
+
+    def __init__(self, ttl: float, max_sessions: int):
+        """Initialize the registry.
+
+        Args:
+            ttl: Seconds a mirror is served without checking the backend
+            max_sessions: Mirrors kept before the least recently used are dropped
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._mirrors: "OrderedDict[str, CartMirror]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> CartMirror:
+        """Get a session's mirror, creating an empty one if needed."""
+        with self._lock:
+            mirror = self._mirrors.get(session_id)
+            if mirror is None:
+                mirror = self._mirrors[session_id] = CartMirror(self.ttl)
+                if len(self._mirrors) > self.max_sessions:
+                    self._mirrors.popitem(last=False)
+            else:
+                self._mirrors.move_to_end(session_id)
+            return mirror
+
+    def drop(self, session_id: str):
+        """Forget a session's mirror."""
+        with self._lock:
+            self._mirrors.pop(session_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get mirror counts and read sources for monitoring."""
+        with self._lock:
+            mirrors = list(self._mirrors.values())
+        with _counts_lock:
+            counts = {kind: dict(values) for kind, values in _counts.items()}
+        return dict(counts, sessions=len(mirrors), loaded=sum(1 for mirror in mirrors if mirror.loaded),
+                    ttl_seconds=self.ttl)
+
+
+@contextmanager
+def cart_session(session_id: str) -> Iterator[None]:
+    """Make cart tools run during a chat turn use the session's cart mirror.
+
+    Args:
+        session_id: Session the turn belongs to
+    """
+    token = _cart_session.set(session_id)
+    try:
+        yield
+    finally:
+        _cart_session.reset(token)
+
+
+def current_cart_session() -> Optional[str]:
+    """Get the session whose cart the running tools use, if any."""
+    return _cart_session.get()
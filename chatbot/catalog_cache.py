@@ -0,0 +1,188 @@
+"""Catalog cache module for the Shopping Assistant Chatbot.
+
+This module provides a thread-safe, size-bounded TTL cache for read-only
+catalog endpoints. Stale entries are served immediately while a background
+refresh revalidates them with the backend using ETags.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# A loader fetches a key given the cached ETag (if any) and returns
+# (value, etag, not_modified). Error values are dicts with an 'error' key.
+Loader = Callable[[str, Optional[str]], Tuple[Any, Optional[str], bool]]
+
+
+class CatalogCache:
+    """Size-bounded TTL cache with stale-while-revalidate refresh."""
+
+    def __init__(self, loader: Loader, ttl: float, stale_ttl: float, max_entries: int):
+        """Initialize the catalog cache.
+
+        Args:
+            loader: Function that fetches a key from the backend
+            ttl: Seconds an entry is served without revalidation
+            stale_ttl: Additional seconds a stale entry may be served while it is refreshed
+            max_entries: Maximum number of cached entries before LRU eviction
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='catalog-refresh')
+
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'revalidations': 0,
+            'refreshes': 0,
+            'errors': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    def get(self, key: str) -> Any:
+        """Get a value, fetching it from the backend if it is missing or expired.
+
+        Args:
+            key: Cache key (the backend endpoint path)
+
+        Returns:
+            The cached or freshly loaded value, or an error dict from the loader
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry['fetched_at']
+                self._entries.move_to_end(key)
+
+                if age < self.ttl:
+                    self._stats['hits'] += 1
+                    return entry['value']
+
+                if age < self.ttl + self.stale_ttl:
+                    self._stats['stale_hits'] += 1
+                    self._schedule_refresh(key)
+                    return entry['value']
+
+            self._stats['misses'] += 1
+            etag = entry['etag'] if entry else None
+            stale_value = entry['value'] if entry else None
+
+        value = self._load(key, etag)
+        if value is None:
+            # Backend unavailable or revalidation failed: fall back to the expired copy
+            return stale_value
+        return value
+
+    def peek(self, key: str) -> Any:
+        """Get a cached value without fetching, refreshing or updating counters.
+
+        Args:
+            key: Cache key (the backend endpoint path)
+
+        Returns:
+            The cached value, or None if the key is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry['value'] if entry else None
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one cached entry, or all entries when no key is given.
+
+        Args:
+            key: Cache key to drop (default: all keys)
+        """
+        with self._lock:
+            self._stats['invalidations'] += 1
+            if key is None:
+                logger.info("Invalidating entire catalog cache")
+                self._entries.clear()
+            else:
+                logger.info(f"Invalidating catalog cache entry: {key}")
+                self._entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters for monitoring.
+
+        Returns:
+            Dictionary of size, hit ratio and hit/miss/eviction counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _load(self, key: str, etag: Optional[str]) -> Any:
+        """Fetch a key from the backend and store it.
+
+        Args:
+            key: Cache key (the backend endpoint path)
+            etag: ETag of the cached copy, sent for conditional revalidation
+
+        Returns:
+            The loaded value, an error dict, or None if a revalidation failed
+        """
+        value, new_etag, not_modified = self.loader(key, etag)
+
+        with self._lock:
+            if not_modified:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._stats['revalidations'] += 1
+                    entry['fetched_at'] = time.monotonic()
+                    return entry['value']
+                # Entry was invalidated mid-flight; fetch it unconditionally below
+
+            elif isinstance(value, dict) and 'error' in value:
+                self._stats['errors'] += 1
+                # Let the caller fall back to an expired copy if there is one
+                return None if key in self._entries else value
+
+            else:
+                self._entries[key] = {'value': value, 'etag': new_etag, 'fetched_at': time.monotonic()}
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+                return value
+
+        return self._load(key, None)
+
+    def _schedule_refresh(self, key: str):
+        """Refresh a stale key in the background. Must hold the lock."""
+        if key in self._refreshing:
+            return
+
+        self._refreshing.add(key)
+        etag = self._entries[key]['etag']
+
+        def _refresh():
+            try:
+                self._load(key, etag)
+                with self._lock:
+                    self._stats['refreshes'] += 1
+            except Exception as e:
+                logger.error(f"Background refresh of {key} failed: {str(e)}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(_refresh)
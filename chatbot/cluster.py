@@ -0,0 +1,487 @@
+"""Multi-process scale-out for the Shopping Assistant Chatbot.
+
+Sessions live in the memory of the process that serves them, so scale-out
+runs a router in front of several chat workers and sends every message of a
+conversation to the same worker, chosen by consistent hashing of its
+session_id. The router starts SERVER_WORKERS local worker processes, one per
+core, and can also route to workers on other hosts listed in
+CLUSTER_WORKER_URLS.
+
+Workers are health-checked continuously. When one goes down (or a local one
+exits and is restarted) or comes back, the hash ring is rebuilt and each
+worker is told the new membership so it hands off the sessions it no longer
+owns: they are dropped from its memory and their queued writes flushed, and
+the new owner restores them from session storage. Workers on several hosts
+must therefore share session storage (a shared SESSION_STORAGE_DIR volume or
+SQLite database). Membership updates carry CLUSTER_SECRET, which workers check
+before accepting them; without remote workers a secret is generated per run.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import secrets
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from chatbot.config import get_config
+from chatbot.hash_ring import HashRing
+from chatbot.metrics import CONTENT_TYPE, Counter, Gauge, MetricsRegistry
+from chatbot.server import CLUSTER_SECRET_HEADER, CORS_ORIGINS, parse_trace_limit, validate_catalog_invalidation
+
+logger = logging.getLogger(__name__)
+
+# Response header naming the worker that served a request
+WORKER_HEADER = 'X-Chat-Worker'
+
+# Worker response headers passed through to the client
+_FORWARDED_HEADERS = ('content-type', 'cache-control', 'retry-after', 'x-accel-buffering', 'x-trace-id')
+
+# Longest the router waits at startup for its workers to report healthy
+_STARTUP_TIMEOUT = 90.0
+
+
+class LocalWorker:
+    """A chat worker process started and restarted by the router."""
+
+    def __init__(self, index: int, port: int, secret: str):
+        """Initialize the worker. The process is not started until start() is called.
+
+        Args:
+            index: Worker number, used as its CLUSTER_WORKER_ID
+            port: Local port the worker listens on
+            secret: Shared secret the worker requires on membership updates
+        """
+        self.index = index
+        self.port = port
+        self.secret = secret
+        self.url = f"http://127.0.0.1:{port}"
+        self.process: Optional[subprocess.Popen] = None
+        self.restarts = 0
+
+    def start(self):
+        """Start the worker process as a single-process chat server on its port."""
+        env = dict(
+            os.environ,
+            CHATBOT_HOST='127.0.0.1',
+            CHATBOT_PORT=str(self.port),
+            SERVER_WORKERS='1',
+            CLUSTER_WORKER_URLS='',
+            CLUSTER_WORKER_ID=str(self.index),
+            CLUSTER_SECRET=self.secret
+        )
+        # Log files are rotated by the process writing them, so each worker gets its own
+        log_file = get_config().log_file
+        if log_file:
+            root, ext = os.path.splitext(log_file)
+            env['LOG_FILE'] = f"{root}-worker{self.index}{ext}"
+        self.process = subprocess.Popen([sys.executable, '-m', 'chatbot'], env=env)
+        logger.info(f"Started chat worker {self.index} (pid {self.process.pid}) on port {self.port}")
+
+    @property
+    def alive(self) -> bool:
+        """Whether the worker process is running."""
+        return self.process is not None and self.process.poll() is None
+
+    def restart(self):
+        """Start a new process after the previous one exited."""
+        logger.warning(f"Chat worker {self.index} exited with code {self.process.returncode}; restarting")
+        self.restarts += 1
+        self.start()
+
+    def stop(self, timeout: float):
+        """Ask the worker to drain and exit, killing it after the timeout.
+
+        Args:
+            timeout: Seconds to wait for a graceful exit
+        """
+        if not self.alive:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Chat worker {self.index} did not stop in {timeout:g}s; killing it")
+            self.process.kill()
+            self.process.wait()
+
+
+class ClusterRouter:
+    """Routes sessions to healthy workers on a consistent hash ring."""
+
+    def __init__(self, worker_urls: List[str], local_workers: List[LocalWorker], virtual_nodes: int,
+                 health_interval: float, secret: str):
+        """Initialize the router.
+
+        Args:
+            worker_urls: Base URLs of every worker, local and remote
+            local_workers: Worker processes this router supervises
+            virtual_nodes: Ring positions per worker
+            health_interval: Seconds between worker health checks
+            secret: Shared secret sent with membership updates
+        """
+        self.worker_urls = worker_urls
+        self.local_workers = local_workers
+        self.virtual_nodes = virtual_nodes
+        self.health_interval = health_interval
+        self.secret = secret
+
+        self.ring = HashRing(virtual_nodes=virtual_nodes)
+        self.epoch = 0
+        self._rebalance_lock = asyncio.Lock()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._stats = {'rebalances': 0, 'failovers': 0, 'unavailable': 0}
+        self._routed: Dict[str, int] = {url: 0 for url in worker_urls}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client used for health checks and proxied requests."""
+        if self._client is None:
+            # Chat turns can take a long time; only connecting is bounded
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(None, connect=2.0),
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=256)
+            )
+        return self._client
+
+    async def start(self):
+        """Start local workers and wait until the workers report healthy."""
+        for worker in self.local_workers:
+            worker.start()
+
+        deadline = time.monotonic() + _STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            await self.check_workers()
+            if len(self.ring) == len(self.worker_urls):
+                break
+            await asyncio.sleep(0.25)
+        logger.info(f"Routing to {len(self.ring)} of {len(self.worker_urls)} chat worker(s)")
+
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def stop(self, timeout: float):
+        """Stop health checks and local workers.
+
+        Args:
+            timeout: Seconds each worker may take to drain
+        """
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(None, worker.stop, timeout) for worker in self.local_workers))
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def _monitor(self):
+        """Check workers every health interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_workers()
+            except Exception as e:
+                logger.error(f"Worker health check failed: {str(e)}", exc_info=True)
+
+    async def is_healthy(self, url: str) -> bool:
+        """Check whether a worker is up and ready to serve."""
+        try:
+            response = await self.client.get(f"{url}/health", timeout=2.0)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def check_workers(self):
+        """Restart exited local workers and rebuild the ring if membership changed."""
+        for worker in self.local_workers:
+            if worker.process is not None and not worker.alive:
+                worker.restart()
+
+        healthy = await asyncio.gather(*(self.is_healthy(url) for url in self.worker_urls))
+        await self._rebalance({url for url, ok in zip(self.worker_urls, healthy) if ok})
+
+    async def mark_down(self, url: str):
+        """Take a worker that refused a connection off the ring straight away."""
+        self._stats['failovers'] += 1
+        await self._rebalance(set(self.ring.nodes) - {url})
+
+    async def _rebalance(self, members: Set[str]):
+        """Tell workers the new membership so they hand off sessions, then switch the ring.
+
+        Args:
+            members: Workers that should be on the ring
+        """
+        async with self._rebalance_lock:
+            if members == set(self.ring.nodes):
+                return
+
+            self.epoch += 1
+            workers = sorted(members)
+            added = members - set(self.ring.nodes)
+            removed = set(self.ring.nodes) - members
+            logger.info(f"Rebalancing to {len(workers)} worker(s) (epoch {self.epoch}): "
+                        f"added {sorted(added) or '-'}, removed {sorted(removed) or '-'}")
+
+            # Removed workers that are still reachable drop everything they hold
+            await asyncio.gather(*(
+                self._send_view(url, workers) for url in self.worker_urls if url in members or url in removed
+            ))
+            self.ring = HashRing(workers, self.virtual_nodes)
+            self._stats['rebalances'] += 1
+
+    async def _send_view(self, url: str, workers: List[str]):
+        """Send the ring membership to one worker, ignoring workers that can't be reached."""
+        try:
+            await self.client.post(f"{url}/cluster/rebalance", json={
+                'workers': workers,
+                'worker': url,
+                'epoch': self.epoch,
+                'virtual_nodes': self.virtual_nodes
+            }, headers={CLUSTER_SECRET_HEADER: self.secret}, timeout=30.0)
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not send cluster view to {url}: {str(e)}")
+
+    def route(self, session_id: str) -> Optional[str]:
+        """Get the worker that owns a session, or None if no worker is up."""
+        url = self.ring.get(session_id)
+        if url is None:
+            self._stats['unavailable'] += 1
+        else:
+            self._routed[url] += 1
+        return url
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get ring membership and routing counters for monitoring.
+
+        Returns:
+            Dictionary of workers, ring epoch and rebalance/failover counters
+        """
+        members = set(self.ring.nodes)
+        local = {worker.url: worker for worker in self.local_workers}
+        workers = []
+        for url in self.worker_urls:
+            entry: Dict[str, Any] = {'url': url, 'up': url in members, 'routed': self._routed[url]}
+            if url in local:
+                entry.update(pid=local[url].process.pid if local[url].process else None,
+                             restarts=local[url].restarts)
+            workers.append(entry)
+        return dict(self._stats, epoch=self.epoch, workers_up=len(members), workers=workers)
+
+
+def _session_id_from_body(body: bytes) -> str:
+    """Extract the session ID a chat request is routed by.
+
+    Requests without one still go to a worker, which rejects them with the
+    usual validation error.
+    """
+    try:
+        data = json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return ''
+    session_id = data.get('session_id') if isinstance(data, dict) else None
+    return session_id if isinstance(session_id, str) else ''
+
+
+def _unavailable_response() -> JSONResponse:
+    """Build the response returned when no worker can take a request."""
+    return JSONResponse({
+        'error': 'The assistant is unavailable right now. Please try again in a moment.',
+        'error_type': 'unavailable'
+    }, status_code=503, headers={'Retry-After': '2'})
+
+
+def create_router_app(router: ClusterRouter) -> Starlette:
+    """Create the router application in front of the chat workers.
+
+    Args:
+        router: Router holding the worker ring
+
+    Returns:
+        Configured Starlette application
+    """
+    config = get_config()
+
+    # The router's own metrics; each worker serves its turn and session metrics on its own /metrics
+    registry = MetricsRegistry()
+    requests_total = registry.register(Counter(
+        'chatbot_cluster_requests_total', 'Chat requests routed to workers.', ['worker', 'outcome']))
+    registry.register(Gauge(
+        'chatbot_cluster_workers_up', 'Chat workers on the hash ring.',
+        callback=lambda: len(router.ring)))
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        await router.start()
+        yield
+        logger.info("Stopping chat workers...")
+        await router.stop(config.server_shutdown_timeout)
+        logger.info("Router stopped")
+
+    async def proxy(request: Request) -> Response:
+        """Forward a chat request to the worker that owns its session."""
+        body = await request.body()
+        session_id = _session_id_from_body(body)
+        headers = {'content-type': request.headers.get('content-type', '')}
+        # Workers rate limit by client IP, so pass on the peer the router saw
+        peer = request.client.host if request.client else 'unknown'
+        forwarded_for = request.headers.get('x-forwarded-for')
+        headers['x-forwarded-for'] = f"{forwarded_for}, {peer}" if forwarded_for else peer
+
+        # A worker that is down (it refuses the connection, or drops it and fails
+        # its health check) is taken off the ring and the session's next owner is tried
+        for _ in range(len(router.worker_urls)):
+            url = router.route(session_id)
+            if url is None:
+                break
+            try:
+                upstream = await router.client.send(
+                    router.client.build_request('POST', f"{url}{request.url.path}", content=body, headers=headers),
+                    stream=True
+                )
+            except httpx.TransportError as e:
+                if isinstance(e, httpx.ConnectError) or not await router.is_healthy(url):
+                    logger.warning(f"Chat worker {url} is down ({type(e).__name__}); failing over")
+                    requests_total.inc(worker=url, outcome='failover')
+                    await router.mark_down(url)
+                    continue
+                logger.error(f"Chat worker {url} failed: {str(e)}")
+                requests_total.inc(worker=url, outcome='error')
+                return JSONResponse({
+                    'error': 'An internal error occurred. Please try again.',
+                    'error_type': 'server',
+                    'session_id': session_id
+                }, status_code=502)
+
+            requests_total.inc(worker=url, outcome=str(upstream.status_code))
+            response_headers = {name: value for name, value in upstream.headers.items()
+                                if name.lower() in _FORWARDED_HEADERS}
+            response_headers[WORKER_HEADER] = url
+            return StreamingResponse(upstream.aiter_raw(), status_code=upstream.status_code,
+                                     headers=response_headers, background=BackgroundTask(upstream.aclose))
+
+        return _unavailable_response()
+
+    async def health_check(request: Request) -> JSONResponse:
+        """Router health: healthy while at least one worker is on the ring."""
+        status = 'healthy' if len(router.ring) else 'unavailable'
+        return JSONResponse({
+            'status': status,
+            'service': 'shopping-assistant-chatbot',
+            'role': 'router',
+            'cluster': router.get_stats()
+        }, status_code=200 if status == 'healthy' else 503)
+
+    async def metrics(request: Request) -> Response:
+        """Router metrics; each worker serves its own /metrics."""
+        return Response(registry.render(), headers={'Content-Type': CONTENT_TYPE})
+
+    async def debug_traces(request: Request) -> JSONResponse:
+        """Slowest recent traces: from the session's worker, or merged across workers."""
+        session_id = request.query_params.get('session_id')
+        urls = [router.ring.get(session_id)] if session_id else router.ring.nodes
+        responses = await asyncio.gather(*(
+            router.client.get(f"{url}/debug/traces", params=request.query_params, timeout=5.0)
+            for url in urls if url is not None
+        ), return_exceptions=True)
+
+        traces = []
+        for response in responses:
+            if isinstance(response, httpx.Response) and response.status_code == 200:
+                traces.extend(response.json().get('traces', []))
+        traces.sort(key=lambda trace: trace.get('duration_ms', 0), reverse=True)
+        return JSONResponse({'traces': traces[:parse_trace_limit(request.query_params.get('limit'))]})
+
+    async def catalog_invalidate(request: Request) -> JSONResponse:
+        """Drop cached catalog data on every worker, which each cache the catalog separately."""
+        body = await request.body()
+        try:
+            data = json.loads(body) if body else None
+        except (ValueError, UnicodeDecodeError):
+            data = None
+        error = validate_catalog_invalidation(request.headers.get('Authorization'), data)
+        if error:
+            error_body, status = error
+            return JSONResponse(error_body, status_code=status)
+
+        urls = router.ring.nodes
+        responses = await asyncio.gather(*(
+            router.client.post(f"{url}/admin/catalog/invalidate", content=body, timeout=5.0, headers={
+                'authorization': request.headers['authorization'], 'content-type': 'application/json'
+            })
+            for url in urls
+        ), return_exceptions=True)
+        workers = {
+            url: response.status_code if isinstance(response, httpx.Response) else type(response).__name__
+            for url, response in zip(urls, responses)
+        }
+        ok = all(status == 200 for status in workers.values())
+        return JSONResponse({'invalidated': (data or {}).get('product_id'), 'workers': workers},
+                            status_code=200 if ok else 502)
+
+    routes = [
+        Route('/health', health_check, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+        Route('/debug/traces', debug_traces, methods=['GET']),
+        Route('/chat', proxy, methods=['POST']),
+        Route('/chat/stream', proxy, methods=['POST'])
+    ]
+    if config.catalog_admin_token:
+        routes.append(Route('/admin/catalog/invalidate', catalog_invalidate, methods=['POST']))
+
+    return Starlette(
+        routes=routes,
+        middleware=[
+            Middleware(
+                CORSMiddleware,
+                allow_origins=CORS_ORIGINS,
+                allow_methods=['GET', 'POST', 'OPTIONS'],
+                allow_headers=['Content-Type']
+            )
+        ],
+        lifespan=lifespan
+    )
+
+
+def run_cluster():
+    """Run the router and its chat workers.
+
+    Local workers listen on the ports after CHATBOT_PORT; the router listens on
+    CHATBOT_PORT. uvicorn handles SIGINT/SIGTERM, after which each worker is
+    stopped and drains its in-flight turns.
+    """
+    config = get_config()
+    # Remote workers must be started with the same CLUSTER_SECRET; local ones are given it
+    secret = config.cluster_secret or secrets.token_urlsafe(32)
+    local_workers = [
+        LocalWorker(index, config.chatbot_port + index, secret) for index in range(1, config.server_workers + 1)
+    ] if config.server_workers > 1 else []
+    worker_urls = [worker.url for worker in local_workers] + config.cluster_worker_urls
+
+    router = ClusterRouter(
+        worker_urls,
+        local_workers,
+        virtual_nodes=config.cluster_virtual_nodes,
+        health_interval=config.cluster_health_interval_seconds,
+        secret=secret
+    )
+
+    logger.info(f"Starting chatbot router on port {config.chatbot_port} for {len(worker_urls)} worker(s)")
+    server = uvicorn.Server(uvicorn.Config(
+        create_router_app(router),
+        host=config.chatbot_host,
+        port=config.chatbot_port,
+        timeout_graceful_shutdown=int(config.server_shutdown_timeout),
+        log_config=None
+    ))
+    server.run()
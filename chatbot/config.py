@@ -5,7 +5,7 @@ This module loads and validates environment variables required for the chatbot s
 
 import os
 import logging
-from typing import Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -19,6 +19,34 @@ class ConfigurationError(Exception):
     pass
 
 
+def _parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse LOG_SAMPLE_RATES, e.g. "tool=0.1,backend=0.05".
+    
+    Args:
+        value: Comma-separated category=rate pairs
+    
+    Returns:
+        Dictionary mapping log category to the fraction of its INFO lines kept
+    
+    Raises:
+        ConfigurationError: If a pair is malformed or a rate is outside 0..1
+    """
+    rates = {}
+    for pair in filter(None, (pair.strip() for pair in value.split(','))):
+        category, _, rate_text = pair.partition('=')
+        category = category.strip()
+        try:
+            rate = float(rate_text)
+        except ValueError:
+            rate = None
+        if not category or rate is None or not 0 <= rate <= 1:
+            raise ConfigurationError(
+                f"Invalid LOG_SAMPLE_RATES entry '{pair}'. Expected category=rate with a rate from 0 to 1."
+            )
+        rates[category] = rate
+    return rates
+
+
 class Config:
     """Configuration class for chatbot service."""
     
@@ -36,18 +64,122 @@ class Config:
         
         # AWS Region (Optional with default)
         self.aws_region: str = os.getenv('AWS_REGION', 'us-west-2')
-        
-        # Backend API Configuration (Optional with default)
+
+        # Bedrock Model and Connection Pool (Optional with defaults)
+        self.bedrock_model_id: str = os.getenv('BEDROCK_MODEL_ID', 'us.amazon.nova-pro-v1:0')
+        self.bedrock_temperature: float = float(os.getenv('BEDROCK_TEMPERATURE', '0.7'))
+        self.bedrock_max_pool_connections: int = int(os.getenv('BEDROCK_MAX_POOL_CONNECTIONS', '50'))
+        self.bedrock_connect_timeout: float = float(os.getenv('BEDROCK_CONNECT_TIMEOUT', '5'))
+        self.bedrock_read_timeout: float = float(os.getenv('BEDROCK_READ_TIMEOUT', '120'))
+        self.bedrock_max_retries: int = int(os.getenv('BEDROCK_MAX_RETRIES', '3'))
+
+        # Backend API Configuration (Optional with defaults)
         self.backend_api_url: str = os.getenv('BACKEND_API_URL', 'http://localhost:5000')
+        self.backend_pool_size: int = int(os.getenv('BACKEND_POOL_SIZE', '20'))
+        self.backend_connect_timeout: float = float(os.getenv('BACKEND_CONNECT_TIMEOUT', '3'))
+        self.backend_read_timeout: float = float(os.getenv('BACKEND_READ_TIMEOUT', '10'))
+        self.backend_max_retries: int = int(os.getenv('BACKEND_MAX_RETRIES', '2'))
+        self.backend_retry_backoff: float = float(os.getenv('BACKEND_RETRY_BACKOFF', '0.2'))
+        self.backend_fanout_workers: int = int(os.getenv('BACKEND_FANOUT_WORKERS', '8'))
+        
+        # Conversation Context Window (Optional with defaults)
+        self.context_window_turns: int = int(os.getenv('CONTEXT_WINDOW_TURNS', '6'))
+        self.context_token_budget: int = int(os.getenv('CONTEXT_TOKEN_BUDGET', '8000'))
+        self.context_summary_max_chars: int = int(os.getenv('CONTEXT_SUMMARY_MAX_CHARS', '4000'))
+        
+        # Catalog Cache (Optional with defaults)
+        self.catalog_cache_ttl_seconds: float = float(os.getenv('CATALOG_CACHE_TTL_SECONDS', '300'))
+        self.catalog_cache_stale_seconds: float = float(os.getenv('CATALOG_CACHE_STALE_SECONDS', '3600'))
+        self.catalog_cache_max_entries: int = int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', '1000'))
+        self.catalog_admin_token: str = os.getenv('CATALOG_ADMIN_TOKEN', '')
+        
+        # Recommendations (Optional with defaults)
+        self.recommendation_refresh_seconds: float = float(os.getenv('RECOMMENDATION_REFRESH_SECONDS', '600'))
+        self.recommendation_max_baskets: int = int(os.getenv('RECOMMENDATION_MAX_BASKETS', '500'))
+        
+        # Per-Session Cart Mirror (Optional with defaults)
+        self.cart_mirror_ttl_seconds: float = float(os.getenv('CART_MIRROR_TTL_SECONDS', '15'))
+        self.cart_mirror_max_sessions: int = int(os.getenv('CART_MIRROR_MAX_SESSIONS', '1000'))
         
         # Chatbot Service Configuration (Optional with defaults)
+        self.chatbot_host: str = os.getenv('CHATBOT_HOST', '0.0.0.0')
         self.chatbot_port: int = int(os.getenv('CHATBOT_PORT', '5001'))
+        self.server_mode: str = os.getenv('SERVER_MODE', 'async').lower()
+        self.server_max_concurrency: int = int(os.getenv('SERVER_MAX_CONCURRENCY', '64'))
+        self.server_queue_size: int = int(os.getenv('SERVER_QUEUE_SIZE', '256'))
+        self.server_worker_threads: int = int(os.getenv('SERVER_WORKER_THREADS', '128'))
+        self.server_shutdown_timeout: float = float(os.getenv('SERVER_SHUTDOWN_TIMEOUT', '30'))
+        
+        # Admission Control (Optional with defaults)
+        self.rate_limit_session_per_minute: float = float(os.getenv('RATE_LIMIT_SESSION_PER_MINUTE', '20'))
+        self.rate_limit_session_burst: int = int(os.getenv('RATE_LIMIT_SESSION_BURST', '5'))
+        self.rate_limit_ip_per_minute: float = float(os.getenv('RATE_LIMIT_IP_PER_MINUTE', '120'))
+        self.rate_limit_ip_burst: int = int(os.getenv('RATE_LIMIT_IP_BURST', '30'))
+        self.rate_limit_trusted_proxies: List[str] = [
+            proxy.strip() for proxy in os.getenv('RATE_LIMIT_TRUSTED_PROXIES', '127.0.0.1,::1').split(',') if proxy.strip()
+        ]
+        self.model_max_concurrency: int = int(os.getenv('MODEL_MAX_CONCURRENCY', '32'))
+        self.model_queue_size: int = int(os.getenv('MODEL_QUEUE_SIZE', '64'))
+        
+        # Multi-Process Scale-Out (Optional with defaults)
+        self.server_workers: int = int(os.getenv('SERVER_WORKERS', '1'))
+        self.cluster_worker_urls: List[str] = [
+            url.strip().rstrip('/') for url in os.getenv('CLUSTER_WORKER_URLS', '').split(',') if url.strip()
+        ]
+        self.cluster_virtual_nodes: int = int(os.getenv('CLUSTER_VIRTUAL_NODES', '160'))
+        self.cluster_health_interval_seconds: float = float(os.getenv('CLUSTER_HEALTH_INTERVAL_SECONDS', '2'))
+        self.cluster_secret: str = os.getenv('CLUSTER_SECRET', '')
+        self.cluster_worker_id: str = os.getenv('CLUSTER_WORKER_ID', '')
         
         # Session Storage (Optional with default)
         self.session_storage_dir: str = os.getenv('SESSION_STORAGE_DIR', './sessions')
+        self.session_backend: str = os.getenv('SESSION_BACKEND', 'file').lower()
+        self.session_db_path: str = (
+            os.getenv('SESSION_DB_PATH') or os.path.join(self.session_storage_dir, 'sessions.db')
+        )
+        self.session_db_flush_ms: float = float(os.getenv('SESSION_DB_FLUSH_MS', '50'))
+        self.session_db_max_batch: int = int(os.getenv('SESSION_DB_MAX_BATCH', '200'))
+        self.session_write_behind_ms: float = float(os.getenv('SESSION_WRITE_BEHIND_MS', '250'))
+        self.session_write_behind_max_pending: int = int(os.getenv('SESSION_WRITE_BEHIND_MAX_PENDING', '10000'))
+
+        # Model Tiering (Optional with defaults)
+        self.bedrock_fast_model_id: str = os.getenv('BEDROCK_FAST_MODEL_ID', 'us.amazon.nova-lite-v1:0')
+        self.bedrock_fast_temperature: float = float(os.getenv('BEDROCK_FAST_TEMPERATURE', '0.3'))
+        self.model_tier_fast_max_words: int = int(os.getenv('MODEL_TIER_FAST_MAX_WORDS', '30'))
+        self.model_tier_fast_max_calls: int = int(os.getenv('MODEL_TIER_FAST_MAX_CALLS', '3'))
+        
+        # Intent Fast Path (Optional with defaults)
+        self.fast_path_enabled: bool = os.getenv('FAST_PATH_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.fast_path_min_confidence: float = float(os.getenv('FAST_PATH_MIN_CONFIDENCE', '0.9'))
+        
+        # Pre-Warmed Agent Pool (Optional with defaults)
+        self.agent_pool_size: int = int(os.getenv('AGENT_POOL_SIZE', '4'))
+        self.agent_pool_refill_per_second: float = float(os.getenv('AGENT_POOL_REFILL_PER_SECOND', '10'))
+        self.agent_pool_warmup_timeout: float = float(os.getenv('AGENT_POOL_WARMUP_TIMEOUT', '30'))
+
+        # In-Memory Session Limits (Optional with defaults)
+        self.session_max_active: int = int(os.getenv('SESSION_MAX_ACTIVE', '1000'))
+        self.session_idle_ttl_seconds: float = float(os.getenv('SESSION_IDLE_TTL_SECONDS', '1800'))
+        self.session_memory_budget_mb: int = int(os.getenv('SESSION_MEMORY_BUDGET_MB', '512'))
+
+        # Per-Session Turn Queue (Optional with defaults)
+        self.session_max_pending_turns: int = int(os.getenv('SESSION_MAX_PENDING_TURNS', '5'))
+        self.turn_coalesce_window_seconds: float = float(os.getenv('TURN_COALESCE_WINDOW_SECONDS', '3'))
+        
+        # Request Tracing (Optional with defaults)
+        self.trace_buffer_size: int = int(os.getenv('TRACE_BUFFER_SIZE', '500'))
+        self.trace_export_path: str = os.getenv('TRACE_EXPORT_PATH', '')
         
         # Logging Configuration (Optional with default)
         self.log_level: str = os.getenv('LOG_LEVEL', 'INFO')
+        self.log_format: str = os.getenv('LOG_FORMAT', 'json').lower()
+        self.log_file: str = os.getenv('LOG_FILE', 'chatbot.log')
+        self.log_file_max_mb: float = float(os.getenv('LOG_FILE_MAX_MB', '10'))
+        self.log_file_backups: int = int(os.getenv('LOG_FILE_BACKUPS', '5'))
+        self.log_queue_size: int = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+        self.log_sample_rates: Dict[str, float] = _parse_sample_rates(
+            os.getenv('LOG_SAMPLE_RATES', 'session=0.1,tool=0.1,backend=0.1')
+        )
     
     def _validate_config(self):
         """Validate that required configuration is present.
@@ -64,6 +196,31 @@ class Config:
         if not self.aws_secret_access_key:
             missing_configs.append('AWS_SECRET_ACCESS_KEY')
         
+        if self.server_mode not in ('async', 'threaded'):
+            error_msg = f"Invalid SERVER_MODE '{self.server_mode}'. Expected 'async' or 'threaded'."
+            logger.error(error_msg)
+            raise ConfigurationError(error_msg)
+        
+        if self.server_workers < 1:
+            error_msg = f"Invalid SERVER_WORKERS '{self.server_workers}'. Expected 1 or more."
+            logger.error(error_msg)
+            raise ConfigurationError(error_msg)
+        
+        if self.cluster_worker_urls and not self.cluster_secret:
+            error_msg = "CLUSTER_SECRET must be set when CLUSTER_WORKER_URLS lists workers on other hosts."
+            logger.error(error_msg)
+            raise ConfigurationError(error_msg)
+        
+        if self.session_backend not in ('file', 'sqlite'):
+            error_msg = f"Invalid SESSION_BACKEND '{self.session_backend}'. Expected 'file' or 'sqlite'."
+            logger.error(error_msg)
+            raise ConfigurationError(error_msg)
+        
+        if self.log_format not in ('json', 'text'):
+            error_msg = f"Invalid LOG_FORMAT '{self.log_format}'. Expected 'json' or 'text'."
+            logger.error(error_msg)
+            raise ConfigurationError(error_msg)
+        
         if missing_configs:
             error_msg = (
                 f"Missing required configuration: {', '.join(missing_configs)}. "
@@ -0,0 +1,292 @@
+"""Conversation management module for the Shopping Assistant Chatbot.
+
+This module keeps each agent's prompt bounded: the most recent turns are kept
+verbatim and older turns are folded into a compact running summary, so long
+shopping sessions do not get slower and more expensive with every turn.
+Summaries are built locally from the messages themselves, without extra
+model calls.
+"""
+
+import json
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from strands.agent.conversation_manager import ConversationManager
+from strands.types.exceptions import ContextWindowOverflowException
+
+if TYPE_CHECKING:
+    from strands import Agent
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used for budget estimates
+CHARS_PER_TOKEN = 4
+
+# Longest excerpt of a single message kept in the running summary
+SUMMARY_EXCERPT_CHARS = 160
+
+# Tool results kept in the verbatim window are truncated to this length when over budget
+TOOL_RESULT_TRIM_CHARS = 600
+
+SUMMARY_PREFIX = "Summary of the earlier conversation with this customer:\n"
+SUMMARY_ACK = "Understood. I'll keep that context in mind."
+
+# Process-wide savings counters across all sessions
+_totals = {'tokens_removed': 0, 'prompt_tokens_saved': 0, 'turns_summarized': 0, 'tool_results_trimmed': 0}
+_totals_lock = threading.Lock()
+
+
+def estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Estimate the prompt tokens used by a list of messages.
+
+    Args:
+        messages: Conversation messages in Bedrock Converse format
+
+    Returns:
+        Approximate token count
+    """
+    return len(json.dumps(messages, default=str)) // CHARS_PER_TOKEN
+
+
+def _excerpt(text: str, limit: int = SUMMARY_EXCERPT_CHARS) -> str:
+    """Collapse whitespace and truncate text for the summary."""
+    text = ' '.join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+
+def _tool_result_text(tool_result: Dict[str, Any]) -> str:
+    """Flatten a toolResult block's content into text."""
+    parts = []
+    for item in tool_result.get('content', []):
+        if 'text' in item:
+            parts.append(item['text'])
+        elif 'json' in item:
+            parts.append(json.dumps(item['json'], default=str))
+    return ' '.join(parts)
+
+
+def _is_turn_start(message: Dict[str, Any]) -> bool:
+    """Check whether a message starts a new user turn (a user message that isn't a tool result)."""
+    return message.get('role') == 'user' and not any('toolResult' in block for block in message.get('content', []))
+
+
+def _summarize_turn(messages: List[Dict[str, Any]]) -> List[str]:
+    """Build summary lines for one turn's messages.
+
+    Args:
+        messages: Messages from a user message up to (not including) the next one
+
+    Returns:
+        Compact summary lines describing the turn
+    """
+    lines = []
+    for message in messages:
+        for block in message.get('content', []):
+            if 'text' in block and block['text'].strip():
+                speaker = 'Customer' if message.get('role') == 'user' else 'Assistant'
+                lines.append(f"- {speaker}: {_excerpt(block['text'])}")
+            elif 'toolUse' in block:
+                tool_use = block['toolUse']
+                arguments = json.dumps(tool_use.get('input', {}), default=str)
+                lines.append(f"- Tool {tool_use.get('name')}({_excerpt(arguments, 80)})")
+            elif 'toolResult' in block:
+                status = block['toolResult'].get('status', 'success')
+                lines.append(f"  -> {status}: {_excerpt(_tool_result_text(block['toolResult']), 100)}")
+    return lines
+
+
+class WindowedSummaryConversationManager(ConversationManager):
+    """Keeps the last N turns verbatim and folds older turns into a running summary."""
+
+    def __init__(self, window_turns: int, token_budget: int, max_summary_chars: int):
+        """Initialize the conversation manager.
+
+        Args:
+            window_turns: Number of most recent user turns kept verbatim
+            token_budget: Approximate prompt tokens allowed for the conversation history
+            max_summary_chars: Maximum length of the running summary text
+        """
+        super().__init__()
+        self.window_turns = max(1, window_turns)
+        self.token_budget = token_budget
+        self.max_summary_chars = max_summary_chars
+
+        self._summary_lines: List[str] = []
+        # Estimated tokens no longer carried in the prompt, and the running total
+        # of prompt tokens avoided across turns because of that
+        self.tokens_removed = 0
+        self.prompt_tokens_saved = 0
+
+    def apply_management(self, agent: "Agent", **kwargs: Any) -> None:
+        """Window and summarize the agent's history after each invocation.
+
+        Args:
+            agent: The agent whose conversation history will be managed
+            **kwargs: Additional keyword arguments for future extensibility
+        """
+        before = estimate_tokens(agent.messages)
+
+        turn_starts = self._turn_starts(agent.messages)
+        if len(turn_starts) > self.window_turns:
+            self._fold(agent, turn_starts[-self.window_turns])
+
+        if self.token_budget > 0 and estimate_tokens(agent.messages) > self.token_budget:
+            self._enforce_budget(agent)
+
+        self._record_savings(before, estimate_tokens(agent.messages))
+
+        # The next turn's prompt omits everything removed so far
+        self.prompt_tokens_saved += self.tokens_removed
+        with _totals_lock:
+            _totals['prompt_tokens_saved'] += self.tokens_removed
+
+    def reduce_context(self, agent: "Agent", e: Optional[Exception] = None, **kwargs: Any) -> None:
+        """Reduce history after a context window overflow.
+
+        Args:
+            agent: The agent whose conversation history will be reduced
+            e: The exception that triggered the reduction, if any
+            **kwargs: Additional keyword arguments for future extensibility
+
+        Raises:
+            ContextWindowOverflowException: If the history cannot be reduced further
+        """
+        before = estimate_tokens(agent.messages)
+        turn_starts = self._turn_starts(agent.messages)
+
+        if len(turn_starts) > 1:
+            # Keep only the current turn verbatim
+            self._fold(agent, turn_starts[-1])
+        elif not self._trim_tool_results(agent.messages):
+            if e:
+                raise ContextWindowOverflowException("Unable to reduce conversation history further") from e
+            return
+
+        self._record_savings(before, estimate_tokens(agent.messages))
+
+    def get_state(self) -> Dict[str, Any]:
+        """Get the manager state for session persistence."""
+        state = super().get_state()
+        state['summary_lines'] = list(self._summary_lines)
+        state['tokens_removed'] = self.tokens_removed
+        state['prompt_tokens_saved'] = self.prompt_tokens_saved
+        return state
+
+    def restore_from_session(self, state: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Restore the running summary from session state.
+
+        Args:
+            state: Previously saved manager state
+
+        Returns:
+            Summary messages to prepend to the restored history, if any
+        """
+        super().restore_from_session(state)
+        self._summary_lines = list(state.get('summary_lines', []))
+        self.tokens_removed = state.get('tokens_removed', 0)
+        self.prompt_tokens_saved = state.get('prompt_tokens_saved', 0)
+        return self._summary_messages() if self._summary_lines else None
+
+    def _summary_messages(self) -> List[Dict[str, Any]]:
+        """Build the user/assistant message pair carrying the running summary."""
+        return [
+            {'role': 'user', 'content': [{'text': SUMMARY_PREFIX + '\n'.join(self._summary_lines)}]},
+            {'role': 'assistant', 'content': [{'text': SUMMARY_ACK}]}
+        ]
+
+    def _summary_offset(self, messages: List[Dict[str, Any]]) -> int:
+        """Number of leading messages that are this manager's summary pair."""
+        if self._summary_lines and len(messages) >= 2:
+            first = messages[0].get('content', [{}])[0]
+            if first.get('text', '').startswith(SUMMARY_PREFIX):
+                return 2
+        return 0
+
+    def _turn_starts(self, messages: List[Dict[str, Any]]) -> List[int]:
+        """Indexes of messages that start user turns, excluding the summary pair."""
+        offset = self._summary_offset(messages)
+        return [i for i in range(offset, len(messages)) if _is_turn_start(messages[i])]
+
+    def _fold(self, agent: "Agent", split: int):
+        """Fold messages before the split index into the running summary.
+
+        Args:
+            agent: The agent whose history is being folded
+            split: Index of the first message to keep verbatim (a turn start)
+        """
+        offset = self._summary_offset(agent.messages)
+        folded = agent.messages[offset:split]
+        if not folded:
+            return
+
+        turns = 0
+        start = 0
+        for i in range(1, len(folded) + 1):
+            if i == len(folded) or _is_turn_start(folded[i]):
+                self._summary_lines.extend(_summarize_turn(folded[start:i]))
+                turns += 1
+                start = i
+
+        # Keep the newest summary lines when the summary outgrows its cap
+        while len(self._summary_lines) > 1 and len('\n'.join(self._summary_lines)) > self.max_summary_chars:
+            self._summary_lines.pop(0)
+
+        self.removed_message_count += len(folded)
+        agent.messages[:] = self._summary_messages() + agent.messages[split:]
+
+        with _totals_lock:
+            _totals['turns_summarized'] += turns
+        logger.debug(f"Folded {turns} turn(s) ({len(folded)} messages) into the running summary")
+
+    def _trim_tool_results(self, messages: List[Dict[str, Any]]) -> bool:
+        """Truncate bulky tool results in place.
+
+        Returns:
+            True if any tool result was trimmed
+        """
+        trimmed = 0
+        for message in messages:
+            for block in message.get('content', []):
+                if 'toolResult' not in block:
+                    continue
+                text = _tool_result_text(block['toolResult'])
+                if len(text) > TOOL_RESULT_TRIM_CHARS:
+                    block['toolResult']['content'] = [{
+                        'text': text[:TOOL_RESULT_TRIM_CHARS] + ' ... [truncated to save context]'
+                    }]
+                    trimmed += 1
+
+        if trimmed:
+            with _totals_lock:
+                _totals['tool_results_trimmed'] += trimmed
+        return trimmed > 0
+
+    def _enforce_budget(self, agent: "Agent"):
+        """Shrink the verbatim window until the history fits the token budget."""
+        self._trim_tool_results(agent.messages)
+
+        while estimate_tokens(agent.messages) > self.token_budget:
+            turn_starts = self._turn_starts(agent.messages)
+            if len(turn_starts) <= 1:
+                break
+            self._fold(agent, turn_starts[1])
+
+    def _record_savings(self, before: int, after: int):
+        """Accumulate tokens removed from the history."""
+        removed = max(0, before - after)
+        if not removed:
+            return
+
+        self.tokens_removed += removed
+        with _totals_lock:
+            _totals['tokens_removed'] += removed
+
+
+def get_context_stats() -> Dict[str, int]:
+    """Get process-wide conversation windowing statistics.
+
+    Returns:
+        Dictionary of tokens removed, prompt tokens saved, turns summarized and tool results trimmed
+    """
+    with _totals_lock:
+        return dict(_totals)
@@ -0,0 +1,76 @@
+"""Consistent hash ring for the Shopping Assistant Chatbot.
+
+Maps session IDs to chat workers so every message of a conversation reaches
+the worker holding it in memory. Each worker is placed on the ring at many
+points (virtual nodes), so load spreads evenly and adding or removing a worker
+only moves the sessions on its own arcs, about 1/N of them.
+"""
+
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+
+def _hash(value: str) -> int:
+    """Hash a string to a 64-bit ring position."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent hash ring of worker names."""
+
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = 160):
+        """Initialize the ring.
+
+        Args:
+            nodes: Initial worker names (e.g. base URLs)
+            virtual_nodes: Ring positions per worker
+        """
+        self.virtual_nodes = max(1, virtual_nodes)
+        self._positions: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self._nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        """Workers on the ring, sorted."""
+        return sorted(self._nodes)
+
+    def add(self, node: str):
+        """Place a worker on the ring. Adding a worker already present does nothing."""
+        if node in self._nodes:
+            return
+        self._nodes.append(node)
+        for index in range(self.virtual_nodes):
+            position = _hash(f"{node}#{index}")
+            # Ties are vanishingly rare; the first worker placed keeps the position
+            if position not in self._owners:
+                self._owners[position] = node
+                bisect.insort(self._positions, position)
+
+    def remove(self, node: str):
+        """Take a worker off the ring. Its sessions move to the next workers clockwise."""
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        self._owners = {position: owner for position, owner in self._owners.items() if owner != node}
+        self._positions = sorted(self._owners)
+
+    def get(self, key: str) -> Optional[str]:
+        """Get the worker that owns a key.
+
+        Args:
+            key: Session ID
+
+        Returns:
+            Owning worker, or None if the ring is empty
+        """
+        if not self._positions:
+            return None
+        index = bisect.bisect(self._positions, _hash(key)) % len(self._positions)
+        return self._owners[self._positions[index]]
+
+    def __len__(self) -> int:
+        return len(self._nodes)
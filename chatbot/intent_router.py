@@ -0,0 +1,238 @@
+"""Deterministic intent router for the Shopping Assistant Chatbot.
+
+Many messages are simple commands with exactly one sensible tool call: "show
+my cart", "list products", "remove item 3", "add 2 of product 5". This module
+matches them with a small grammar so the agent can run the tool directly and
+answer from a template, skipping the model round-trips.
+
+Messages are normalized first (case, punctuation, number words, polite
+phrases such as "please" or "can you"). A rule's confidence is the share of
+the normalized message its pattern covers, so anything beyond the bare
+command ("add product 5 and tell me about shipping", "don't add product 5")
+falls below the threshold and is left to the model.
+"""
+
+import logging
+import re
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+from chatbot.metrics import REGISTRY, Counter
+from chatbot.tools import add_to_cart, get_cart, get_product_details, list_products, remove_from_cart, update_cart_item
+
+logger = logging.getLogger(__name__)
+
+FAST_PATH_TURNS = REGISTRY.register(Counter(
+    'chatbot_fast_path_turns_total', 'Chat turns answered by the intent router without the model.', ['intent']))
+
+# Number of recent fast-path turn latencies kept for percentile estimates
+_SAMPLE_SIZE = 256
+
+_NUMBER_WORDS = {
+    'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5', 'six': '6',
+    'seven': '7', 'eight': '8', 'nine': '9', 'ten': '10', 'eleven': '11', 'twelve': '12'
+}
+_POLITE_PREFIX = re.compile(
+    r"^(?:(?:hi|hey|hello|ok|okay|please|pls|can you|could you|would you|will you|i want to|i'd like to|"
+    r"i would like to|let me|go ahead and|now)\s+)+"
+)
+_POLITE_SUFFIX = re.compile(r"(?:\s+(?:please|pls|thanks|thank you|for me|now))+$")
+
+_CART = r"(?:shopping )?(?:cart|basket)"
+_TO_CART = rf"(?: (?:to|into|in) (?:my |the )?{_CART})?"
+_FROM_CART = rf"(?: from (?:my |the )?{_CART})?"
+
+
+class IntentMatch:
+    """A message matched to a single tool call."""
+
+    def __init__(self, intent: str, tool: Callable[..., str], arguments: Dict[str, Any], confidence: float,
+                 template: str):
+        """Initialize the match.
+
+        Args:
+            intent: Intent name
+            tool: Tool function to run
+            arguments: Keyword arguments for the tool
+            confidence: Share of the normalized message the pattern covered (0..1)
+            template: Reply template with a {result} placeholder for the tool output
+        """
+        self.intent = intent
+        self.tool = tool
+        self.arguments = arguments
+        self.confidence = confidence
+        self.template = template
+
+    @property
+    def tool_name(self) -> str:
+        """Name of the tool as registered with the agent."""
+        return getattr(self.tool, 'tool_name', None) or self.tool.__name__
+
+    def render(self, result: str) -> str:
+        """Render the reply for the tool's output."""
+        return self.template.format(result=result.strip())
+
+
+class _Rule:
+    """Patterns for one intent and how to turn a match into tool arguments."""
+
+    def __init__(self, intent: str, patterns: List[str], tool: Callable[..., str], template: str,
+                 defaults: Optional[Dict[str, int]] = None):
+        self.intent = intent
+        self.patterns: List[Pattern[str]] = [re.compile(pattern) for pattern in patterns]
+        self.tool = tool
+        self.template = template
+        self.defaults = defaults or {}
+
+    def match(self, text: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """Match the rule against normalized text.
+
+        Returns:
+            Tuple of (confidence, tool arguments) for the best pattern, or None
+        """
+        best = None
+        for pattern in self.patterns:
+            found = pattern.search(text)
+            if found is None:
+                continue
+            confidence = (found.end() - found.start()) / len(text)
+            if best is None or confidence > best[0]:
+                arguments: Dict[str, Any] = dict(self.defaults)
+                arguments.update({name: int(value) for name, value in found.groupdict().items() if value is not None})
+                best = (confidence, arguments)
+        return best
+
+
+_RULES = [
+    _Rule('view_cart', [
+        rf"(?:show|view|see|display|check|open|get)(?: me)?(?: my| the)? {_CART}(?: contents)?",
+        rf"what(?:s| is)(?: currently)? in (?:my |the )?{_CART}",
+        rf"(?:my )?{_CART}",
+    ], get_cart, "{result}"),
+    _Rule('list_products', [
+        r"(?:show|list|see|view|display|browse|get)(?: me)?(?: all)?(?: of)?(?: the| your)?(?: available)? products",
+        r"what (?:products )?do you (?:sell|have)",
+        r"what products (?:do you have|are available)",
+        r"(?:all )?products|product list|catalog",
+    ], list_products, "{result}\n\nWould you like details on any of these, or should I add one to your cart?"),
+    _Rule('product_details', [
+        r"(?:show|view|get|describe)(?: me)? product (?P<product_id>\d+)",
+        r"(?:tell me about|details (?:for|on|of)|info(?:rmation)? (?:on|about|for)) product (?P<product_id>\d+)",
+    ], get_product_details, "{result}"),
+    _Rule('add_to_cart', [
+        rf"add(?: (?P<quantity>\d+)(?: x| of| units of| items of)?)? product (?P<product_id>\d+){_TO_CART}",
+        rf"add product (?P<product_id>\d+) x ?(?P<quantity>\d+){_TO_CART}",
+    ], add_to_cart, "{result}", defaults={'quantity': 1}),
+    _Rule('update_cart_item', [
+        r"(?:set|change|update)(?: the)?(?: quantity of)?(?: cart)? item (?P<cart_item_id>\d+)"
+        r"(?: quantity)? to (?P<quantity>\d+)",
+    ], update_cart_item, "{result}"),
+    _Rule('remove_from_cart', [
+        rf"(?:remove|delete|take out)(?: cart)? item (?P<cart_item_id>\d+){_FROM_CART}",
+    ], remove_from_cart, "{result}"),
+]
+
+
+def normalize(message: str) -> str:
+    """Normalize a message for intent matching.
+
+    Args:
+        message: Raw user message
+
+    Returns:
+        Lower-cased text with punctuation, number words and polite phrases resolved
+    """
+    text = message.lower().replace('’', "'")
+    text = re.sub(r"#(\d)", r"\1", text)
+    text = re.sub(r"what's", 'whats', text)
+    text = re.sub(r"[^\w' ]+", ' ', text)
+    text = ' '.join(_NUMBER_WORDS.get(word, word) for word in text.split())
+    text = _POLITE_PREFIX.sub('', text)
+    return _POLITE_SUFFIX.sub('', text).strip()
+
+
+def detect_intent(message: str) -> Optional[IntentMatch]:
+    """Find the closest single-tool command in a message, however loosely it matches.
+
+    Args:
+        message: Raw user message
+
+    Returns:
+        The best match with its confidence, or None if no rule matches
+    """
+    text = normalize(message)
+    best: Optional[IntentMatch] = None
+    if text:
+        for rule in _RULES:
+            found = rule.match(text)
+            if found and (best is None or found[0] > best.confidence):
+                best = IntentMatch(rule.intent, rule.tool, found[1], found[0], rule.template)
+    return best
+
+
+class IntentRouter:
+    """Matches messages to tool calls and keeps routing statistics."""
+
+    def __init__(self, min_confidence: float):
+        """Initialize the router.
+
+        Args:
+            min_confidence: Lowest match confidence answered without the model
+        """
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {'matched': {}, 'below_threshold': 0, 'unmatched': 0, 'errors': 0}
+        self._samples: "deque[float]" = deque(maxlen=_SAMPLE_SIZE)
+
+    def route(self, message: str) -> Optional[IntentMatch]:
+        """Find the tool call a message asks for.
+
+        Args:
+            message: Raw user message
+
+        Returns:
+            The best match at or above the confidence threshold, or None to use the model
+        """
+        best = detect_intent(message)
+        with self._lock:
+            if best is None:
+                self._stats['unmatched'] += 1
+                return None
+            if best.confidence < self.min_confidence:
+                self._stats['below_threshold'] += 1
+                logger.debug(f"Intent {best.intent} below threshold ({best.confidence:.2f})")
+                return None
+        return best
+
+    def record(self, match: IntentMatch, elapsed_ms: float, error: bool = False):
+        """Record the outcome of a fast-path turn.
+
+        Args:
+            match: The routed intent
+            elapsed_ms: Time to run the tool and record the exchange
+            error: Whether the tool failed and the turn fell back to the model
+        """
+        with self._lock:
+            if error:
+                self._stats['errors'] += 1
+                return
+            matched = self._stats['matched']
+            matched[match.intent] = matched.get(match.intent, 0) + 1
+            self._samples.append(elapsed_ms)
+        FAST_PATH_TURNS.inc(intent=match.intent)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing counters and fast-path latency for monitoring.
+
+        Returns:
+            Dictionary of matches per intent, fall-throughs and latency in milliseconds
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats, matched=dict(self._stats['matched']))
+            samples = sorted(self._samples)
+        stats.update(
+            min_confidence=self.min_confidence,
+            p50_ms=round(samples[len(samples) // 2], 2) if samples else 0.0,
+            p99_ms=round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2) if samples else 0.0
+        )
+        return stats
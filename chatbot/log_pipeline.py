@@ -0,0 +1,260 @@
+"""Asynchronous structured logging for the Shopping Assistant Chatbot.
+
+Request threads and the event loop only put log records on a bounded queue;
+a background listener thread formats them and writes them to stdout and a
+size-rotated log file. Records are JSON objects carrying the current trace
+and session IDs, so log lines can be joined with /debug/traces.
+
+Per-request INFO lines are tagged with a category (request, turn, session,
+tool, backend) and sampled per category with LOG_SAMPLE_RATES. The keep
+decision is made per trace, so a sampled request keeps all of its lines in
+that category. Warnings and errors are never sampled. When the queue is full,
+INFO and DEBUG records are dropped and counted instead of blocking a request;
+warnings and errors wait briefly for space.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, List, Optional
+from chatbot.config import Config
+from chatbot.tracing import current_span
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Longest a warning or error waits for space in a full queue, in seconds
+_PRIORITY_PUT_TIMEOUT = 1.0
+
+# Record attributes copied into JSON log lines when set
+_CONTEXT_FIELDS = ('category', 'worker', 'trace_id', 'session_id')
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record as JSON.
+
+        Args:
+            record: Log record
+
+        Returns:
+            JSON log line
+        """
+        entry: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in _CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _Stats:
+    """Thread-safe logging pipeline counters."""
+
+    def __init__(self):
+        self.queued = 0
+        self.dropped = 0
+        self.sampled_out: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def add_sampled_out(self, category: str):
+        with self._lock:
+            self.sampled_out[category] = self.sampled_out.get(category, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'queued': self.queued, 'dropped': self.dropped, 'sampled_out': dict(self.sampled_out)}
+
+
+_stats = _Stats()
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a configured fraction of each category's INFO and DEBUG records."""
+
+    def __init__(self, rates: Dict[str, float]):
+        """Initialize the filter.
+
+        Args:
+            rates: Fraction of records kept per category; unlisted categories are kept
+        """
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide whether to keep a record."""
+        category = getattr(record, 'category', None)
+        rate = self.rates.get(category) if category else None
+        if rate is None or rate >= 1 or record.levelno > logging.INFO:
+            return True
+
+        # Sample whole requests: every line of a kept trace is kept
+        span = current_span()
+        trace_id = getattr(record, 'trace_id', None) or (span.trace.trace_id if span is not None else None)
+        draw = int(trace_id[:8], 16) / 0x100000000 if trace_id else random.random()
+        if draw < rate:
+            return True
+        _stats.add_sampled_out(category)
+        return False
+
+
+class ContextFilter(logging.Filter):
+    """Adds the cluster worker and the trace and session IDs of the request being handled to its records."""
+
+    def __init__(self, worker: Optional[str] = None):
+        """Initialize the filter.
+
+        Args:
+            worker: CLUSTER_WORKER_ID of this process, if it is a cluster worker
+        """
+        super().__init__()
+        self.worker = worker
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.worker is not None:
+            record.worker = self.worker
+        span = current_span()
+        if span is not None:
+            if getattr(record, 'trace_id', None) is None:
+                record.trace_id = span.trace.trace_id
+            if getattr(record, 'session_id', None) is None:
+                record.session_id = span.trace.session_id
+        return True
+
+
+class AsyncLogHandler(QueueHandler):
+    """Puts records on a bounded queue for the listener thread, dropping them when it is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Resolve the message now, leaving formatting to the listener thread."""
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """Queue a record, dropping it if the queue stays full."""
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=_PRIORITY_PUT_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+            _stats.add('queued')
+        except queue.Full:
+            _stats.add('dropped')
+
+
+class SyncLogHandler(logging.Handler):
+    """Writes records to the output handlers directly, for LOG_QUEUE_SIZE=0."""
+
+    def __init__(self, handlers: List[logging.Handler]):
+        """Initialize the handler.
+
+        Args:
+            handlers: Handlers that format and write records
+        """
+        super().__init__()
+        self.handlers = handlers
+
+    def emit(self, record: logging.LogRecord):
+        """Write a record to every output handler."""
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+# Running pipeline (set up by configure_logging)
+_listener: Optional[QueueListener] = None
+_log_queue: Optional[queue.Queue] = None
+_lock = threading.Lock()
+
+
+def _build_handlers(config: Config, stdout: bool) -> List[logging.Handler]:
+    """Create the stdout and rotating file handlers that write formatted records."""
+    formatter = JsonFormatter() if config.log_format == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stdout)] if stdout else []
+    if config.log_file:
+        handlers.append(RotatingFileHandler(
+            config.log_file,
+            maxBytes=int(config.log_file_max_mb * 1024 * 1024),
+            backupCount=config.log_file_backups,
+            encoding='utf-8'
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def configure_logging(config: Config, stdout: bool = True):
+    """Replace the root logger's handlers with the logging pipeline.
+
+    Records are written by a background thread unless LOG_QUEUE_SIZE is 0, in
+    which case they are written synchronously by the thread that logs them.
+
+    Args:
+        config: Loaded configuration
+        stdout: Whether to write records to stdout as well as LOG_FILE
+    """
+    global _listener, _log_queue
+
+    stop_logging()
+    handlers = _build_handlers(config, stdout)
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.setLevel(getattr(logging, config.log_level.upper(), logging.INFO))
+
+    handler: logging.Handler
+    if config.log_queue_size > 0:
+        with _lock:
+            _log_queue = queue.Queue(maxsize=config.log_queue_size)
+            _listener = QueueListener(_log_queue, *handlers, respect_handler_level=True)
+            _listener.start()
+        handler = AsyncLogHandler(_log_queue)
+    else:
+        handler = SyncLogHandler(handlers)
+
+    handler.addFilter(SamplingFilter(config.log_sample_rates))
+    handler.addFilter(ContextFilter(config.cluster_worker_id or None))
+    root.addHandler(handler)
+
+
+def stop_logging():
+    """Write every queued record and stop the listener thread."""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    """Get logging pipeline counters for monitoring.
+
+    Returns:
+        Dictionary of queued, dropped and sampled-out record counts and queue depth
+    """
+    stats = _stats.snapshot()
+    stats['mode'] = 'async' if _listener is not None else 'sync'
+    stats['queue_depth'] = _log_queue.qsize() if _listener is not None else 0
+    return stats
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,367 @@
+"""Metrics module for the Shopping Assistant Chatbot.
+
+This module provides thread-safe counters, gauges and latency histograms and
+renders them in the Prometheus text exposition format for the /metrics
+endpoint. Histograms cover each stage of a turn (session lookup, agent
+creation, model calls, tools, backend requests and session writes), so a
+slow turn can be attributed to the stage that caused it.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from strands.hooks import (
+    AfterInvocationEvent,
+    AfterModelCallEvent,
+    AfterToolCallEvent,
+    BeforeInvocationEvent,
+    BeforeModelCallEvent,
+    BeforeToolCallEvent,
+    HookProvider,
+    HookRegistry
+)
+
+# Latency buckets in seconds, from fast cache hits up to slow model responses
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Render a label set such as {tool="get_cart",status="success"}."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value."""
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base class for labelled metrics."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        """Order label values by labelnames."""
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        """Render HELP, TYPE and sample lines."""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        """Render sample lines; implemented by each metric type."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Initialize the counter at zero."""
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        """Increase the counter.
+
+        Args:
+            amount: Non-negative amount to add
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or is read from a callback at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], Any]] = None):
+        """Initialize the gauge.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+            callback: Function returning the current value, or a dict of label tuples to values
+        """
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels: Any):
+        """Set the gauge to a value."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        """Increase the gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any):
+        """Decrease the gauge."""
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_in_progress(self, **labels: Any) -> Iterator[None]:
+        """Increase the gauge for the duration of a block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        if self.callback is not None:
+            try:
+                current = self.callback()
+            except Exception:
+                return []
+            values = current if isinstance(current, dict) else {(): current}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initialize the histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+            buckets: Upper bounds of the buckets, in increasing order
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels: Any):
+        """Record an observation.
+
+        Args:
+            value: Observed value (seconds for latency histograms)
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+                    break
+            series['sum'] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block and observe its duration in seconds.
+
+        Yields:
+            The labels dict, which the block may update (e.g. to set an outcome)
+        """
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = {key: {'counts': list(data['counts']), 'sum': data['sum']} for key, data in self._series.items()}
+
+        lines = []
+        for key, data in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, data['counts']):
+                cumulative += count
+                le = _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(data['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric, replacing any existing metric with the same name.
+
+        Args:
+            metric: Metric to add
+
+        Returns:
+            The registered metric
+        """
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Stage latency histograms
+TURN_SECONDS = REGISTRY.register(Histogram(
+    'chatbot_turn_seconds', 'Wall-clock time of an agent turn.', ['outcome']))
+SESSION_LOOKUP_SECONDS = REGISTRY.register(Histogram(
+    'chatbot_session_lookup_seconds', 'Time to get or create a session.', ['result']))
+AGENT_CREATE_SECONDS = REGISTRY.register(Histogram(
+    'chatbot_agent_create_seconds', 'Time to create an agent, including restoring its session.'))
+AGENT_POOL_CLAIM_SECONDS = REGISTRY.register(Histogram(
+    'chatbot_agent_pool_claim_seconds', 'Time for a session to get a ready agent from the pool.', ['result'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+MODEL_CALL_SECONDS = REGISTRY.register(Histogram(
+    'chatbot_model_call_seconds', 'Time of each model inference call.', ['outcome']))
+TOOL_CALL_SECONDS = REGISTRY.register(Histogram(
+    'chatbot_tool_call_seconds', 'Time of each tool call.', ['tool', 'status']))
+BACKEND_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'chatbot_backend_request_seconds', 'Time of backend API requests, including retries.',
+    ['method', 'endpoint', 'outcome']))
+SESSION_WRITE_SECONDS = REGISTRY.register(Histogram(
+    'chatbot_session_write_seconds', 'Time to persist session data.', ['kind']))
+
+# Token counts and concurrency
+MODEL_TOKENS = REGISTRY.register(Counter(
+    'chatbot_model_tokens_total', 'Model tokens used by agent turns.', ['direction']))
+TURNS_IN_PROGRESS = REGISTRY.register(Gauge(
+    'chatbot_turns_in_progress', 'Agent turns currently running.'))
+TOOL_CALLS_IN_PROGRESS = REGISTRY.register(Gauge(
+    'chatbot_tool_calls_in_progress', 'Tool calls currently running.'))
+
+
+def render_metrics() -> str:
+    """Render every registered metric for the /metrics endpoint.
+
+    Returns:
+        Prometheus text exposition
+    """
+    return REGISTRY.render()
+
+
+class AgentMetricsHooks(HookProvider):
+    """Agent hooks that time model calls and tool calls and count tokens."""
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        """Register the metrics callbacks on an agent.
+
+        Args:
+            registry: The agent's hook registry
+            **kwargs: Additional keyword arguments for future extensibility
+        """
+        registry.add_callback(BeforeInvocationEvent, self._before_invocation)
+        registry.add_callback(AfterInvocationEvent, self._after_invocation)
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+        registry.add_callback(AfterModelCallEvent, self._after_model_call)
+        registry.add_callback(BeforeToolCallEvent, self._before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _before_invocation(self, event: BeforeInvocationEvent):
+        """Snapshot the agent's token usage at the start of a turn."""
+        usage = event.agent.event_loop_metrics.accumulated_usage
+        event.invocation_state['metrics_usage_start'] = (usage['inputTokens'], usage['outputTokens'])
+
+    def _after_invocation(self, event: AfterInvocationEvent):
+        """Count the tokens used by the turn."""
+        start = event.invocation_state.get('metrics_usage_start')
+        if start is None:
+            return
+        usage = event.agent.event_loop_metrics.accumulated_usage
+        MODEL_TOKENS.inc(max(0, usage['inputTokens'] - start[0]), direction='input')
+        MODEL_TOKENS.inc(max(0, usage['outputTokens'] - start[1]), direction='output')
+
+    def _before_model_call(self, event: BeforeModelCallEvent):
+        """Start timing a model call."""
+        event.invocation_state['metrics_model_call_start'] = time.perf_counter()
+
+    def _after_model_call(self, event: AfterModelCallEvent):
+        """Observe a model call's duration."""
+        start = event.invocation_state.pop('metrics_model_call_start', None)
+        if start is not None:
+            outcome = 'error' if event.exception else 'success'
+            MODEL_CALL_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
+
+    def _before_tool_call(self, event: BeforeToolCallEvent):
+        """Start timing a tool call."""
+        TOOL_CALLS_IN_PROGRESS.inc()
+        starts = event.invocation_state.setdefault('metrics_tool_call_starts', {})
+        starts[event.tool_use['toolUseId']] = time.perf_counter()
+
+    def _after_tool_call(self, event: AfterToolCallEvent):
+        """Observe a tool call's duration."""
+        starts = event.invocation_state.get('metrics_tool_call_starts', {})
+        start = starts.pop(event.tool_use['toolUseId'], None)
+        if start is None:
+            return
+        TOOL_CALLS_IN_PROGRESS.dec()
+        status = 'error' if event.exception else event.result.get('status', 'success')
+        TOOL_CALL_SECONDS.observe(time.perf_counter() - start, tool=event.tool_use['name'], status=status)
@@ -0,0 +1,59 @@
+"""Import file-based chat sessions into the SQLite session database.
+
+Reads the session_<id> directories written by the file session backend and
+copies each session, its agent state and its messages into the database used
+when SESSION_BACKEND=sqlite. Sessions already in the database are skipped
+unless --overwrite is given. The source directories are left untouched.
+
+Usage:
+    python -m chatbot.migrate_sessions
+    python -m chatbot.migrate_sessions --source ./sessions --db ./sessions/sessions.db --overwrite
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from chatbot.session_db import SQLiteSessionRepository, migrate_file_sessions
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line options, defaulting to the configured session locations."""
+    storage_dir = os.getenv('SESSION_STORAGE_DIR', './sessions')
+    parser = argparse.ArgumentParser(prog='python -m chatbot.migrate_sessions', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--source', default=storage_dir,
+                        help=f"Directory of file-backend sessions (default: {storage_dir})")
+    parser.add_argument('--db', default=os.getenv('SESSION_DB_PATH') or os.path.join(storage_dir, 'sessions.db'),
+                        help='SQLite database to import into (default: SESSION_DB_PATH or <source>/sessions.db)')
+    parser.add_argument('--overwrite', action='store_true', help='Replace sessions already in the database')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the migration and print a summary."""
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if not os.path.isdir(args.source):
+        print(f"Source directory not found: {args.source}", file=sys.stderr)
+        return 2
+
+    repository = SQLiteSessionRepository(args.db, flush_interval=0)
+    start = time.perf_counter()
+    try:
+        counts = migrate_file_sessions(args.source, repository, overwrite=args.overwrite)
+    finally:
+        repository.close()
+
+    print(
+        f"Migrated {counts['sessions']} session(s) and {counts['messages']} message(s) into {args.db} "
+        f"in {time.perf_counter() - start:.2f}s; skipped {counts['skipped']}, failed {counts['failed']}"
+    )
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
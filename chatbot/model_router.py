@@ -0,0 +1,269 @@
+"""Model tiering for the Shopping Assistant Chatbot.
+
+Most turns are chit-chat or single-tool lookups that a small model handles
+well, while recommendation and comparison turns benefit from Nova Pro. This
+module classifies each turn from cheap local features (length, detected
+intent, reasoning keywords, number of questions) and picks the fast or the
+strong model for it.
+
+A fast-tier turn is escalated to the strong model for its remaining model
+calls when the fast model fails, when it needs more than
+MODEL_TIER_FAST_MAX_CALLS model calls, or when it calls a tool whose output
+needs weighing up (recommendations, product comparisons). Per-tier latency
+and escalations are exported as metrics.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from strands.hooks import AfterModelCallEvent, AfterToolCallEvent, BeforeModelCallEvent, HookProvider, HookRegistry
+from strands.models import Model
+from chatbot.bedrock import get_bedrock_model
+from chatbot.config import get_config
+from chatbot.intent_router import detect_intent
+from chatbot.metrics import REGISTRY, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+FAST = 'fast'
+STRONG = 'strong'
+
+MODEL_TIER_CALL_SECONDS = REGISTRY.register(Histogram(
+    'chatbot_model_tier_call_seconds', 'Time of each model call by model tier.', ['tier', 'outcome']))
+MODEL_TIER_TURN_SECONDS = REGISTRY.register(Histogram(
+    'chatbot_model_tier_turn_seconds', 'Wall-clock time of agent turns by the tier they finished on.', ['tier']))
+MODEL_ESCALATIONS = REGISTRY.register(Counter(
+    'chatbot_model_escalations_total', 'Fast-tier turns moved to the strong model.', ['reason']))
+
+# Tools whose results the strong model should reason about
+_STRONG_TOOLS = frozenset({'recommend_products', 'get_products_details'})
+
+# Wording that asks for judgement rather than a lookup
+_COMPLEX_WORDS = re.compile(
+    r"\b(?:recommend\w*|suggest\w*|compar\w*|differen\w*|versus|vs|better|best|worth|which one|should i|"
+    r"gift|alternative\w*|similar|instead|why|explain|budget|under \$?\d+|cheaper|pros|cons)\b"
+)
+_CHIT_CHAT = re.compile(r"^(?:hi|hey|hello|thanks|thank you|ok|okay|great|cool|bye|goodbye|yes|no)\b")
+
+# Number of recent turn durations kept per tier for percentile estimates
+_SAMPLE_SIZE = 256
+
+
+def classify_turn(message: str, fast_max_words: int) -> Dict[str, Any]:
+    """Choose the model tier for a turn from local features of the message.
+
+    Args:
+        message: The user's message
+        fast_max_words: Longest message, in words, sent to the fast tier
+
+    Returns:
+        Dictionary with the chosen 'tier', the 'reason' for it and the features used
+    """
+    text = message.lower()
+    words = len(text.split())
+    intent = detect_intent(message)
+    features = {
+        'words': words,
+        'questions': text.count('?'),
+        'intent': intent.intent if intent is not None else None,
+        'complex_words': bool(_COMPLEX_WORDS.search(text)),
+    }
+
+    if features['complex_words']:
+        tier, reason = STRONG, 'complex'
+    elif words > fast_max_words:
+        tier, reason = STRONG, 'long'
+    elif features['questions'] > 1:
+        tier, reason = STRONG, 'multi_question'
+    elif intent is not None:
+        tier, reason = FAST, 'intent'
+    elif _CHIT_CHAT.match(text):
+        tier, reason = FAST, 'chit_chat'
+    else:
+        tier, reason = FAST, 'short'
+    return dict(features, tier=tier, reason=reason)
+
+
+class ModelRouter:
+    """Picks a model per turn and escalates fast-tier turns that turn out to be hard."""
+
+    def __init__(self, fast_model_id: str, fast_temperature: float, fast_max_words: int, fast_max_calls: int):
+        """Initialize the router.
+
+        Args:
+            fast_model_id: Bedrock model ID of the fast tier
+            fast_temperature: Sampling temperature of the fast tier
+            fast_max_words: Longest message, in words, sent to the fast tier
+            fast_max_calls: Model calls a fast-tier turn may make before it is escalated
+        """
+        self.fast_model_id = fast_model_id
+        self.fast_temperature = fast_temperature
+        self.fast_max_words = fast_max_words
+        self.fast_max_calls = fast_max_calls
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {'turns': {FAST: 0, STRONG: 0}, 'reasons': {}, 'escalations': {}}
+        self._samples: Dict[str, "deque[float]"] = {
+            FAST: deque(maxlen=_SAMPLE_SIZE), STRONG: deque(maxlen=_SAMPLE_SIZE)
+        }
+
+    def model_for(self, tier: str) -> Model:
+        """Get the shared model serving a tier."""
+        if tier == FAST:
+            return get_bedrock_model(self.fast_model_id, self.fast_temperature)
+        return get_bedrock_model()
+
+    def start_turn(self, message: str) -> Dict[str, Any]:
+        """Classify a turn and create the routing state its hooks update.
+
+        Args:
+            message: The user's message
+
+        Returns:
+            Routing state to pass to the agent as invocation_state['model_tier']
+        """
+        decision = classify_turn(message, self.fast_max_words)
+        with self._lock:
+            self._stats['turns'][decision['tier']] += 1
+            reasons = self._stats['reasons']
+            reasons[decision['reason']] = reasons.get(decision['reason'], 0) + 1
+        logger.debug(f"Routing turn to {decision['tier']} model ({decision['reason']})")
+        return {'tier': decision['tier'], 'reason': decision['reason'], 'model_calls': 0, 'escalated': None}
+
+    def escalate(self, state: Dict[str, Any], agent: Any, reason: str) -> bool:
+        """Move a fast-tier turn to the strong model for its remaining model calls.
+
+        Args:
+            state: The turn's routing state
+            agent: Agent running the turn
+            reason: Why the turn is escalated
+
+        Returns:
+            True if the turn was escalated, False if it already uses the strong model
+        """
+        if state['tier'] != FAST:
+            return False
+        state['tier'] = STRONG
+        state['escalated'] = reason
+        agent.model = self.model_for(STRONG)
+        MODEL_ESCALATIONS.inc(reason=reason)
+        with self._lock:
+            escalations = self._stats['escalations']
+            escalations[reason] = escalations.get(reason, 0) + 1
+        logger.info(f"Escalating turn to the strong model ({reason})", extra={'category': 'turn'})
+        return True
+
+    def finish_turn(self, state: Dict[str, Any], elapsed_ms: float):
+        """Record a turn's duration under the tier it finished on.
+
+        Args:
+            state: The turn's routing state
+            elapsed_ms: Wall-clock duration of the turn
+        """
+        MODEL_TIER_TURN_SECONDS.observe(elapsed_ms / 1000, tier=state['tier'])
+        with self._lock:
+            self._samples[state['tier']].append(elapsed_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing counters and per-tier turn latency for monitoring.
+
+        Returns:
+            Dictionary of turns per tier, routing reasons, escalations and latency in milliseconds
+        """
+        with self._lock:
+            stats: Dict[str, Any] = {
+                'turns': dict(self._stats['turns']),
+                'reasons': dict(self._stats['reasons']),
+                'escalations': dict(self._stats['escalations'])
+            }
+            samples = {tier: sorted(values) for tier, values in self._samples.items()}
+        stats['fast_model_id'] = self.fast_model_id
+        for tier, values in samples.items():
+            stats[f'{tier}_p50_ms'] = round(values[len(values) // 2], 2) if values else 0.0
+        return stats
+
+
+class ModelTierHooks(HookProvider):
+    """Agent hooks that time model calls per tier and escalate struggling fast-tier turns."""
+
+    def __init__(self, router: ModelRouter):
+        """Initialize the hooks.
+
+        Args:
+            router: Process-wide model router
+        """
+        self.router = router
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        """Register model and tool call callbacks."""
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+        registry.add_callback(AfterModelCallEvent, self._after_model_call)
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _before_model_call(self, event: BeforeModelCallEvent):
+        state = event.invocation_state.get('model_tier')
+        if state is None:
+            return
+        state['model_calls'] += 1
+        if state['model_calls'] > self.router.fast_max_calls:
+            self.router.escalate(state, event.agent, 'max_calls')
+        event.invocation_state['model_tier_call_start'] = (state['tier'], time.perf_counter())
+
+    def _after_model_call(self, event: AfterModelCallEvent):
+        state = event.invocation_state.get('model_tier')
+        started = event.invocation_state.pop('model_tier_call_start', None)
+        if state is None or started is None:
+            return
+        tier, start = started
+        MODEL_TIER_CALL_SECONDS.observe(time.perf_counter() - start, tier=tier,
+                                        outcome='error' if event.exception else 'success')
+        # Retry a failed fast-tier call on the strong model
+        if event.exception is not None and not event.retry and self.router.escalate(state, event.agent, 'error'):
+            event.retry = True
+
+    def _after_tool_call(self, event: AfterToolCallEvent):
+        state = event.invocation_state.get('model_tier')
+        if state is not None and event.tool_use['name'] in _STRONG_TOOLS:
+            self.router.escalate(state, event.agent, 'tool')
+
+
+# Process-wide router (created lazily from configuration)
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> Optional[ModelRouter]:
+    """Get the process-wide model router, creating it on first use.
+
+    Returns:
+        The model router, or None when BEDROCK_FAST_MODEL_ID is empty
+    """
+    global _router
+
+    config = get_config()
+    if not config.bedrock_fast_model_id:
+        return None
+
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter(
+                    fast_model_id=config.bedrock_fast_model_id,
+                    fast_temperature=config.bedrock_fast_temperature,
+                    fast_max_words=config.model_tier_fast_max_words,
+                    fast_max_calls=config.model_tier_fast_max_calls
+                )
+    return _router
+
+
+def get_model_tier_stats() -> Dict[str, Any]:
+    """Get model tiering statistics.
+
+    Returns:
+        Dictionary of turns per tier, escalations and latency, or {'enabled': False}
+    """
+    router = get_model_router()
+    return dict(router.get_stats(), enabled=True) if router is not None else {'enabled': False}
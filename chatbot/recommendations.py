@@ -0,0 +1,340 @@
+"""Recommendation engine module for the Shopping Assistant Chatbot.
+
+This module precomputes an item-item similarity matrix and rating aggregates
+with NumPy, so product recommendations are answered from memory instead of the
+model reading the whole catalog and every review. Similarity blends three
+signals: products rated alike by the same reviewers, products that appear in
+the cart together, and products with similar names and descriptions. The
+matrix is built from the backend's catalog, reviews and cart in a background
+thread started with the server, and rebuilt there periodically; requests never
+wait for a build.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from chatbot.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Weights of the similarity signals in the blended matrix
+REVIEWER_WEIGHT = 0.4
+BASKET_WEIGHT = 0.4
+CONTENT_WEIGHT = 0.2
+
+# Weight of a product's rating relative to its similarity when ranking
+RATING_WEIGHT = 0.15
+
+# Pseudo-reviews pulling thinly reviewed products toward the catalog average
+RATING_PRIOR_COUNT = 3
+
+# Longest wait before retrying a build that failed, in seconds
+BUILD_RETRY_SECONDS = 30.0
+
+
+# A loader returns (products, reviews by product ID, product IDs in the backend cart); errors are raised
+Loader = Callable[[], Tuple[List[Dict[str, Any]], Dict[int, List[Dict[str, Any]]], List[int]]]
+
+
+class RecommendationsNotReadyError(Exception):
+    """Raised when recommendations are requested before the model has been built."""
+    pass
+
+
+def _cosine(matrix: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity of a matrix, with the diagonal cleared."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    normalized = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+    similarity = normalized @ normalized.T
+    np.fill_diagonal(similarity, 0.0)
+    return similarity
+
+
+def build_model(products: List[Dict[str, Any]], reviews: Dict[int, List[Dict[str, Any]]],
+                baskets: Iterable[Tuple[int, ...]]) -> Dict[str, Any]:
+    """Precompute similarity matrices and rating aggregates.
+
+    Args:
+        products: Product catalog
+        reviews: Reviews keyed by product ID
+        baskets: Observed sets of product IDs that were in the cart together
+
+    Returns:
+        Model dictionary consumed by RecommendationEngine
+    """
+    ids = [product['id'] for product in products if product.get('id') is not None]
+    index = {product_id: row for row, product_id in enumerate(ids)}
+    count = len(ids)
+
+    # Reviewer signal: adjusted cosine over an author x product rating matrix
+    authors: Dict[str, int] = {}
+    ratings = np.zeros((count, 0))
+    entries = [
+        (index[product_id], authors.setdefault(review.get('author') or 'Anonymous', len(authors)),
+         float(review.get('rating', 0)))
+        for product_id, product_reviews in reviews.items() if product_id in index
+        for review in product_reviews
+    ]
+    if entries:
+        rows, columns, values = (np.array(part) for part in zip(*entries))
+        ratings = np.zeros((count, len(authors)))
+        ratings[rows, columns.astype(int)] = values
+        rated = ratings > 0
+        author_means = ratings.sum(axis=0) / np.maximum(rated.sum(axis=0), 1)
+        centered = np.where(rated, ratings - author_means, 0.0)
+        reviewer_similarity = _cosine(centered)
+    else:
+        rated = np.zeros((count, 0), dtype=bool)
+        reviewer_similarity = np.zeros((count, count))
+
+    # Basket signal: cosine over a basket x product occurrence matrix
+    basket_rows = [[index[product_id] for product_id in basket if product_id in index] for basket in baskets]
+    basket_rows = [row for row in basket_rows if len(row) > 1]
+    occurrences = np.zeros((len(basket_rows), count))
+    for row, columns in enumerate(basket_rows):
+        occurrences[row, columns] = 1.0
+    basket_similarity = _cosine(occurrences.T) if basket_rows else np.zeros((count, count))
+
+    # Content signal: TF-IDF cosine over names and descriptions
+    vocabulary: Dict[str, int] = {}
+    term_rows = [
+        [vocabulary.setdefault(term, len(vocabulary))
+         for term in tokenize(f"{product.get('name') or ''} {product.get('description') or ''}")]
+        for product in products if product.get('id') is not None
+    ]
+    term_counts = np.zeros((count, len(vocabulary)))
+    for row, columns in enumerate(term_rows):
+        np.add.at(term_counts[row], columns, 1.0)
+    document_frequency = (term_counts > 0).sum(axis=0)
+    idf = np.log((1 + count) / (1 + document_frequency)) + 1.0
+    content_similarity = _cosine(term_counts * idf)
+
+    # Rating aggregates, shrunk toward the catalog mean for thinly reviewed products
+    rating_counts = rated.sum(axis=1).astype(float)
+    rating_sums = ratings.sum(axis=1)
+    overall_mean = rating_sums.sum() / rating_counts.sum() if rating_counts.sum() else 0.0
+    rating_means = np.divide(rating_sums, rating_counts, out=np.zeros(count), where=rating_counts > 0)
+    weighted_ratings = (rating_sums + RATING_PRIOR_COUNT * overall_mean) / (rating_counts + RATING_PRIOR_COUNT)
+
+    return {
+        'ids': np.array(ids),
+        'index': index,
+        'products': {product['id']: product for product in products if product.get('id') is not None},
+        'reviewer': reviewer_similarity,
+        'basket': basket_similarity,
+        'content': content_similarity,
+        'similarity': (
+            REVIEWER_WEIGHT * reviewer_similarity
+            + BASKET_WEIGHT * basket_similarity
+            + CONTENT_WEIGHT * content_similarity
+        ),
+        'rating_means': rating_means,
+        'rating_counts': rating_counts,
+        # Scaled to 0..1 so ratings and similarities combine on the same scale
+        'rating_scores': weighted_ratings / 5.0,
+        'basket_count': len(basket_rows)
+    }
+
+
+class RecommendationEngine:
+    """Serves recommendations from a periodically rebuilt similarity model."""
+
+    def __init__(self, loader: Loader, refresh_interval: float, max_baskets: int):
+        """Initialize the engine.
+
+        Args:
+            loader: Function that fetches the catalog, its reviews and the backend cart
+            refresh_interval: Seconds between rebuilds of the model in the background
+            max_baskets: Number of most recent cart snapshots used for co-occurrence
+        """
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+
+        self._model: Optional[Dict[str, Any]] = None
+        self._built_at = 0.0
+        self._build_ms = 0.0
+        self._baskets: deque = deque(maxlen=max_baskets)
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._scheduler: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        self._stats = {'builds': 0, 'build_errors': 0, 'requests': 0, 'not_ready': 0}
+
+    def start(self):
+        """Build the model in a background thread now and every refresh interval after that.
+
+        Calling start() again while the thread is running does nothing.
+        """
+        with self._lock:
+            if self._scheduler is not None:
+                return
+            self._stopped.clear()
+            scheduler = self._scheduler = threading.Thread(target=self._run, name='recommendation-refresh', daemon=True)
+        scheduler.start()
+
+    def stop(self):
+        """Stop rebuilding the model. A build in progress finishes first."""
+        with self._lock:
+            scheduler, self._scheduler = self._scheduler, None
+        self._stopped.set()
+        if scheduler is not None:
+            scheduler.join()
+
+    @property
+    def ready(self) -> bool:
+        """Whether a model has been built."""
+        return self._model is not None
+
+    def record_basket(self, product_ids: Iterable[int]):
+        """Record the products seen in the cart together.
+
+        Consecutive identical snapshots are recorded once, so viewing the cart
+        repeatedly does not inflate co-occurrence.
+
+        Args:
+            product_ids: IDs of the products currently in the cart
+        """
+        basket = tuple(sorted(set(product_ids)))
+        if len(basket) < 2:
+            return
+
+        with self._lock:
+            if not self._baskets or self._baskets[-1] != basket:
+                self._baskets.append(basket)
+
+    def recommend(self, seed_ids: Iterable[int], limit: int = 3) -> List[Dict[str, Any]]:
+        """Recommend products related to the given products.
+
+        With no known seeds, the best rated products are returned.
+
+        Args:
+            seed_ids: IDs of products to base recommendations on (viewed product or cart contents)
+            limit: Maximum number of recommendations
+
+        Returns:
+            List of dictionaries with 'product', 'score' and 'reason', best first
+
+        Raises:
+            RecommendationsNotReadyError: If the first build has not finished yet
+        """
+        with self._lock:
+            model = self._model
+            if model is None:
+                self._stats['not_ready'] += 1
+            else:
+                self._stats['requests'] += 1
+        if model is None:
+            # Make sure a build is on its way rather than building in the caller's request
+            self.start()
+            raise RecommendationsNotReadyError("The recommendation model has not been built yet")
+
+        seeds = [model['index'][product_id] for product_id in set(seed_ids) if product_id in model['index']]
+        if seeds:
+            scores = model['similarity'][seeds].sum(axis=0) / len(seeds) + RATING_WEIGHT * model['rating_scores']
+            scores[seeds] = -np.inf
+        else:
+            scores = model['rating_scores'].copy()
+
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {
+                'product': model['products'][int(model['ids'][row])],
+                'score': round(float(scores[row]), 4),
+                'reason': self._reason(model, seeds, row)
+            }
+            for row in top
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get engine counters for monitoring.
+
+        Returns:
+            Dictionary of build and request counters and model size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['baskets'] = len(self._baskets)
+            model = self._model
+            stats['products'] = len(model['ids']) if model else 0
+            stats['model_age_seconds'] = round(time.monotonic() - self._built_at, 1) if model else None
+            stats['last_build_ms'] = round(self._build_ms, 2)
+        return stats
+
+    def _run(self):
+        """Build the model until stopped, retrying failed builds sooner than the refresh interval."""
+        initial = True
+        while not self._stopped.is_set():
+            try:
+                self._build(only_if_missing=initial)
+                initial = False
+                delay = self.refresh_interval
+            except Exception as e:
+                logger.error(f"Recommendation model build failed: {str(e)}", exc_info=True)
+                delay = min(self.refresh_interval, BUILD_RETRY_SECONDS)
+            if self._stopped.wait(delay):
+                return
+
+    def _build(self, only_if_missing: bool = False) -> Dict[str, Any]:
+        """Load the catalog, reviews and cart and rebuild the model.
+
+        Args:
+            only_if_missing: Keep the current model if one was built in the meantime
+        """
+        with self._build_lock:
+            if only_if_missing and self._model is not None:
+                return self._model
+
+            start = time.perf_counter()
+            try:
+                products, reviews, cart_product_ids = self.loader()
+                self.record_basket(cart_product_ids)
+                with self._lock:
+                    baskets = list(self._baskets)
+                model = build_model(products, reviews, baskets)
+            except Exception:
+                with self._lock:
+                    self._stats['build_errors'] += 1
+                raise
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._model = model
+                self._built_at = time.monotonic()
+                self._build_ms = elapsed_ms
+                self._stats['builds'] += 1
+
+            logger.info(
+                f"Recommendation model built for {len(model['ids'])} products "
+                f"and {model['basket_count']} baskets in {elapsed_ms:.1f}ms"
+            )
+            return model
+
+    @staticmethod
+    def _reason(model: Dict[str, Any], seeds: List[int], row: int) -> str:
+        """Explain the strongest signal behind a recommendation."""
+        if seeds:
+            signals = {
+                'Often in the cart together': BASKET_WEIGHT * model['basket'][seeds, row].mean(),
+                'Rated highly by the same reviewers': REVIEWER_WEIGHT * model['reviewer'][seeds, row].mean(),
+                'Similar product': CONTENT_WEIGHT * model['content'][seeds, row].mean()
+            }
+            reason, strength = max(signals.items(), key=lambda item: item[1])
+            if strength > 0:
+                return reason
+
+        if model['rating_counts'][row] > 0:
+            return (
+                f"Highly rated ({model['rating_means'][row]:.1f}/5 from "
+                f"{int(model['rating_counts'][row])} reviews)"
+            )
+        return "Popular in our catalog"
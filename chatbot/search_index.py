@@ -0,0 +1,240 @@
+"""Product search index module for the Shopping Assistant Chatbot.
+
+This module provides an in-memory inverted index over product names and
+descriptions. Queries are ranked with BM25, and query words that are not in
+the vocabulary (typos, partial words) are expanded to similar indexed words
+through a character trigram index. The index is updated incrementally: only
+products whose text or price changed are re-indexed.
+"""
+
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Name words count this many times more than description words
+NAME_WEIGHT = 2
+
+# Minimum trigram similarity for expanding an unknown query word
+MIN_TRIGRAM_SIMILARITY = 0.4
+
+# Maximum vocabulary words a single unknown query word expands to
+MAX_EXPANSIONS = 3
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+_STOPWORDS = {
+    'a', 'an', 'and', 'any', 'are', 'do', 'for', 'have', 'i', 'in', 'is', 'it', 'me', 'my',
+    'of', 'on', 'or', 'show', 'some', 'the', 'to', 'with', 'you', 'your'
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms with stopwords removed and simple plurals folded
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def _trigrams(term: str) -> Set[str]:
+    """Character trigrams of a term, padded so short words still match."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ProductSearchIndex:
+    """Thread-safe BM25 inverted index with trigram fuzzy matching."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._trigram_index: Dict[str, Set[str]] = defaultdict(set)
+        self._doc_terms: Dict[int, Counter] = {}
+        self._doc_lengths: Dict[int, int] = {}
+        self._doc_signatures: Dict[int, Tuple] = {}
+        self._products: Dict[int, Dict[str, Any]] = {}
+        self._total_length = 0
+        self._synced_source: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.RLock()
+
+    def sync(self, products: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Bring the index in line with the current product catalog.
+
+        Only added, changed and removed products are (re-)indexed. Calling
+        this repeatedly with the same list object is a no-op.
+
+        Args:
+            products: Current product list from the backend
+
+        Returns:
+            Counts of products added, updated and removed
+        """
+        changes = {'added': 0, 'updated': 0, 'removed': 0}
+
+        with self._lock:
+            if self._synced_source is products:
+                return changes
+
+            seen = set()
+            for product in products:
+                product_id = product.get('id')
+                if product_id is None:
+                    continue
+                seen.add(product_id)
+
+                signature = (product.get('name'), product.get('description'), product.get('price'))
+                previous = self._doc_signatures.get(product_id)
+                if previous == signature:
+                    continue
+
+                if previous is not None:
+                    self._remove(product_id)
+                    changes['updated'] += 1
+                else:
+                    changes['added'] += 1
+                self._add(product_id, product, signature)
+
+            for product_id in list(self._doc_signatures):
+                if product_id not in seen:
+                    self._remove(product_id)
+                    changes['removed'] += 1
+
+            self._synced_source = products
+
+        if any(changes.values()):
+            logger.info(
+                f"Search index synced: {changes['added']} added, {changes['updated']} updated, "
+                f"{changes['removed']} removed ({len(self._products)} products)"
+            )
+        return changes
+
+    def search(self, query: str, max_price: Optional[float] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """Find the products that best match a query.
+
+        Args:
+            query: Free-text search query
+            max_price: Only return products at or below this price
+            limit: Maximum number of results
+
+        Returns:
+            Matching products, best match first
+        """
+        with self._lock:
+            doc_count = len(self._products)
+            if doc_count == 0:
+                return []
+
+            average_length = self._total_length / doc_count
+            scores: Dict[int, float] = defaultdict(float)
+
+            for term, weight in self._expand_query(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for product_id, frequency in postings.items():
+                    length_norm = 1 - BM25_B + BM25_B * self._doc_lengths[product_id] / average_length
+                    scores[product_id] += weight * idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+            results = []
+            for product_id, _ in ranked:
+                product = self._products[product_id]
+                if max_price is not None and product.get('price', 0) > max_price:
+                    continue
+                results.append(product)
+                if len(results) >= limit:
+                    break
+            return results
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._products)
+
+    def _expand_query(self, terms: List[str]) -> List[Tuple[str, float]]:
+        """Map query terms to indexed terms, expanding unknown ones by trigram similarity.
+
+        Must hold the lock.
+        """
+        expanded = []
+        for term in terms:
+            if term in self._postings:
+                expanded.append((term, 1.0))
+                continue
+
+            grams = _trigrams(term)
+            candidates: Counter = Counter()
+            for gram in grams:
+                for candidate in self._trigram_index.get(gram, ()):
+                    candidates[candidate] += 1
+
+            similar = []
+            for candidate, shared in candidates.items():
+                similarity = shared / len(grams | _trigrams(candidate))
+                if similarity >= MIN_TRIGRAM_SIMILARITY:
+                    similar.append((candidate, similarity))
+
+            similar.sort(key=lambda item: item[1], reverse=True)
+            expanded.extend(similar[:MAX_EXPANSIONS])
+        return expanded
+
+    def _add(self, product_id: int, product: Dict[str, Any], signature: Tuple):
+        """Index a product. Must hold the lock."""
+        terms = Counter()
+        for term in tokenize(product.get('name') or ''):
+            terms[term] += NAME_WEIGHT
+        for term in tokenize(product.get('description') or ''):
+            terms[term] += 1
+
+        for term, frequency in terms.items():
+            if term not in self._postings:
+                for gram in _trigrams(term):
+                    self._trigram_index[gram].add(term)
+            self._postings[term][product_id] = frequency
+
+        length = sum(terms.values())
+        self._doc_terms[product_id] = terms
+        self._doc_lengths[product_id] = length
+        self._doc_signatures[product_id] = signature
+        self._products[product_id] = product
+        self._total_length += length
+
+    def _remove(self, product_id: int):
+        """Remove a product from the index. Must hold the lock."""
+        for term in self._doc_terms.pop(product_id, {}):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                for gram in _trigrams(term):
+                    self._trigram_index[gram].discard(term)
+                    if not self._trigram_index[gram]:
+                        del self._trigram_index[gram]
+
+        self._total_length -= self._doc_lengths.pop(product_id, 0)
+        self._doc_signatures.pop(product_id, None)
+        self._products.pop(product_id, None)
@@ -3,14 +3,303 @@
 This module provides a Flask-based REST API for the chatbot service.
 """
 
+import hmac
+import json
 import logging
-from flask import Flask, request, jsonify
+from typing import Any, Dict, Optional, Tuple
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from chatbot.admission import AdmissionError, check_admission, client_ip, get_admission_stats, reject
 from chatbot.config import get_config
-from chatbot.agent import process_message, get_active_sessions
+from chatbot.agent import (
+    SESSION_BUSY_RESPONSE,
+    process_message,
+    stream_message,
+    get_active_sessions,
+    get_agent_pool_stats,
+    get_fast_path_stats,
+    get_session_stats,
+    get_session_storage_stats,
+    get_turn_queue_stats,
+    get_turn_stats,
+    apply_cluster_view,
+    is_agent_pool_warming,
+    warm_agent_pool
+)
+from chatbot.conversation import get_context_stats
+from chatbot.log_pipeline import get_logging_stats
+from chatbot.model_router import get_model_tier_stats
+from chatbot.metrics import CONTENT_TYPE, render_metrics
+from chatbot.tool_executor import get_tool_execution_stats
+from chatbot.tracing import get_recent_traces, get_trace_stats, new_trace_id, start_trace
+from chatbot.turn_queue import TurnQueueFullError
+from chatbot.tools import (
+    get_api_stats,
+    get_cart_mirror_stats,
+    get_catalog_cache_stats,
+    get_recommendation_stats,
+    invalidate_catalog_cache,
+    start_recommendations
+)
 
 logger = logging.getLogger(__name__)
 
+# Frontend origins allowed to call the chatbot API
+CORS_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:3000"]
+
+# Response header carrying the request's trace ID
+TRACE_HEADER = 'X-Trace-Id'
+
+# Request header carrying CLUSTER_SECRET on membership updates from the cluster router
+CLUSTER_SECRET_HEADER = 'X-Cluster-Secret'
+
+# Traces returned by /debug/traces by default and at most
+DEFAULT_TRACE_LIMIT = 10
+MAX_TRACE_LIMIT = 100
+
+
+def validate_chat_payload(data: Any) -> Optional[Tuple[Dict[str, Any], int]]:
+    """Validate the decoded JSON body of a chat request.
+    
+    Args:
+        data: Decoded request body
+    
+    Returns:
+        None if valid, otherwise a tuple of (error body, HTTP status code)
+    """
+    # Validate required fields
+    if not data:
+        logger.warning("Empty request body received")
+        return {
+            'error': 'Request body is required',
+            'error_type': 'validation'
+        }, 400
+    
+    message = data.get('message')
+    session_id = data.get('session_id')
+    
+    if not message:
+        logger.warning("Request missing 'message' field")
+        return {
+            'error': 'Message is required',
+            'error_type': 'validation',
+            'session_id': session_id
+        }, 400
+    
+    if not session_id:
+        logger.warning("Request missing 'session_id' field")
+        return {
+            'error': 'Session ID is required',
+            'error_type': 'validation'
+        }, 400
+    
+    # Validate message length
+    if len(message) > 10000:
+        logger.warning(f"Message too long: {len(message)} characters")
+        return {
+            'error': 'Message is too long (max 10000 characters)',
+            'error_type': 'validation',
+            'session_id': session_id
+        }, 400
+    
+    return None
+
+
+def _parse_chat_request() -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[Response, int]]]:
+    """Parse and validate the JSON body of a chat request.
+    
+    Returns:
+        Tuple of (request data, None) if valid, or (request data, error response) if invalid
+    """
+    # Validate request content type
+    if not request.is_json:
+        logger.warning("Request received with non-JSON content type")
+        return None, (jsonify({
+            'error': 'Content-Type must be application/json',
+            'error_type': 'validation'
+        }), 400)
+    
+    # Get request data
+    data = request.get_json()
+    
+    error = validate_chat_payload(data)
+    if error:
+        body, status = error
+        return data, (jsonify(body), status)
+    
+    return data, None
+
+
+def session_busy_body(session_id: str) -> Dict[str, Any]:
+    """Build the error body for a session with too many pending messages.
+    
+    Args:
+        session_id: Session ID from the rejected request
+    
+    Returns:
+        Error body in the standard error shape
+    """
+    return {
+        'error': SESSION_BUSY_RESPONSE,
+        'error_type': 'session_busy',
+        'session_id': session_id
+    }
+
+
+def session_busy_response(session_id: str) -> Tuple[Response, int]:
+    """Build the 429 response for a session with too many pending messages.
+    
+    Args:
+        session_id: Session ID from the rejected request
+    
+    Returns:
+        Tuple of (JSON response with Retry-After header, 429)
+    """
+    response = jsonify(session_busy_body(session_id))
+    response.headers['Retry-After'] = '2'
+    return response, 429
+
+
+def admission_error_body(error: AdmissionError, session_id: str) -> Dict[str, Any]:
+    """Build the JSON error body for a request rejected by admission control.
+    
+    Args:
+        error: Rejection raised by check_admission
+        session_id: Session ID from the rejected request
+    
+    Returns:
+        Error body in the standard error shape
+    """
+    return {
+        'error': str(error),
+        'error_type': error.error_type,
+        'session_id': session_id
+    }
+
+
+def admission_error_response(error: AdmissionError, session_id: str) -> Tuple[Response, int]:
+    """Build the 429 or 503 response for a request rejected by admission control.
+    
+    Args:
+        error: Rejection raised by check_admission
+        session_id: Session ID from the rejected request
+    
+    Returns:
+        Tuple of (JSON response with Retry-After header, HTTP status code)
+    """
+    response = jsonify(admission_error_body(error, session_id))
+    response.headers['Retry-After'] = error.retry_after_header
+    return response, error.status
+
+
+def parse_trace_limit(value: Optional[str]) -> int:
+    """Parse the limit query parameter of /debug/traces.
+    
+    Args:
+        value: Raw query parameter value, if given
+    
+    Returns:
+        Number of traces to return, clamped to 1..MAX_TRACE_LIMIT
+    """
+    try:
+        limit = int(value) if value else DEFAULT_TRACE_LIMIT
+    except ValueError:
+        limit = DEFAULT_TRACE_LIMIT
+    return max(1, min(limit, MAX_TRACE_LIMIT))
+
+
+def validate_cluster_view(secret: Optional[str], data: Any) -> Optional[Tuple[Dict[str, Any], int]]:
+    """Validate a ring membership update sent by the cluster router.
+    
+    Args:
+        secret: Value of the request's CLUSTER_SECRET_HEADER
+        data: Decoded request body
+    
+    Returns:
+        None if valid, otherwise a tuple of (error body, HTTP status code)
+    """
+    expected = get_config().cluster_secret
+    if not expected or not hmac.compare_digest((secret or '').encode(), expected.encode()):
+        return {'error': 'Forbidden', 'error_type': 'forbidden'}, 403
+    
+    valid = (
+        isinstance(data, dict)
+        and isinstance(data.get('workers'), list)
+        and all(isinstance(worker, str) for worker in data['workers'])
+        and isinstance(data.get('worker'), str)
+        and isinstance(data.get('epoch'), int)
+        and isinstance(data.get('virtual_nodes'), int)
+    )
+    if not valid:
+        return {'error': 'Expected workers, worker, epoch and virtual_nodes', 'error_type': 'validation'}, 400
+    return None
+
+
+def validate_catalog_invalidation(authorization: Optional[str], data: Any) -> Optional[Tuple[Dict[str, Any], int]]:
+    """Validate a request to drop cached catalog data after the catalog changed.
+    
+    Args:
+        authorization: Value of the request's Authorization header
+        data: Decoded request body: empty, or a product_id to drop only that product
+    
+    Returns:
+        None if valid, otherwise a tuple of (error body, HTTP status code)
+    """
+    expected = get_config().catalog_admin_token
+    token = authorization[len('Bearer '):] if authorization and authorization.startswith('Bearer ') else ''
+    if not expected or not hmac.compare_digest(token.encode(), expected.encode()):
+        return {'error': 'Forbidden', 'error_type': 'forbidden'}, 403
+    
+    product_id = data.get('product_id') if isinstance(data, dict) else None
+    if (data is not None and not isinstance(data, dict)) or (
+            product_id is not None and (not isinstance(product_id, int) or isinstance(product_id, bool))):
+        return {'error': 'Expected an optional integer product_id', 'error_type': 'validation'}, 400
+    return None
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Format a stream event as a Server-Sent Events message.
+    
+    Args:
+        event: Stream event dictionary with a 'type' key
+    
+    Returns:
+        SSE-formatted message string
+    """
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def get_health_status() -> Dict[str, Any]:
+    """Build the health check payload shared by all server modes.
+    
+    Status is 'warming' until the agent pool has been filled at startup.
+
+    Returns:
+        Dictionary describing service health and runtime statistics
+    """
+    return {
+        'status': 'warming' if is_agent_pool_warming() else 'healthy',
+        'service': 'shopping-assistant-chatbot',
+        'worker': get_config().cluster_worker_id or None,
+        'active_sessions': get_active_sessions(),
+        'agent_pool': get_agent_pool_stats(),
+        'fast_path': get_fast_path_stats(),
+        'model_tiers': get_model_tier_stats(),
+        'admission': get_admission_stats(),
+        'session_store': get_session_stats(),
+        'session_storage': get_session_storage_stats(),
+        'turn_queue': get_turn_queue_stats(),
+        'turns': get_turn_stats(),
+        'tool_execution': get_tool_execution_stats(),
+        'context': get_context_stats(),
+        'backend_api': get_api_stats(),
+        'catalog_cache': get_catalog_cache_stats(),
+        'cart_mirror': get_cart_mirror_stats(),
+        'recommendations': get_recommendation_stats(),
+        'tracing': get_trace_stats(),
+        'logging': get_logging_stats()
+    }
+
 
 def create_app() -> Flask:
     """Create and configure the Flask application.
@@ -23,7 +312,7 @@ def create_app() -> Flask:
     # Configure CORS to allow requests from frontend
     CORS(app, resources={
         r"/*": {
-            "origins": ["http://localhost:3000", "http://127.0.0.1:3000"],
+            "origins": CORS_ORIGINS,
             "methods": ["GET", "POST", "OPTIONS"],
             "allow_headers": ["Content-Type"]
         }
@@ -34,13 +323,70 @@ def create_app() -> Flask:
         """Health check endpoint.
         
         Returns:
-            JSON response indicating service health
+            JSON response indicating service health (503 while warming up)
         """
-        return jsonify({
-            'status': 'healthy',
-            'service': 'shopping-assistant-chatbot',
-            'active_sessions': get_active_sessions()
-        }), 200
+        status = get_health_status()
+        return jsonify(status), 200 if status['status'] == 'healthy' else 503
+    
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus metrics endpoint.
+        
+        Returns:
+            Latency histograms, token counters and gauges in Prometheus text format
+        """
+        return Response(render_metrics(), content_type=CONTENT_TYPE), 200
+    
+    @app.route('/debug/traces', methods=['GET'])
+    def debug_traces():
+        """Slowest recent request traces, optionally for one session.
+        
+        Query parameters:
+            session_id: Only include traces for this session
+            limit: Maximum number of traces (default 10, max 100)
+        
+        Returns:
+            JSON response with traces, their critical paths and span trees
+        """
+        traces = get_recent_traces(
+            session_id=request.args.get('session_id') or None,
+            limit=parse_trace_limit(request.args.get('limit'))
+        )
+        return jsonify({'traces': traces}), 200
+    
+    # Only cluster workers, which are started with CLUSTER_SECRET, take membership updates
+    if get_config().cluster_secret:
+        @app.route('/cluster/rebalance', methods=['POST'])
+        def cluster_rebalance():
+            """Apply new worker membership from the cluster router, handing off sessions.
+            
+            Returns:
+                JSON response with the applied epoch and sessions handed off
+            """
+            data = request.get_json(silent=True)
+            error = validate_cluster_view(request.headers.get(CLUSTER_SECRET_HEADER), data)
+            if error:
+                body, status = error
+                return jsonify(body), status
+            result = apply_cluster_view(data['workers'], data['worker'], data['epoch'], data['virtual_nodes'])
+            return jsonify(result), 200
+    
+    if get_config().catalog_admin_token:
+        @app.route('/admin/catalog/invalidate', methods=['POST'])
+        def catalog_invalidate():
+            """Drop cached catalog data after the catalog changed in the backend.
+            
+            Returns:
+                JSON response naming the product dropped, or null when the whole cache was cleared
+            """
+            data = request.get_json(silent=True)
+            error = validate_catalog_invalidation(request.headers.get('Authorization'), data)
+            if error:
+                body, status = error
+                return jsonify(body), status
+            product_id = (data or {}).get('product_id')
+            invalidate_catalog_cache(product_id)
+            return jsonify({'invalidated': product_id}), 200
     
     @app.route('/chat', methods=['POST'])
     def chat():
@@ -55,64 +401,40 @@ def create_app() -> Flask:
         Returns:
             JSON response with chatbot reply or error
         """
+        data = None
         try:
-            # Validate request content type
-            if not request.is_json:
-                logger.warning("Request received with non-JSON content type")
-                return jsonify({
-                    'error': 'Content-Type must be application/json',
-                    'error_type': 'validation'
-                }), 400
-            
-            # Get request data
-            data = request.get_json()
+            data, error_response = _parse_chat_request()
+            if error_response:
+                return error_response
             
-            # Validate required fields
-            if not data:
-                logger.warning("Empty request body received")
-                return jsonify({
-                    'error': 'Request body is required',
-                    'error_type': 'validation'
-                }), 400
+            message = data['message']
+            session_id = data['session_id']
             
-            message = data.get('message')
-            session_id = data.get('session_id')
-            
-            if not message:
-                logger.warning("Request missing 'message' field")
-                return jsonify({
-                    'error': 'Message is required',
-                    'error_type': 'validation',
-                    'session_id': session_id
-                }), 400
-            
-            if not session_id:
-                logger.warning("Request missing 'session_id' field")
-                return jsonify({
-                    'error': 'Session ID is required',
-                    'error_type': 'validation'
-                }), 400
-            
-            # Validate message length
-            if len(message) > 10000:
-                logger.warning(f"Message too long: {len(message)} characters")
-                return jsonify({
-                    'error': 'Message is too long (max 10000 characters)',
-                    'error_type': 'validation',
-                    'session_id': session_id
-                }), 400
+            # Reject early if the session, client or model capacity is over its limit
+            check_admission(session_id, client_ip(request.remote_addr, request.headers.get('X-Forwarded-For')))
             
             # Log request
-            logger.info(f"Chat request - Session: {session_id}, Message length: {len(message)}")
+            trace_id = new_trace_id()
+            logger.info(f"Chat request - Session: {session_id}, Message length: {len(message)}",
+                        extra={'category': 'request', 'trace_id': trace_id})
             
             # Process message with agent
-            response = process_message(message, session_id)
+            with start_trace('POST /chat', session_id=session_id, trace_id=trace_id):
+                response = process_message(message, session_id)
             
             # Return response
             return jsonify({
                 'response': response,
                 'session_id': session_id
-            }), 200
+            }), 200, {TRACE_HEADER: trace_id}
+        
+        except AdmissionError as e:
+            return admission_error_response(e, session_id)
+        
+        except TurnQueueFullError as e:
+            logger.warning(str(e))
+            reject('session_busy')
+            return session_busy_response(session_id)
         
         except Exception as e:
             # Log error
@@ -126,6 +448,48 @@ def create_app() -> Flask:
                 'session_id': session_id
             }), 500
     
+    @app.route('/chat/stream', methods=['POST'])
+    def chat_stream():
+        """Streaming chat endpoint using Server-Sent Events.
+        
+        Accepts the same JSON body as /chat and streams token, tool_call,
+        tool_result, done and error events as the agent produces them.
+        
+        Returns:
+            text/event-stream response, or JSON error for invalid requests
+        """
+        data, error_response = _parse_chat_request()
+        if error_response:
+            return error_response
+        
+        message = data['message']
+        session_id = data['session_id']
+        
+        try:
+            check_admission(session_id, client_ip(request.remote_addr, request.headers.get('X-Forwarded-For')))
+        except AdmissionError as e:
+            return admission_error_response(e, session_id)
+        
+        trace_id = new_trace_id()
+        logger.info(f"Chat stream request - Session: {session_id}, Message length: {len(message)}",
+                    extra={'category': 'request', 'trace_id': trace_id})
+        
+        def generate():
+            with start_trace('POST /chat/stream', session_id=session_id, trace_id=trace_id):
+                for event in stream_message(message, session_id):
+                    event['session_id'] = session_id
+                    yield format_sse(event)
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+                TRACE_HEADER: trace_id
+            }
+        )
+    
     @app.errorhandler(404)
     def not_found(error):
         """Handle 404 errors.
@@ -155,19 +519,36 @@ def create_app() -> Flask:
 
 
 def run_server():
-    """Run the Flask server.
+    """Run the HTTP server.
     
-    This function starts the HTTP server on the configured port.
+    This function starts the HTTP server on the configured port, using the
+    asyncio server unless SERVER_MODE is set to "threaded". With more than one
+    SERVER_WORKERS (or CLUSTER_WORKER_URLS) it starts the scale-out router instead.
     """
     config = get_config()
+    
+    if config.server_workers > 1 or config.cluster_worker_urls:
+        from chatbot.cluster import run_cluster
+        run_cluster()
+        return
+    
+    if config.server_mode == 'async':
+        from chatbot.async_server import run_async_server
+        run_async_server()
+        return
+    
     app = create_app()
     
+    # Build pooled agents before accepting traffic; the recommendation model builds in the background
+    start_recommendations()
+    warm_agent_pool()
+    
     logger.info(f"Starting chatbot service on port {config.chatbot_port}")
     logger.info(f"Backend API URL: {config.backend_api_url}")
     
     # Run the Flask app
     app.run(
-        host='0.0.0.0',
+        host=config.chatbot_host,
         port=config.chatbot_port,
         debug=False,
         threaded=True
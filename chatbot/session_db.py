@@ -0,0 +1,389 @@
+"""SQLite session persistence for the Shopping Assistant Chatbot.
+
+This module stores sessions, agent state and conversation messages in a
+single SQLite database instead of one JSON file per record. The database runs
+in WAL mode and writes are group-committed: each write joins an open
+transaction that is committed when it reaches a batch size or after a short
+flush interval, so a busy server issues a handful of commits per second
+rather than one fsync-heavy file replace per message. Reads go through the
+same connection and always see writes that are not yet committed.
+
+Because the file layout under SESSION_STORAGE_DIR is replaced by the database,
+existing session directories can be imported with migrate_file_sessions() or
+``python -m chatbot.migrate_sessions``.
+"""
+
+import dataclasses
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from strands.session.session_repository import SessionRepository
+from strands.types.exceptions import SessionException
+from strands.types.session import Session, SessionAgent, SessionMessage, decode_bytes_values
+from chatbot.metrics import SESSION_WRITE_SECONDS
+from chatbot.tracing import span
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS agents (
+    session_id TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, agent_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, agent_id, message_id)
+) WITHOUT ROWID;
+"""
+
+
+# Constructor fields of SessionMessage. Its from_dict() inspects the class signature once per
+# key, which dominates restoring a long conversation, so the names are looked up once here.
+_MESSAGE_FIELDS = frozenset(field.name for field in dataclasses.fields(SessionMessage))
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    """Serialize a record for storage."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def _load_message(data: str) -> SessionMessage:
+    """Deserialize a stored message, equivalent to SessionMessage.from_dict()."""
+    record = json.loads(data)
+    return SessionMessage(**decode_bytes_values({key: value for key, value in record.items() if key in _MESSAGE_FIELDS}))
+
+
+class SQLiteSessionRepository(SessionRepository):
+    """Strands session repository backed by one SQLite database with batched commits."""
+
+    def __init__(self, db_path: str, flush_interval: float = 0.05, max_batch: int = 200):
+        """Open (creating if needed) the session database.
+
+        Args:
+            db_path: Path of the SQLite database file
+            flush_interval: Maximum seconds a write waits before it is committed (0 commits every write)
+            max_batch: Number of writes that triggers an immediate commit
+        """
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by all threads; the lock serializes access to it
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # WAL with synchronous=NORMAL only fsyncs on checkpoint; commits stay cheap
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA busy_timeout=5000')
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._in_transaction = False
+        self._pending = 0
+        self._stats = {'writes': 0, 'commits': 0, 'commit_ms': 0.0}
+
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if self.flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name='session-db-flush', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        """Commit pending writes every flush interval until closed."""
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to commit session writes: {str(e)}")
+
+    def _commit(self):
+        """Commit the open transaction. Caller must hold the lock."""
+        if not self._in_transaction:
+            return
+        start = time.perf_counter()
+        self._conn.execute('COMMIT')
+        self._in_transaction = False
+        self._stats['commits'] += 1
+        self._stats['commit_ms'] += (time.perf_counter() - start) * 1000
+        self._pending = 0
+
+    def _write(self, kind: str, sql: str, params: tuple):
+        """Run a write statement inside the current batch.
+
+        Args:
+            kind: Record kind for metrics (session, agent or message)
+            sql: Statement to execute
+            params: Statement parameters
+        """
+        with SESSION_WRITE_SECONDS.time(kind=kind), span('session.write', kind=kind, backend='sqlite'):
+            with self._lock:
+                if not self._in_transaction:
+                    self._conn.execute('BEGIN')
+                    self._in_transaction = True
+                self._conn.execute(sql, params)
+                self._pending += 1
+                self._stats['writes'] += 1
+                if self._pending >= self.max_batch or self.flush_interval <= 0:
+                    self._commit()
+
+    def _query_one(self, sql: str, params: tuple) -> Optional[tuple]:
+        """Fetch a single row."""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def flush(self):
+        """Commit any pending writes now."""
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        """Commit pending writes and close the database."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        with self._lock:
+            self._commit()
+            self._conn.close()
+
+    def has_session(self, session_id: str) -> bool:
+        """Check whether a session exists in the database."""
+        return self._query_one('SELECT 1 FROM sessions WHERE session_id = ?', (session_id,)) is not None
+
+    def create_session(self, session: Session, **kwargs: Any) -> Session:
+        """Create a new session."""
+        if self.has_session(session.session_id):
+            raise SessionException(f"Session {session.session_id} already exists")
+        self._write(
+            'session',
+            'INSERT INTO sessions (session_id, created_at, data) VALUES (?, ?, ?)',
+            (session.session_id, session.created_at, _dumps(session.to_dict()))
+        )
+        return session
+
+    def read_session(self, session_id: str, **kwargs: Any) -> Optional[Session]:
+        """Read session data."""
+        row = self._query_one('SELECT data FROM sessions WHERE session_id = ?', (session_id,))
+        return Session.from_dict(json.loads(row[0])) if row else None
+
+    def delete_session(self, session_id: str, **kwargs: Any) -> None:
+        """Delete a session with its agents and messages."""
+        if not self.has_session(session_id):
+            raise SessionException(f"Session {session_id} does not exist")
+        for table in ('messages', 'agents', 'sessions'):
+            self._write('session', f'DELETE FROM {table} WHERE session_id = ?', (session_id,))
+
+    def create_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        """Create a new agent in the session."""
+        self._write(
+            'agent',
+            'INSERT OR REPLACE INTO agents (session_id, agent_id, created_at, data) VALUES (?, ?, ?, ?)',
+            (session_id, session_agent.agent_id, session_agent.created_at, _dumps(session_agent.to_dict()))
+        )
+
+    def read_agent(self, session_id: str, agent_id: str, **kwargs: Any) -> Optional[SessionAgent]:
+        """Read agent data."""
+        row = self._query_one('SELECT data FROM agents WHERE session_id = ? AND agent_id = ?', (session_id, agent_id))
+        return SessionAgent.from_dict(json.loads(row[0])) if row else None
+
+    def update_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        """Update agent data, keeping its original creation time."""
+        row = self._query_one(
+            'SELECT created_at FROM agents WHERE session_id = ? AND agent_id = ?',
+            (session_id, session_agent.agent_id)
+        )
+        if row is None:
+            raise SessionException(f"Agent {session_agent.agent_id} in session {session_id} does not exist")
+
+        session_agent.created_at = row[0]
+        self._write(
+            'agent',
+            'UPDATE agents SET data = ? WHERE session_id = ? AND agent_id = ?',
+            (_dumps(session_agent.to_dict()), session_id, session_agent.agent_id)
+        )
+
+    def create_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        """Create a new message for the agent."""
+        self._write(
+            'message',
+            'INSERT OR REPLACE INTO messages (session_id, agent_id, message_id, created_at, data) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (session_id, agent_id, session_message.message_id, session_message.created_at,
+             _dumps(session_message.to_dict()))
+        )
+
+    def read_message(self, session_id: str, agent_id: str, message_id: int, **kwargs: Any) -> Optional[SessionMessage]:
+        """Read message data."""
+        row = self._query_one(
+            'SELECT data FROM messages WHERE session_id = ? AND agent_id = ? AND message_id = ?',
+            (session_id, agent_id, message_id)
+        )
+        return _load_message(row[0]) if row else None
+
+    def update_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        """Update message data, keeping its original creation time."""
+        row = self._query_one(
+            'SELECT created_at FROM messages WHERE session_id = ? AND agent_id = ? AND message_id = ?',
+            (session_id, agent_id, session_message.message_id)
+        )
+        if row is None:
+            raise SessionException(f"Message {session_message.message_id} does not exist")
+
+        session_message.created_at = row[0]
+        self._write(
+            'message',
+            'UPDATE messages SET data = ? WHERE session_id = ? AND agent_id = ? AND message_id = ?',
+            (_dumps(session_message.to_dict()), session_id, agent_id, session_message.message_id)
+        )
+
+    def list_messages(self, session_id: str, agent_id: str, limit: Optional[int] = None, offset: int = 0,
+                      **kwargs: Any) -> List[SessionMessage]:
+        """List an agent's messages in order, with pagination."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT data FROM messages WHERE session_id = ? AND agent_id = ? '
+                'ORDER BY message_id LIMIT ? OFFSET ?',
+                (session_id, agent_id, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [_load_message(row[0]) for row in rows]
+
+    def import_records(self, session: Dict[str, Any], agents: List[Dict[str, Any]],
+                       messages: Dict[str, List[Dict[str, Any]]]):
+        """Insert one session's raw records in a single transaction, replacing any existing copy.
+
+        Args:
+            session: Session record as stored by the file backend
+            agents: Agent records
+            messages: Message records keyed by agent ID
+        """
+        session_id = session['session_id']
+        created_at = session.get('created_at', '')
+        with self._lock:
+            self._commit()
+            self._conn.execute('BEGIN')
+            try:
+                for table in ('messages', 'agents', 'sessions'):
+                    self._conn.execute(f'DELETE FROM {table} WHERE session_id = ?', (session_id,))
+                self._conn.execute(
+                    'INSERT INTO sessions (session_id, created_at, data) VALUES (?, ?, ?)',
+                    (session_id, created_at, _dumps(session))
+                )
+                for agent in agents:
+                    self._conn.execute(
+                        'INSERT INTO agents (session_id, agent_id, created_at, data) VALUES (?, ?, ?, ?)',
+                        (session_id, agent['agent_id'], agent.get('created_at', created_at), _dumps(agent))
+                    )
+                self._conn.executemany(
+                    'INSERT INTO messages (session_id, agent_id, message_id, created_at, data) VALUES (?, ?, ?, ?, ?)',
+                    [
+                        (session_id, agent_id, message['message_id'], message.get('created_at', created_at), _dumps(message))
+                        for agent_id, agent_messages in messages.items()
+                        for message in agent_messages
+                    ]
+                )
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get write and commit counters for monitoring.
+
+        Returns:
+            Dictionary of write, commit and batching figures
+        """
+        with self._lock:
+            stats = dict(self._stats, pending=self._pending)
+        commits = stats['commits']
+        return {
+            'backend': 'sqlite',
+            'writes': stats['writes'],
+            'commits': commits,
+            'pending': stats['pending'],
+            'avg_batch': round(stats['writes'] / commits, 2) if commits else 0.0,
+            'avg_commit_ms': round(stats['commit_ms'] / commits, 3) if commits else 0.0
+        }
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    """Read one JSON record written by the file backend."""
+    with open(path, encoding='utf-8') as record_file:
+        return json.load(record_file)
+
+
+def migrate_file_sessions(storage_dir: str, repository: SQLiteSessionRepository,
+                          overwrite: bool = False) -> Dict[str, int]:
+    """Import session directories written by FileSessionManager into the database.
+
+    Args:
+        storage_dir: Directory containing session_<id> directories
+        repository: Destination repository
+        overwrite: Replace sessions that already exist in the database
+
+    Returns:
+        Dictionary of migrated, skipped and failed session counts and migrated message count
+    """
+    counts = {'sessions': 0, 'skipped': 0, 'failed': 0, 'messages': 0}
+    if not os.path.isdir(storage_dir):
+        return counts
+
+    for entry in sorted(os.listdir(storage_dir)):
+        session_dir = os.path.join(storage_dir, entry)
+        session_file = os.path.join(session_dir, 'session.json')
+        if not entry.startswith('session_') or not os.path.isfile(session_file):
+            continue
+
+        try:
+            session = _read_json(session_file)
+            if not overwrite and repository.has_session(session['session_id']):
+                counts['skipped'] += 1
+                continue
+
+            agents = []
+            messages: Dict[str, List[Dict[str, Any]]] = {}
+            agents_dir = os.path.join(session_dir, 'agents')
+            for agent_entry in sorted(os.listdir(agents_dir)) if os.path.isdir(agents_dir) else []:
+                agent_file = os.path.join(agents_dir, agent_entry, 'agent.json')
+                if not os.path.isfile(agent_file):
+                    continue
+                agent = _read_json(agent_file)
+                agents.append(agent)
+
+                messages_dir = os.path.join(agents_dir, agent_entry, 'messages')
+                message_files = [
+                    name for name in os.listdir(messages_dir)
+                    if name.startswith('message_') and name.endswith('.json')
+                ] if os.path.isdir(messages_dir) else []
+                messages[agent['agent_id']] = [
+                    _read_json(os.path.join(messages_dir, name)) for name in message_files
+                ]
+
+            repository.import_records(session, agents, messages)
+            counts['sessions'] += 1
+            counts['messages'] += sum(len(agent_messages) for agent_messages in messages.values())
+
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            counts['failed'] += 1
+            logger.error(f"Failed to migrate {session_dir}: {str(e)}")
+
+    return counts
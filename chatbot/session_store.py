@@ -0,0 +1,297 @@
+"""Session store module for the Shopping Assistant Chatbot.
+
+This module provides a bounded, thread-safe in-memory store for active chat
+sessions with LRU, idle-TTL and memory-budget eviction. Evicted sessions are
+not lost: their conversation lives in the session storage directory and is
+restored the next time the session is used.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from strands.session.file_session_manager import FileSessionManager
+from strands.types.session import Session, SessionType
+from chatbot.metrics import SESSION_WRITE_SECONDS
+from chatbot.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_session_bytes(session: Dict[str, Any]) -> int:
+    """Estimate the memory held by a session's conversation history.
+
+    Only messages added since the previous estimate are serialized. The
+    previous estimate is reused while the messages it covered still start the
+    history; if the conversation was trimmed or rewritten it is recomputed.
+
+    Args:
+        session: Session data dictionary containing the agent
+
+    Returns:
+        Approximate size of the agent's messages in bytes
+    """
+    agent = session.get('agent')
+    messages = getattr(agent, 'messages', None)
+    if not messages:
+        session.pop('size_estimate', None)
+        return 0
+
+    counted, size, first, last = session.get('size_estimate') or (0, 0, None, None)
+    if not (0 < counted <= len(messages) and messages[0] is first and messages[counted - 1] is last):
+        counted, size = 0, 0
+
+    try:
+        size += len(json.dumps(messages[counted:], default=str)) if counted < len(messages) else 0
+    except (TypeError, ValueError):
+        return size
+    session['size_estimate'] = (len(messages), size, messages[0], messages[-1])
+    return size
+
+
+class SessionStore:
+    """Bounded LRU store of active sessions with idle TTL and memory budget."""
+
+    def __init__(self, max_sessions: int, idle_ttl: float, memory_budget_bytes: int):
+        """Initialize the session store.
+
+        Args:
+            max_sessions: Maximum number of sessions kept in memory
+            idle_ttl: Seconds a session may stay idle before it is evicted
+            memory_budget_bytes: Approximate total bytes of conversation history to keep in memory
+        """
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.memory_budget_bytes = memory_budget_bytes
+
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+        self._hits = 0
+        self._misses = 0
+        self._rehydrations = 0
+        self._evictions = {'capacity': 0, 'ttl': 0, 'memory': 0, 'handoff': 0}
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a session and mark it as most recently used.
+
+        Args:
+            session_id: Unique identifier for the conversation session
+
+        Returns:
+            Session data dictionary, or None if the session is not in memory
+        """
+        with self._lock:
+            self._evict_expired()
+
+            session = self._sessions.get(session_id)
+            if session is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._sessions.move_to_end(session_id)
+            session['last_accessed_monotonic'] = time.monotonic()
+            return session
+
+    def put(self, session_id: str, session: Dict[str, Any], rehydrated: bool = False) -> Dict[str, Any]:
+        """Add a session, evicting others if limits are exceeded.
+
+        If another thread stored the same session first, the existing entry
+        is kept and returned so that a session only ever has one agent.
+
+        Args:
+            session_id: Unique identifier for the conversation session
+            session: Session data dictionary containing the agent
+            rehydrated: Whether the session was restored from persistent storage
+
+        Returns:
+            The session data dictionary now held by the store
+        """
+        # Serializing the history is slow, so it is measured before taking the lock
+        size = estimate_session_bytes(session)
+        with self._lock:
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                self._sessions.move_to_end(session_id)
+                return existing
+
+            if rehydrated:
+                self._rehydrations += 1
+
+            session['last_accessed_monotonic'] = time.monotonic()
+            self._sessions[session_id] = session
+            self._set_size(session_id, size)
+            self._enforce_limits(keep=session_id)
+            return session
+
+    def update_size(self, session_id: str):
+        """Re-estimate a session's memory after its conversation changed.
+
+        Args:
+            session_id: Unique identifier for the conversation session
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return
+
+        # Measured outside the lock; the session's own turns are the only writers of its history
+        size = estimate_session_bytes(session)
+        with self._lock:
+            if self._sessions.get(session_id) is not session:
+                return
+            self._set_size(session_id, size)
+            self._enforce_limits(keep=session_id)
+
+    def remove(self, session_id: str) -> bool:
+        """Remove a session from memory.
+
+        Args:
+            session_id: Unique identifier for the conversation session
+
+        Returns:
+            True if the session was removed, False if it wasn't in memory
+        """
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+
+            self._drop(session_id)
+            return True
+
+    def evict_where(self, predicate: Callable[[str], bool], reason: str) -> int:
+        """Evict every session whose ID matches a predicate.
+
+        Args:
+            predicate: Function returning True for session IDs to evict
+            reason: Eviction reason to count them under
+
+        Returns:
+            Number of sessions evicted
+        """
+        with self._lock:
+            session_ids = [session_id for session_id in self._sessions if predicate(session_id)]
+            for session_id in session_ids:
+                self._evict(session_id, reason)
+            return len(session_ids)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store counters for monitoring.
+
+        Returns:
+            Dictionary of size, limits and hit/miss/eviction counters
+        """
+        with self._lock:
+            return {
+                'active_sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'memory_bytes': self._total_bytes,
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'rehydrations': self._rehydrations,
+                'evictions': dict(self._evictions)
+            }
+
+    def _set_size(self, session_id: str, size: int):
+        """Record the estimated size of a session. Must hold the lock."""
+        self._total_bytes += size - self._sizes.get(session_id, 0)
+        self._sizes[session_id] = size
+
+    def _drop(self, session_id: str):
+        """Remove a session and its size accounting. Must hold the lock."""
+        self._sessions.pop(session_id, None)
+        self._total_bytes -= self._sizes.pop(session_id, 0)
+
+    def _evict(self, session_id: str, reason: str):
+        """Evict a session and count the reason. Must hold the lock."""
+        logger.info(f"Evicting session {session_id} ({reason})", extra={'category': 'session'})
+        self._drop(session_id)
+        self._evictions[reason] += 1
+
+    def _evict_expired(self):
+        """Evict sessions idle for longer than the TTL. Must hold the lock."""
+        if self.idle_ttl <= 0:
+            return
+
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session['last_accessed_monotonic'] > cutoff:
+                break
+            self._evict(session_id, 'ttl')
+
+    def _enforce_limits(self, keep: str):
+        """Evict least recently used sessions until limits hold. Must hold the lock.
+
+        Args:
+            keep: Session ID that must not be evicted (the one being used)
+        """
+        self._evict_expired()
+
+        while len(self._sessions) > self.max_sessions:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._evict(oldest, 'capacity')
+
+        while self.memory_budget_bytes > 0 and self._total_bytes > self.memory_budget_bytes:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._evict(oldest, 'memory')
+
+
+class InstrumentedFileSessionRepository(FileSessionManager):
+    """File session repository, shared by all sessions, that records how long each write takes.
+
+    Only the repository half of FileSessionManager is used: session managers are
+    created per session around this shared instance. The manager half is
+    initialized for a placeholder session that is never read from or written to disk.
+    """
+
+    # Session the FileSessionManager half is initialized for
+    _REPOSITORY_SESSION_ID = '__repository__'
+
+    def __init__(self, storage_dir: str):
+        """Initialize the repository, creating the storage directory if needed.
+
+        Args:
+            storage_dir: Directory holding one session_<id> directory per session
+        """
+        super().__init__(session_id=self._REPOSITORY_SESSION_ID, storage_dir=storage_dir)
+
+    def read_session(self, session_id: str, **kwargs: Any) -> Optional[Session]:
+        """Read a session from disk; the placeholder session exists only in memory."""
+        if session_id == self._REPOSITORY_SESSION_ID:
+            return Session(session_id=session_id, session_type=SessionType.AGENT)
+        return super().read_session(session_id, **kwargs)
+
+    def has_session(self, session_id: str) -> bool:
+        """Check whether a session has been written to disk."""
+        return os.path.isdir(self._get_session_path(session_id))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get repository details for monitoring."""
+        return {'backend': 'file'}
+
+    def _write_file(self, path: str, data: Dict[str, Any]) -> None:
+        """Write a session file and observe its duration by kind (session, agent or message)."""
+        name = os.path.basename(path)
+        kind = 'message' if name.startswith('message_') else os.path.splitext(name)[0]
+        with SESSION_WRITE_SECONDS.time(kind=kind), span('session.write', kind=kind):
+            super()._write_file(path, data)
@@ -0,0 +1 @@
+"""Unit tests for the Shopping Assistant Chatbot."""
@@ -0,0 +1,40 @@
+"""Shared pytest fixtures for the chatbot tests."""
+
+import os
+
+# Configuration requires AWS credentials; tests never reach Bedrock
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'test')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'test')
+
+import pytest
+from chatbot.config import reset_config
+
+
+@pytest.fixture(autouse=True)
+def fresh_config():
+    """Reload configuration from the environment for every test."""
+    reset_config()
+    yield
+    reset_config()
+
+
+class FakeClock:
+    """Manually advanced replacement for time.monotonic."""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """A fake clock starting at an arbitrary time."""
+    return FakeClock()
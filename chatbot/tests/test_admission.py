@@ -0,0 +1,184 @@
+"""Tests for rate limits and the model call concurrency cap."""
+
+import asyncio
+import threading
+import pytest
+from chatbot import admission
+from chatbot.admission import AdmissionError, ModelCallLimiter, RateLimiter, client_ip
+
+
+@pytest.fixture
+def rate_clock(clock, monkeypatch):
+    monkeypatch.setattr(admission, 'time', clock)
+    return clock
+
+
+def test_burst_then_sustained_rate(rate_clock):
+    limiter = RateLimiter(per_minute=60, burst=3)
+
+    assert [limiter.acquire('s1') for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire('s1') == pytest.approx(1.0)
+    assert limiter.rejected == 1
+
+    rate_clock.advance(1.0)
+    assert limiter.acquire('s1') == 0.0
+    assert limiter.acquire('s1') > 0
+
+
+def test_keys_have_separate_buckets(rate_clock):
+    limiter = RateLimiter(per_minute=60, burst=1)
+
+    assert limiter.acquire('s1') == 0.0
+    assert limiter.acquire('s2') == 0.0
+    assert limiter.acquire('s1') > 0
+
+
+def test_idle_bucket_refills_only_to_burst(rate_clock):
+    limiter = RateLimiter(per_minute=60, burst=2)
+    limiter.acquire('s1')
+    rate_clock.advance(3600)
+
+    assert [limiter.acquire('s1') for _ in range(3)][-1] > 0
+
+
+def test_least_recently_used_buckets_are_dropped(rate_clock):
+    limiter = RateLimiter(per_minute=60, burst=1, max_keys=2)
+    for key in ('a', 'b', 'c'):
+        limiter.acquire(key)
+
+    assert limiter.get_stats()['tracked_keys'] == 2
+    # 'a' was dropped, so it starts again with a full bucket
+    assert limiter.acquire('a') == 0.0
+
+
+def test_zero_rate_disables_limit():
+    limiter = RateLimiter(per_minute=0, burst=1)
+
+    assert not limiter.enabled
+    assert all(limiter.acquire('s1') == 0.0 for _ in range(100))
+
+
+def test_model_calls_wait_for_a_free_slot():
+    async def scenario():
+        limiter = ModelCallLimiter(max_concurrency=1, max_queue=5)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert (limiter.active, limiter.waiting) == (1, 1)
+
+        # The freed slot is handed to the waiter rather than returned
+        limiter.release(call_seconds=0.5)
+        await asyncio.wait_for(waiter, 1)
+        assert (limiter.active, limiter.waiting) == (1, 0)
+
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_wait_gives_up_its_place():
+    async def scenario():
+        limiter = ModelCallLimiter(max_concurrency=1, max_queue=5)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        limiter.release()
+        assert (limiter.active, limiter.waiting) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_slot_granted_to_a_cancelled_waiter_is_passed_on():
+    async def scenario():
+        limiter = ModelCallLimiter(max_concurrency=1, max_queue=5)
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        # The slot is handed over to the first waiter just as it gives up
+        limiter.release()
+        first.cancel()
+        await asyncio.wait_for(second, 1)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert (limiter.active, limiter.waiting) == (1, 0)
+
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_slots_are_shared_across_event_loops():
+    limiter = ModelCallLimiter(max_concurrency=1, max_queue=5)
+    asyncio.run(limiter.acquire())
+    acquired = threading.Event()
+
+    def other_loop():
+        asyncio.run(limiter.acquire())
+        acquired.set()
+
+    thread = threading.Thread(target=other_loop)
+    thread.start()
+    assert not acquired.wait(0.05)
+
+    limiter.release()
+    assert acquired.wait(5)
+    thread.join()
+    limiter.release()
+    assert limiter.active == 0
+
+
+def test_admission_is_refused_when_queue_is_full():
+    async def scenario():
+        limiter = ModelCallLimiter(max_concurrency=1, max_queue=1)
+        limiter.check_admission()
+        await limiter.acquire()
+        limiter.check_admission()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionError) as rejected:
+            limiter.check_admission()
+        assert rejected.value.status == 503
+        assert rejected.value.reason == 'model_capacity'
+        assert int(rejected.value.retry_after_header) >= 1
+        assert limiter.get_stats()['rejected'] == 1
+
+        limiter.release()
+        await waiter
+        limiter.release()
+
+    asyncio.run(scenario())
+
+
+def test_turn_scope_releases_slots_left_by_a_failed_call(monkeypatch):
+    limiter = ModelCallLimiter(max_concurrency=2, max_queue=0)
+    monkeypatch.setattr(admission, 'get_model_call_limiter', lambda: limiter)
+
+    async def failing_turn():
+        # The before-call hook took a slot, then the call failed before its after-call hook ran
+        await limiter.acquire()
+        admission._turn_slots.get()[0] += 1
+        raise RuntimeError('model call failed')
+
+    with pytest.raises(RuntimeError):
+        with admission.model_call_scope():
+            asyncio.run(failing_turn())
+
+    assert limiter.active == 0
+
+
+def test_forwarded_for_is_trusted_only_from_proxies(monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT_TRUSTED_PROXIES', '10.0.0.1')
+
+    assert client_ip('10.0.0.1', '203.0.113.7, 10.0.0.1') == '203.0.113.7'
+    assert client_ip('198.51.100.2', '203.0.113.7') == '198.51.100.2'
+    assert client_ip('10.0.0.1', 'not-an-ip') == '10.0.0.1'
+    assert client_ip(None, None) == 'unknown'
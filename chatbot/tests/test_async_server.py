@@ -0,0 +1,137 @@
+"""Tests for the asyncio server's concurrency limiter and slot accounting."""
+
+import asyncio
+import pytest
+from starlette.testclient import TestClient
+from chatbot import async_server
+from chatbot.async_server import ConcurrencyLimiter, OverloadedError
+from chatbot.metrics import render_metrics
+
+
+def test_limiter_counts_active_and_waiting_turns():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert (limiter.active, limiter.waiting) == (1, 1)
+
+        limiter.release()
+        await waiter
+        assert (limiter.active, limiter.waiting) == (1, 0)
+
+        limiter.release()
+        assert limiter.get_stats()['active'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_limiter_rejects_when_queue_is_full():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(OverloadedError):
+            await limiter.acquire()
+        assert limiter.rejected == 1
+        assert limiter.waiting == 1
+
+        limiter.release()
+        await waiter
+        limiter.release()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_no_accounting_behind():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert (limiter.active, limiter.waiting) == (1, 0)
+        limiter.release()
+        await asyncio.wait_for(limiter.acquire(), 1)
+
+    asyncio.run(scenario())
+
+
+def test_drain_waits_for_running_turns():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrency=2, max_queue=0)
+        assert await limiter.drain(0.01)
+
+        await limiter.acquire()
+        assert not await limiter.drain(0.01)
+
+        asyncio.get_running_loop().call_later(0.01, limiter.release)
+        assert await limiter.drain(1)
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Async app with startup work and admission control stubbed out."""
+    monkeypatch.setattr(async_server, 'start_recommendations', lambda: None)
+    monkeypatch.setattr(async_server, 'warm_agent_pool', lambda: None)
+    monkeypatch.setattr(async_server, 'flush_session_storage', lambda: None)
+    monkeypatch.setattr(async_server, 'check_admission', lambda session_id, ip: None)
+    with TestClient(async_server.create_async_app()) as client:
+        yield client
+
+
+def _chat(client, path):
+    return client.post(path, json={'message': 'hello', 'session_id': 'session-1'})
+
+
+def _active_turns(client):
+    return client.get('/health').json()['server']['active']
+
+
+def test_chat_releases_slot_on_error(client, monkeypatch):
+    async def failing_turn(message, session_id):
+        raise RuntimeError('model failed')
+
+    monkeypatch.setattr(async_server, 'process_message_async', failing_turn)
+
+    assert _chat(client, '/chat').status_code == 500
+    assert _active_turns(client) == 0
+
+
+def test_chat_stream_releases_slot_when_stream_fails(client, monkeypatch):
+    async def failing_stream(message, session_id, cancel_signal):
+        yield {'type': 'text', 'text': 'partial'}
+        raise RuntimeError('model failed')
+
+    monkeypatch.setattr(async_server, 'stream_message_async', failing_stream)
+
+    with pytest.raises(RuntimeError):
+        _chat(client, '/chat/stream')
+    assert _active_turns(client) == 0
+
+
+def test_chat_stream_releases_slot_after_stream_completes(client, monkeypatch):
+    async def stream(message, session_id, cancel_signal):
+        yield {'type': 'text', 'text': 'hi'}
+        yield {'type': 'done'}
+
+    monkeypatch.setattr(async_server, 'stream_message_async', stream)
+
+    response = _chat(client, '/chat/stream')
+    assert response.status_code == 200
+    assert 'event: done' in response.text
+    assert _active_turns(client) == 0
+
+
+def test_server_gauges_are_registered_once():
+    async_server.create_async_app()
+    async_server.create_async_app()
+
+    assert render_metrics().count('# TYPE chatbot_server_active_turns gauge') == 1
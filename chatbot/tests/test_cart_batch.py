@@ -0,0 +1,212 @@
+"""Tests for all-or-nothing cart changes through POST /api/cart/batch.
+
+Most tests run against the benchmark's in-process fake backend. The Express
+backend tests start server/index.js on a scratch database and are skipped when
+Node or the backend's npm packages are not installed.
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+from chatbot import tools
+from chatbot.benchmark.fake_backend import FakeBackend
+from chatbot.cart_mirror import cart_session
+from chatbot.tools import apply_cart_changes
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+NODE = shutil.which('node')
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend()
+    backend.start()
+    monkeypatch.setenv('BACKEND_API_URL', backend.url)
+    monkeypatch.setenv('BACKEND_MAX_RETRIES', '0')
+    yield backend
+    backend.stop()
+
+
+@pytest.fixture
+def cart_item(backend):
+    """ID of a cart item holding one Smartphone (product 1)."""
+    status, payload, _ = backend.handle('POST', '/api/cart', {'product_id': 1, 'quantity': 1})
+    assert status == 200
+    return payload['id']
+
+
+def _cart(backend):
+    return {item['product_id']: item['quantity'] for item in backend.cart.values()}
+
+
+def test_changes_are_applied_in_order(backend, cart_item):
+    reply = apply_cart_changes(ops=[
+        {'op': 'add', 'product_id': 3, 'quantity': 2},
+        {'op': 'update', 'cart_item_id': cart_item, 'quantity': 4},
+    ])
+
+    assert reply.startswith('Applied 2 cart change(s):')
+    assert 'Added 2 x Headphones' in reply
+    assert 'Set Smartphone' in reply
+    assert 'total $3194.00' in reply
+    assert _cart(backend) == {1: 4, 3: 2}
+
+
+def test_failed_change_rolls_back_the_whole_batch(backend, cart_item):
+    revision = backend.cart_revision
+
+    reply = apply_cart_changes(ops=[
+        {'op': 'add', 'product_id': 3},
+        {'op': 'update', 'cart_item_id': cart_item, 'quantity': 5},
+        {'op': 'remove', 'cart_item_id': 999},
+    ])
+
+    assert reply.startswith("I didn't change your cart: Operation 3: cart item 999 not found")
+    assert _cart(backend) == {1: 1}
+    assert backend.cart_revision == revision
+
+
+def test_invalid_changes_are_rejected_before_calling_the_backend(backend):
+    requests = backend.requests
+
+    reply = apply_cart_changes(ops=[
+        {'op': 'add', 'product_id': 3},
+        {'op': 'update', 'cart_item_id': 1, 'quantity': 0},
+        {'op': 'swap'},
+    ])
+
+    assert reply.startswith("I didn't change your cart because some changes were invalid:")
+    assert 'Change 2: the quantity must be greater than 0. To remove an item, use op remove.' in reply
+    assert 'Change 3: op must be add, update or remove' in reply
+    assert backend.requests == requests
+
+
+def test_empty_batch_is_refused(backend):
+    assert apply_cart_changes(ops=[]) == "Please provide at least one cart change."
+
+
+def test_session_cart_mirror_follows_the_batch(backend, cart_item):
+    mirrors = tools._get_cart_mirrors()
+    mirror = mirrors.get('batch-session')
+    mirror.load(backend._cart_items(), f'fake-{backend.cart_revision}')
+
+    with cart_session('batch-session'):
+        apply_cart_changes(ops=[{'op': 'remove', 'cart_item_id': 999}])
+        assert [item['product_id'] for item in mirror.snapshot()] == [1]
+
+        apply_cart_changes(ops=[{'op': 'add', 'product_id': 2}, {'op': 'remove', 'cart_item_id': cart_item}])
+
+    assert [item['product_id'] for item in mirror.snapshot()] == [2]
+    assert mirror.version == f'fake-{backend.cart_revision}'
+    mirrors.drop('batch-session')
+
+
+def _express_installed() -> bool:
+    """Whether Node and the backend's npm packages are available."""
+    if NODE is None:
+        return False
+    check = subprocess.run([NODE, '-e', "require('express'); require('sqlite3')"], cwd=REPO_ROOT,
+                           capture_output=True)
+    return check.returncode == 0
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture(scope='module')
+def express_url(tmp_path_factory):
+    """Base URL of server/index.js running on a freshly initialized database."""
+    if not _express_installed():
+        pytest.skip('Node backend dependencies are not installed (run npm install)')
+
+    workdir = tmp_path_factory.mktemp('express')
+    subprocess.run([NODE, os.path.join(REPO_ROOT, 'server', 'initDb.js')], cwd=workdir, check=True,
+                   capture_output=True, timeout=30)
+    port = _free_port()
+    process = subprocess.Popen([NODE, os.path.join(REPO_ROOT, 'server', 'index.js')], cwd=workdir,
+                               env=dict(os.environ, PORT=str(port)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                requests.get(f'{url}/api/products', timeout=1).raise_for_status()
+                break
+            except requests.RequestException:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError('Express backend did not start')
+                time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@pytest.fixture
+def express_cart(express_url):
+    """Empty the Express backend's cart and return its base URL."""
+    for item in requests.get(f'{express_url}/api/cart', timeout=5).json():
+        requests.delete(f"{express_url}/api/cart/{item['id']}", timeout=5).raise_for_status()
+    return express_url
+
+
+def _express_cart(url):
+    response = requests.get(f'{url}/api/cart', timeout=5)
+    return {item['product_id']: item['quantity'] for item in response.json()}, response.headers['ETag']
+
+
+def test_express_batch_rolls_back_on_a_failing_operation(express_cart):
+    added = requests.post(f'{express_cart}/api/cart', json={'product_id': 1, 'quantity': 1}, timeout=5).json()
+    before, etag = _express_cart(express_cart)
+
+    response = requests.post(f'{express_cart}/api/cart/batch', json={'operations': [
+        {'op': 'add', 'product_id': 3, 'quantity': 1},
+        {'op': 'update', 'cart_item_id': added['id'], 'quantity': 5},
+        {'op': 'remove', 'cart_item_id': 999999},
+    ]}, timeout=5)
+
+    assert response.status_code == 404
+    assert response.json()['error'] == 'Operation 3: cart item 999999 not found'
+    # Nothing from the first two operations survived, and the cart version did not move
+    assert _express_cart(express_cart) == (before, etag)
+
+    # The rolled-back transaction does not block the next batch on the same connection
+    response = requests.post(f'{express_cart}/api/cart/batch', json={'operations': [
+        {'op': 'update', 'cart_item_id': added['id'], 'quantity': 2},
+    ]}, timeout=5)
+    assert response.status_code == 200
+    assert response.json()['previous_version'] == etag.strip('"')
+    assert _express_cart(express_cart)[0] == {1: 2}
+
+
+def test_express_batch_through_the_tool(express_cart, monkeypatch):
+    monkeypatch.setenv('BACKEND_API_URL', express_cart)
+    monkeypatch.setenv('BACKEND_MAX_RETRIES', '0')
+
+    reply = apply_cart_changes(ops=[{'op': 'add', 'product_id': 2}, {'op': 'add', 'product_id': 3, 'quantity': 2}])
+
+    assert reply.startswith('Applied 2 cart change(s):')
+    assert 'total $1697.00' in reply
+    assert _express_cart(express_cart)[0] == {2: 1, 3: 2}
+
+
+def test_express_batches_apply_one_at_a_time(express_cart):
+    def add_one(_):
+        return requests.post(f'{express_cart}/api/cart/batch', json={'operations': [
+            {'op': 'add', 'product_id': 4, 'quantity': 1},
+        ]}, timeout=10).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(add_one, range(16)))
+
+    assert statuses == [200] * 16
+    assert _express_cart(express_cart)[0] == {4: 16}
@@ -0,0 +1,164 @@
+"""Tests for the catalog TTL cache."""
+
+import threading
+import pytest
+from chatbot import catalog_cache
+from chatbot.catalog_cache import CatalogCache
+
+
+class FakeLoader:
+    """Loader returning a new version of each key on every unconditional fetch."""
+
+    def __init__(self):
+        self.calls = []
+        self.versions = {}
+        self.not_modified = False
+        self.error = False
+        self.fetched = threading.Event()
+
+    def __call__(self, key, etag):
+        self.calls.append((key, etag))
+        try:
+            if self.error:
+                return {'error': 'backend unavailable'}, None, False
+            if self.not_modified and etag is not None:
+                return None, etag, True
+            version = self.versions[key] = self.versions.get(key, 0) + 1
+            return {'key': key, 'version': version}, f'"{key}-{version}"', False
+        finally:
+            self.fetched.set()
+
+
+@pytest.fixture
+def loader():
+    return FakeLoader()
+
+
+@pytest.fixture
+def cache(loader, clock, monkeypatch):
+    monkeypatch.setattr(catalog_cache, 'time', clock)
+    cache = CatalogCache(loader, ttl=60, stale_ttl=300, max_entries=3)
+    yield cache
+    cache._executor.shutdown(wait=True)
+
+
+def test_fresh_entries_are_served_from_memory(cache, loader, clock):
+    first = cache.get('/api/products')
+    clock.advance(59)
+
+    assert cache.get('/api/products') is first
+    assert loader.calls == [('/api/products', None)]
+    assert cache.get_stats()['hits'] == 1
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_stale_entry_is_served_while_refreshed_in_background(cache, loader, clock):
+    first = cache.get('/api/products')
+    clock.advance(61)
+    loader.fetched.clear()
+
+    assert cache.get('/api/products') is first
+    assert loader.fetched.wait(5)
+    cache._executor.shutdown(wait=True)
+
+    # The refresh revalidated with the cached ETag and stored the new version
+    assert loader.calls[-1] == ('/api/products', '"/api/products-1"')
+    assert cache.peek('/api/products')['version'] == 2
+    stats = cache.get_stats()
+    assert stats['stale_hits'] == 1
+    assert stats['refreshes'] == 1
+
+
+def test_stale_refresh_is_scheduled_once_per_key(cache, loader, clock, monkeypatch):
+    cache.get('/api/products')
+    clock.advance(61)
+    submitted = []
+    monkeypatch.setattr(cache._executor, 'submit', submitted.append)
+
+    cache.get('/api/products')
+    cache.get('/api/products')
+
+    assert len(submitted) == 1
+
+
+def test_not_modified_revalidation_extends_entry(cache, loader, clock):
+    first = cache.get('/api/products')
+    loader.not_modified = True
+    clock.advance(400)
+
+    assert cache.get('/api/products') is first
+    assert loader.calls[-1] == ('/api/products', '"/api/products-1"')
+    assert cache.get_stats()['revalidations'] == 1
+
+    clock.advance(30)
+    assert cache.get('/api/products') is first
+    assert len(loader.calls) == 2
+
+
+def test_expired_entry_is_fetched_synchronously(cache, loader, clock):
+    cache.get('/api/products')
+    clock.advance(361)
+
+    assert cache.get('/api/products')['version'] == 2
+    assert cache.get_stats()['misses'] == 2
+
+
+def test_expired_copy_is_served_when_backend_fails(cache, loader, clock):
+    first = cache.get('/api/products')
+    clock.advance(361)
+    loader.error = True
+
+    assert cache.get('/api/products') is first
+    assert cache.get_stats()['errors'] == 1
+
+
+def test_errors_are_not_cached(cache, loader):
+    loader.error = True
+    assert cache.get('/api/products/1') == {'error': 'backend unavailable'}
+
+    loader.error = False
+    assert cache.get('/api/products/1')['version'] == 1
+    assert cache.get_stats()['size'] == 1
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for key in ('/a', '/b', '/c'):
+        cache.get(key)
+    cache.get('/a')
+    cache.get('/d')
+
+    assert cache.peek('/b') is None
+    assert cache.peek('/a') is not None
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_invalidate_drops_one_or_all_entries(cache, loader):
+    cache.get('/a')
+    cache.get('/b')
+
+    cache.invalidate('/a')
+    assert cache.peek('/a') is None
+    assert cache.peek('/b') is not None
+
+    cache.invalidate()
+    assert cache.get_stats()['size'] == 0
+    assert cache.get('/b')['version'] == 2
+
+
+def test_invalidation_route_requires_admin_token(monkeypatch):
+    from chatbot.server import validate_catalog_invalidation
+    monkeypatch.setenv('CATALOG_ADMIN_TOKEN', 'sekrit')
+
+    assert validate_catalog_invalidation(None, None)[1] == 403
+    assert validate_catalog_invalidation('Bearer wrong', None)[1] == 403
+    assert validate_catalog_invalidation('Bearer sekrit', None) is None
+    assert validate_catalog_invalidation('Bearer sekrit', {'product_id': 7}) is None
+    assert validate_catalog_invalidation('Bearer sekrit', {'product_id': '7'})[1] == 400
+    assert validate_catalog_invalidation('Bearer sekrit', {'product_id': True})[1] == 400
+
+
+def test_invalidation_route_is_closed_without_token(monkeypatch):
+    from chatbot.server import validate_catalog_invalidation
+    monkeypatch.delenv('CATALOG_ADMIN_TOKEN', raising=False)
+
+    assert validate_catalog_invalidation('Bearer ', None)[1] == 403
@@ -0,0 +1,38 @@
+"""Tests for cluster membership updates and session handoff."""
+
+import asyncio
+import threading
+from chatbot.server import validate_cluster_view
+from chatbot.turn_queue import SessionTurnQueue
+
+VIEW = {'workers': ['http://127.0.0.1:8001'], 'worker': 'http://127.0.0.1:8001', 'epoch': 1, 'virtual_nodes': 160}
+
+
+def test_rebalance_requires_cluster_secret(monkeypatch):
+    monkeypatch.setenv('CLUSTER_SECRET', 'shared')
+
+    assert validate_cluster_view(None, VIEW)[1] == 403
+    assert validate_cluster_view('other', VIEW)[1] == 403
+    assert validate_cluster_view('shared', VIEW) is None
+    assert validate_cluster_view('shared', dict(VIEW, epoch='1'))[1] == 400
+
+
+def test_rebalance_is_closed_outside_a_cluster(monkeypatch):
+    monkeypatch.delenv('CLUSTER_SECRET', raising=False)
+
+    assert validate_cluster_view('', VIEW)[1] == 403
+
+
+def test_wait_idle_waits_for_matching_sessions_only():
+    queue = SessionTurnQueue(max_pending=3, coalesce_window=0)
+    handed_off = asyncio.run(queue.join('handed-off', 'hello'))
+    kept = asyncio.run(queue.join('kept', 'hello'))
+
+    assert not queue.wait_idle(lambda session_id: session_id == 'handed-off', timeout=0.01)
+
+    threading.Timer(0.05, handed_off.finish, args=('done',)).start()
+    assert queue.wait_idle(lambda session_id: session_id == 'handed-off', timeout=5)
+
+    # The other session's running turn does not hold up the handoff
+    assert not kept.future.done()
+    kept.finish('done')
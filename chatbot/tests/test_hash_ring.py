@@ -0,0 +1,82 @@
+"""Tests for the consistent hash ring."""
+
+from collections import Counter
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from chatbot.hash_ring import HashRing
+
+WORKERS = [f'http://127.0.0.1:{8001 + index}' for index in range(4)]
+KEYS = [f'session-{index}' for index in range(20000)]
+
+
+def _owners(ring: HashRing):
+    return {key: ring.get(key) for key in KEYS}
+
+
+def test_empty_ring_has_no_owner():
+    ring = HashRing()
+    assert ring.get('session-1') is None
+    assert len(ring) == 0
+
+
+def test_keys_spread_evenly_across_workers():
+    counts = Counter(_owners(HashRing(WORKERS)).values())
+
+    assert set(counts) == set(WORKERS)
+    expected = len(KEYS) / len(WORKERS)
+    for count in counts.values():
+        assert abs(count - expected) / expected < 0.25
+
+
+def test_ownership_does_not_depend_on_insertion_order():
+    assert _owners(HashRing(WORKERS)) == _owners(HashRing(reversed(WORKERS)))
+
+
+def test_adding_a_worker_only_moves_keys_to_it():
+    ring = HashRing(WORKERS)
+    before = _owners(ring)
+    ring.add('http://127.0.0.1:8005')
+    after = _owners(ring)
+
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert all(after[key] == 'http://127.0.0.1:8005' for key in moved)
+    # About 1/N of the sessions change owner
+    assert 0.1 < len(moved) / len(KEYS) < 0.3
+
+
+def test_removing_a_worker_only_moves_its_keys():
+    ring = HashRing(WORKERS)
+    before = _owners(ring)
+    ring.remove(WORKERS[0])
+    after = _owners(ring)
+
+    assert WORKERS[0] not in ring.nodes
+    assert all(after[key] == before[key] for key in KEYS if before[key] != WORKERS[0])
+    assert all(after[key] != WORKERS[0] for key in KEYS)
+
+
+def test_add_and_remove_are_idempotent():
+    ring = HashRing(WORKERS[:2])
+    ring.add(WORKERS[0])
+    ring.remove('http://unknown')
+
+    assert ring.nodes == sorted(WORKERS[:2])
+    assert len(ring._positions) == 2 * ring.virtual_nodes
+
+
+@settings(max_examples=100, deadline=None)
+@given(
+    nodes=st.lists(st.text(min_size=1, max_size=12), min_size=2, max_size=6, unique=True),
+    keys=st.lists(st.text(max_size=20), min_size=1, max_size=50)
+)
+def test_property_rebalance_moves_only_the_changed_workers_keys(nodes, keys):
+    ring = HashRing(nodes, virtual_nodes=16)
+    before = {key: ring.get(key) for key in keys}
+
+    removed = nodes[0]
+    ring.remove(removed)
+    after = {key: ring.get(key) for key in keys}
+    assert all(after[key] == before[key] for key in keys if before[key] != removed)
+
+    ring.add(removed)
+    assert {key: ring.get(key) for key in keys} == before
@@ -0,0 +1,83 @@
+"""Tests for the deterministic intent router."""
+
+import pytest
+from chatbot.intent_router import IntentRouter, detect_intent, normalize
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('Can you show me my cart, please?', 'show me my cart'),
+    ('Add two of product #5 to my cart!', 'add 2 of product 5 to my cart'),
+    ("What's in my basket?", 'whats in my basket'),
+    ('ok please remove item 3 thanks', 'remove item 3'),
+])
+def test_normalize(message, expected):
+    assert normalize(message) == expected
+
+
+@pytest.mark.parametrize('message, intent, arguments', [
+    ('show my cart', 'view_cart', {}),
+    ("what's in my cart?", 'view_cart', {}),
+    ('list products', 'list_products', {}),
+    ('what do you sell', 'list_products', {}),
+    ('tell me about product 7', 'product_details', {'product_id': 7}),
+    ('add product 5', 'add_to_cart', {'product_id': 5, 'quantity': 1}),
+    ('add three of product 5 to my cart', 'add_to_cart', {'product_id': 5, 'quantity': 3}),
+    ('add product 5 x 2', 'add_to_cart', {'product_id': 5, 'quantity': 2}),
+    ('change item 4 quantity to 2', 'update_cart_item', {'cart_item_id': 4, 'quantity': 2}),
+    ('remove item 3 from my cart', 'remove_from_cart', {'cart_item_id': 3}),
+])
+def test_bare_commands_match_with_full_confidence(message, intent, arguments):
+    match = detect_intent(message)
+
+    assert match.intent == intent
+    assert match.arguments == arguments
+    assert match.confidence == 1.0
+
+
+@pytest.mark.parametrize('message', [
+    'add product 5 and tell me about shipping',
+    "don't add product 5",
+    'what is in my cart right now and what else should I buy',
+])
+def test_commands_with_extra_content_fall_below_threshold(message):
+    router = IntentRouter(min_confidence=0.9)
+
+    assert 0 < detect_intent(message).confidence < 0.9
+    assert router.route(message) is None
+    assert router.get_stats()['below_threshold'] == 1
+
+
+@pytest.mark.parametrize('message', ['is product 5 good for running', 'compare product 1 and product 2', '!!!'])
+def test_other_messages_are_left_to_the_model(message):
+    router = IntentRouter(min_confidence=0.9)
+
+    assert router.route(message) is None
+    assert router.get_stats()['unmatched'] == 1
+
+
+def test_threshold_is_inclusive():
+    confidence = detect_intent("don't add product 5").confidence
+
+    assert IntentRouter(min_confidence=confidence).route("don't add product 5") is not None
+    assert IntentRouter(min_confidence=confidence + 0.01).route("don't add product 5") is None
+
+
+def test_router_records_fast_path_outcomes():
+    router = IntentRouter(min_confidence=0.9)
+    match = router.route('show my cart')
+
+    assert match.tool_name == 'get_cart'
+    router.record(match, 2.0)
+    router.record(match, 4.0)
+    router.record(match, 100.0, error=True)
+
+    stats = router.get_stats()
+    assert stats['matched'] == {'view_cart': 2}
+    assert stats['errors'] == 1
+    assert stats['p50_ms'] == 4.0
+
+
+def test_reply_template_wraps_tool_output():
+    match = detect_intent('list products')
+
+    assert match.render('  1. Shoes  \n').startswith('1. Shoes\n\nWould you like details')
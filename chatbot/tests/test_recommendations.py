@@ -0,0 +1,90 @@
+"""Tests for the recommendation engine's background model builds."""
+
+import threading
+import time
+import pytest
+from chatbot.recommendations import RecommendationEngine, RecommendationsNotReadyError
+
+PRODUCTS = [
+    {'id': 1, 'name': 'Running shoes', 'description': 'Light running shoes'},
+    {'id': 2, 'name': 'Trail shoes', 'description': 'Running shoes for trails'},
+    {'id': 3, 'name': 'Coffee mug', 'description': 'Ceramic mug'},
+]
+REVIEWS = {
+    1: [{'author': 'Ann', 'rating': 5}, {'author': 'Bob', 'rating': 4}],
+    2: [{'author': 'Ann', 'rating': 5}, {'author': 'Bob', 'rating': 4}],
+    3: [{'author': 'Cid', 'rating': 2}],
+}
+
+
+class GatedLoader:
+    """Loader that blocks until released, counting its calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        return PRODUCTS, REVIEWS, [1, 2]
+
+
+@pytest.fixture
+def loader():
+    return GatedLoader()
+
+
+@pytest.fixture
+def engine(loader):
+    engine = RecommendationEngine(loader, refresh_interval=3600, max_baskets=10)
+    yield engine
+    loader.release.set()
+    engine.stop()
+
+
+def _wait_ready(engine):
+    for _ in range(500):
+        if engine.ready:
+            return
+        time.sleep(0.01)
+    raise AssertionError('model was not built')
+
+
+def test_requests_before_first_build_do_not_wait(engine, loader):
+    engine.start()
+
+    with pytest.raises(RecommendationsNotReadyError):
+        engine.recommend([1])
+    assert engine.get_stats()['not_ready'] == 1
+
+    loader.release.set()
+    _wait_ready(engine)
+    assert engine.recommend([1], limit=1)[0]['product']['id'] == 2
+
+
+def test_recommend_starts_the_builder_if_needed(engine, loader):
+    loader.release.set()
+
+    with pytest.raises(RecommendationsNotReadyError):
+        engine.recommend([1])
+    _wait_ready(engine)
+    assert loader.calls == 1
+
+
+def test_initial_build_is_skipped_when_a_model_exists(engine, loader):
+    loader.release.set()
+    engine._build()
+    engine._build(only_if_missing=True)
+
+    assert loader.calls == 1
+    assert engine.get_stats()['builds'] == 1
+
+
+def test_cart_contents_feed_the_basket_signal(engine, loader):
+    loader.release.set()
+    engine._build()
+
+    stats = engine.get_stats()
+    assert stats['baskets'] == 1
+    assert stats['products'] == 3
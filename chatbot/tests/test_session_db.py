@@ -0,0 +1,170 @@
+"""Tests for the SQLite session repository and file session migration."""
+
+import os
+import sqlite3
+import pytest
+from strands.session.file_session_manager import FileSessionManager
+from strands.types.exceptions import SessionException
+from strands.types.session import Session, SessionAgent, SessionMessage, SessionType
+from chatbot.migrate_sessions import main as migrate_main
+from chatbot.session_db import SQLiteSessionRepository, migrate_file_sessions
+
+
+def _message(message_id: int, text: str) -> SessionMessage:
+    return SessionMessage({'role': 'user', 'content': [{'text': text}]}, message_id)
+
+
+def _agent(agent_id: str = 'default', **state) -> SessionAgent:
+    return SessionAgent(agent_id=agent_id, state=state, conversation_manager_state={'removed_message_count': 0})
+
+
+def _populate(repository, session_id: str = 'abc', count: int = 3):
+    repository.create_session(Session(session_id, SessionType.AGENT))
+    repository.create_agent(session_id, _agent(cart=[1]))
+    for message_id in range(count):
+        repository.create_message(session_id, 'default', _message(message_id, f'message {message_id}'))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'sessions.db')
+
+
+@pytest.fixture
+def repository(db_path):
+    repository = SQLiteSessionRepository(db_path, flush_interval=0)
+    yield repository
+    repository.close()
+
+
+def test_records_round_trip(repository):
+    _populate(repository)
+
+    assert repository.read_session('abc').session_type == SessionType.AGENT
+    assert repository.read_agent('abc', 'default').state == {'cart': [1]}
+    assert repository.read_message('abc', 'default', 1).to_message() == {
+        'role': 'user', 'content': [{'text': 'message 1'}]
+    }
+    assert [message.message_id for message in repository.list_messages('abc', 'default')] == [0, 1, 2]
+    assert [message.message_id for message in repository.list_messages('abc', 'default', limit=1, offset=1)] == [1]
+    assert repository.read_session('missing') is None
+
+
+def test_updates_keep_creation_time(repository):
+    _populate(repository)
+    created_at = repository.read_message('abc', 'default', 0).created_at
+
+    redacted = _message(0, 'redacted')
+    repository.update_message('abc', 'default', redacted)
+    repository.update_agent('abc', _agent(cart=[1, 2]))
+
+    message = repository.read_message('abc', 'default', 0)
+    assert message.created_at == created_at
+    assert message.to_message()['content'] == [{'text': 'redacted'}]
+    assert repository.read_agent('abc', 'default').state == {'cart': [1, 2]}
+
+
+def test_missing_records_raise(repository):
+    with pytest.raises(SessionException):
+        repository.update_message('abc', 'default', _message(0, 'x'))
+    with pytest.raises(SessionException):
+        repository.update_agent('abc', _agent())
+    with pytest.raises(SessionException):
+        repository.delete_session('abc')
+
+    _populate(repository)
+    with pytest.raises(SessionException):
+        repository.create_session(Session('abc', SessionType.AGENT))
+
+
+def test_delete_removes_agents_and_messages(repository):
+    _populate(repository)
+    repository.delete_session('abc')
+
+    assert not repository.has_session('abc')
+    assert repository.read_agent('abc', 'default') is None
+    assert repository.list_messages('abc', 'default') == []
+
+
+def test_writes_are_batched_and_visible_before_commit(db_path):
+    repository = SQLiteSessionRepository(db_path, flush_interval=60, max_batch=4)
+    try:
+        _populate(repository, count=1)
+        # Three writes are pending, but reads on the same connection already see them
+        assert repository.get_stats()['commits'] == 0
+        assert repository.get_stats()['pending'] == 3
+        assert len(repository.list_messages('abc', 'default')) == 1
+
+        repository.create_message('abc', 'default', _message(1, 'fourth write'))
+        assert repository.get_stats()['commits'] == 1
+        assert repository.get_stats()['avg_batch'] == 4.0
+    finally:
+        repository.close()
+
+
+def test_pending_writes_survive_close(db_path):
+    repository = SQLiteSessionRepository(db_path, flush_interval=60)
+    _populate(repository)
+    repository.close()
+
+    reopened = SQLiteSessionRepository(db_path, flush_interval=0)
+    try:
+        assert len(reopened.list_messages('abc', 'default')) == 3
+    finally:
+        reopened.close()
+
+
+@pytest.fixture
+def file_sessions(tmp_path):
+    """A storage directory with two sessions written by the file backend."""
+    storage_dir = str(tmp_path / 'files')
+    for session_id, count in (('one', 2), ('two', 3)):
+        _populate_file(FileSessionManager(session_id=session_id, storage_dir=storage_dir), session_id, count)
+    return storage_dir
+
+
+def _populate_file(manager: FileSessionManager, session_id: str, count: int):
+    manager.create_agent(session_id, _agent(cart=[count]))
+    for message_id in range(count):
+        manager.create_message(session_id, 'default', _message(message_id, f'{session_id} {message_id}'))
+
+
+def test_migration_imports_file_sessions(file_sessions, repository):
+    counts = migrate_file_sessions(file_sessions, repository)
+
+    assert counts == {'sessions': 2, 'skipped': 0, 'failed': 0, 'messages': 5}
+    assert repository.read_agent('two', 'default').state == {'cart': [3]}
+    assert [message.to_message()['content'][0]['text'] for message in repository.list_messages('one', 'default')] == [
+        'one 0', 'one 1'
+    ]
+
+
+def test_migration_skips_existing_sessions_unless_overwriting(file_sessions, repository):
+    _populate(repository, session_id='one', count=1)
+
+    assert migrate_file_sessions(file_sessions, repository)['skipped'] == 1
+    assert len(repository.list_messages('one', 'default')) == 1
+
+    assert migrate_file_sessions(file_sessions, repository, overwrite=True)['sessions'] == 2
+    assert len(repository.list_messages('one', 'default')) == 2
+
+
+def test_migration_counts_unreadable_sessions(file_sessions, repository):
+    with open(os.path.join(file_sessions, 'session_two', 'session.json'), 'w') as session_file:
+        session_file.write('{not json')
+
+    counts = migrate_file_sessions(file_sessions, repository)
+
+    assert (counts['sessions'], counts['failed']) == (1, 1)
+    assert not repository.has_session('two')
+
+
+def test_migration_command(file_sessions, db_path, capsys):
+    assert migrate_main(['--source', file_sessions, '--db', db_path]) == 0
+    assert 'Migrated 2 session(s) and 5 message(s)' in capsys.readouterr().out
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0] == 5
+    finally:
+        conn.close()
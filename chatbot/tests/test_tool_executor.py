@@ -0,0 +1,106 @@
+"""Tests for the ordered concurrent tool executor."""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List
+from strands import Agent, tool
+from strands.models import Model
+from chatbot.tool_executor import OrderedConcurrentToolExecutor, get_tool_execution_stats
+
+
+class BatchModel(Model):
+    """Model that emits one batch of tool calls, then a text reply."""
+
+    def __init__(self, tool_uses: List[Dict[str, Any]]):
+        self.tool_uses = tool_uses
+        self.calls = 0
+
+    def get_config(self) -> Dict[str, Any]:
+        return {'model_id': 'batch'}
+
+    def update_config(self, **model_config: Any) -> None:
+        pass
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        self.calls += 1
+        yield {'messageStart': {'role': 'assistant'}}
+        if self.calls == 1:
+            for index, tool_use in enumerate(self.tool_uses):
+                yield {'contentBlockStart': {'start': {'toolUse': {'name': tool_use['name'], 'toolUseId': f't{index}'}}}}
+                yield {'contentBlockDelta': {'delta': {'toolUse': {'input': json.dumps(tool_use['input'])}}}}
+                yield {'contentBlockStop': {}}
+            yield {'messageStop': {'stopReason': 'tool_use'}}
+        else:
+            yield {'contentBlockDelta': {'delta': {'text': 'Done.'}}}
+            yield {'contentBlockStop': {}}
+            yield {'messageStop': {'stopReason': 'end_turn'}}
+
+
+def _run_batch(tool_uses: List[Dict[str, Any]]) -> List[str]:
+    """Run a batch of calls to the recording tools and return the start/end log."""
+    log: List[str] = []
+
+    @tool
+    async def update_cart(label: str, delay: float) -> str:
+        """Change the cart."""
+        log.append(f'start {label}')
+        await asyncio.sleep(delay)
+        log.append(f'end {label}')
+        return label
+
+    @tool
+    async def lookup(label: str, delay: float) -> str:
+        """Look something up."""
+        log.append(f'start {label}')
+        await asyncio.sleep(delay)
+        log.append(f'end {label}')
+        return label
+
+    agent = Agent(
+        model=BatchModel(tool_uses),
+        tools=[update_cart, lookup],
+        tool_executor=OrderedConcurrentToolExecutor(['update_cart']),
+        callback_handler=None
+    )
+    agent('go')
+    return log
+
+
+def _call(name: str, label: str, delay: float) -> Dict[str, Any]:
+    return {'name': name, 'input': {'label': label, 'delay': delay}}
+
+
+def test_ordered_tools_run_in_emitted_order():
+    log = _run_batch([
+        _call('update_cart', 'add', 0.05),
+        _call('update_cart', 'update', 0.0),
+        _call('update_cart', 'remove', 0.0)
+    ])
+
+    assert log == ['start add', 'end add', 'start update', 'end update', 'start remove', 'end remove']
+
+
+def test_other_tools_run_alongside_ordered_tools():
+    log = _run_batch([
+        _call('update_cart', 'add', 0.05),
+        _call('lookup', 'details', 0.0),
+        _call('update_cart', 'update', 0.0)
+    ])
+
+    # The lookup neither waits for the cart change nor holds up the next one
+    assert log.index('end details') < log.index('end add')
+    assert log.index('end add') < log.index('start update')
+
+
+def test_batches_are_counted():
+    before = get_tool_execution_stats()
+    _run_batch([_call('lookup', 'a', 0.01), _call('lookup', 'b', 0.01)])
+    after = get_tool_execution_stats()
+
+    assert after['batches'] == before['batches'] + 1
+    assert after['parallel_batches'] == before['parallel_batches'] + 1
+    assert after['tool_calls'] == before['tool_calls'] + 2
@@ -0,0 +1,191 @@
+"""Tests for the write-behind session repository."""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import pytest
+from strands.session.session_repository import SessionRepository
+from strands.types.session import Session, SessionAgent, SessionMessage, SessionType
+from chatbot.write_behind import WriteBehindSessionRepository
+
+
+class RecordingRepository(SessionRepository):
+    """In-memory repository that records every write applied to it."""
+
+    def __init__(self):
+        self.writes: List[Tuple[str, str, Any]] = []
+        self.sessions: Dict[str, Session] = {}
+        self.agents: Dict[Tuple[str, str], SessionAgent] = {}
+        self.messages: Dict[Tuple[str, str, int], SessionMessage] = {}
+        self.fail_on: Optional[str] = None
+        self.closed = False
+
+    def _record(self, operation: str, session_id: str, record: Any):
+        if operation == self.fail_on:
+            raise RuntimeError(f'{operation} failed')
+        self.writes.append((operation, session_id, record))
+
+    def create_session(self, session: Session, **kwargs: Any) -> Session:
+        self._record('create_session', session.session_id, session)
+        self.sessions[session.session_id] = session
+        return session
+
+    def read_session(self, session_id: str, **kwargs: Any) -> Optional[Session]:
+        return self.sessions.get(session_id)
+
+    def create_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        self._record('create_agent', session_id, session_agent)
+        self.agents[session_id, session_agent.agent_id] = session_agent
+
+    def read_agent(self, session_id: str, agent_id: str, **kwargs: Any) -> Optional[SessionAgent]:
+        return self.agents.get((session_id, agent_id))
+
+    def update_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        self._record('update_agent', session_id, session_agent)
+        self.agents[session_id, session_agent.agent_id] = session_agent
+
+    def create_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        self._record('create_message', session_id, session_message)
+        self.messages[session_id, agent_id, session_message.message_id] = session_message
+
+    def read_message(self, session_id: str, agent_id: str, message_id: int, **kwargs: Any) -> Optional[SessionMessage]:
+        return self.messages.get((session_id, agent_id, message_id))
+
+    def update_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        self._record('update_message', session_id, session_message)
+        self.messages[session_id, agent_id, session_message.message_id] = session_message
+
+    def list_messages(self, session_id: str, agent_id: str, limit: Optional[int] = None, offset: int = 0,
+                      **kwargs: Any) -> List[SessionMessage]:
+        found = sorted((key[2], message) for key, message in self.messages.items() if key[:2] == (session_id, agent_id))
+        return [message for _, message in found][offset:None if limit is None else offset + limit]
+
+    def close(self):
+        self.closed = True
+
+
+def _message(message_id: int, text: str) -> SessionMessage:
+    return SessionMessage({'role': 'user', 'content': [{'text': text}]}, message_id)
+
+
+def _agent(**state) -> SessionAgent:
+    return SessionAgent(agent_id='default', state=state, conversation_manager_state={})
+
+
+@pytest.fixture
+def backing():
+    return RecordingRepository()
+
+
+@pytest.fixture
+def repository(backing):
+    # A long flush interval keeps the background writer out of the way
+    repository = WriteBehindSessionRepository(backing, flush_interval=60)
+    yield repository
+    repository.close()
+
+
+def test_writes_are_queued_until_flushed(repository, backing):
+    repository.create_session(Session('abc', SessionType.AGENT))
+    repository.create_agent('abc', _agent())
+    repository.create_message('abc', 'default', _message(0, 'hi'))
+
+    assert backing.writes == []
+    assert repository.has_session('abc')
+    assert repository.get_stats()['pending'] == 3
+
+    repository.flush()
+    assert [write[0] for write in backing.writes] == ['create_session', 'create_agent', 'create_message']
+    assert repository.get_stats()['pending'] == 0
+
+
+def test_agent_syncs_collapse_to_latest(repository, backing):
+    repository.create_agent('abc', _agent(step=0))
+    repository.flush()
+    for step in range(1, 4):
+        repository.update_agent('abc', _agent(step=step))
+    repository.flush()
+
+    updates = [write for write in backing.writes if write[0] == 'update_agent']
+    assert len(updates) == 1
+    assert updates[0][2].state == {'step': 3}
+    assert repository.get_stats()['merged'] == 2
+
+
+def test_message_update_folds_into_queued_creation(repository, backing):
+    created = _message(0, 'card 4111 1111 1111 1111')
+    repository.create_message('abc', 'default', created)
+    repository.update_message('abc', 'default', _message(0, '[redacted]'))
+    repository.flush()
+
+    assert len(backing.writes) == 1
+    operation, _, message = backing.writes[0]
+    assert operation == 'create_message'
+    assert message.to_message()['content'] == [{'text': '[redacted]'}]
+    assert message.created_at == created.created_at
+
+
+def test_queued_records_are_snapshots(repository, backing):
+    message = _message(0, 'original')
+    repository.create_message('abc', 'default', message)
+    message.message['content'][0]['text'] = 'changed later'
+    repository.flush()
+
+    assert backing.writes[0][2].to_message()['content'] == [{'text': 'original'}]
+
+
+def test_reads_flush_only_their_session_first(repository, backing):
+    repository.create_message('abc', 'default', _message(0, 'mine'))
+    repository.create_message('other', 'default', _message(0, 'theirs'))
+
+    assert [message.to_message()['content'][0]['text'] for message in repository.list_messages('abc', 'default')] == [
+        'mine'
+    ]
+    assert [write[1] for write in backing.writes] == ['abc']
+    assert repository.get_stats()['read_flushes'] == 1
+    assert repository.get_stats()['pending_sessions'] == 1
+
+    assert repository.read_message('other', 'default', 0) is not None
+
+
+def test_failed_write_does_not_block_others(repository, backing):
+    backing.fail_on = 'create_agent'
+    repository.create_agent('abc', _agent())
+    repository.create_message('abc', 'default', _message(0, 'hi'))
+    repository.flush()
+
+    assert [write[0] for write in backing.writes] == ['create_message']
+    assert repository.get_stats()['errors'] == 1
+
+
+def test_full_queue_makes_writers_wait_for_the_writer(backing):
+    repository = WriteBehindSessionRepository(backing, flush_interval=60, max_pending=2)
+    try:
+        done = threading.Event()
+
+        def write_three():
+            for message_id in range(3):
+                repository.create_message('abc', 'default', _message(message_id, 'hi'))
+            done.set()
+
+        # Hold up the writer so the queue stays full until the third write has had to wait
+        with repository._io_lock:
+            threading.Thread(target=write_three, daemon=True).start()
+            deadline = time.monotonic() + 5
+            while not repository.get_stats()['blocked'] and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert not done.is_set()
+        assert done.wait(5)
+    finally:
+        repository.close()
+
+    assert len(backing.messages) == 3
+
+
+def test_close_flushes_and_closes_backing_repository(backing):
+    repository = WriteBehindSessionRepository(backing, flush_interval=60)
+    repository.create_message('abc', 'default', _message(0, 'hi'))
+    repository.close()
+
+    assert len(backing.writes) == 1
+    assert backing.closed
@@ -0,0 +1,121 @@
+"""Tool execution module for the Shopping Assistant Chatbot.
+
+This module runs the tool calls the model emits in a single step
+concurrently, except that tools touching the cart run one after another in
+the order the model emitted them, so "add X, then update its quantity" is
+never reordered. Timings for each batch are recorded to show how much wall
+clock time parallel execution saves.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, Iterable, List, Optional, Tuple
+from strands.tools.executors import ConcurrentToolExecutor
+
+if TYPE_CHECKING:
+    from strands import Agent
+
+logger = logging.getLogger(__name__)
+
+# Process-wide batch timing counters
+_totals = {'batches': 0, 'parallel_batches': 0, 'tool_calls': 0, 'tool_ms': 0.0, 'wall_ms': 0.0}
+_totals_lock = threading.Lock()
+
+
+class OrderedConcurrentToolExecutor(ConcurrentToolExecutor):
+    """Runs tool calls concurrently while keeping ordered tools in emission order."""
+
+    def __init__(self, ordered_tools: Iterable[str]):
+        """Initialize the executor.
+
+        Args:
+            ordered_tools: Names of tools that must run one at a time in emitted order
+        """
+        super().__init__()
+        self.ordered_tools = frozenset(ordered_tools)
+
+        # Per-batch ordering and timing state. An agent runs one batch at a
+        # time, so these are reset at the start of each _execute call.
+        self._order: Dict[int, Tuple[Optional[asyncio.Event], asyncio.Event]] = {}
+        self._tool_ms: List[float] = []
+
+    async def _execute(self, agent: "Agent", tool_uses: List[Dict[str, Any]], tool_results: List[Dict[str, Any]],
+                       cycle_trace: Any, cycle_span: Any, invocation_state: Dict[str, Any],
+                       structured_output_context: Any = None) -> AsyncGenerator[Any, None]:
+        """Execute a batch of tool calls, chaining the ordered ones.
+
+        Yields:
+            Events from the tool execution stream
+        """
+        # Each ordered tool waits for the previous ordered tool in the batch
+        self._order = {}
+        previous = None
+        for task_id, tool_use in enumerate(tool_uses):
+            if tool_use.get('name') in self.ordered_tools:
+                finished = asyncio.Event()
+                self._order[task_id] = (previous, finished)
+                previous = finished
+        self._tool_ms = []
+
+        start = time.perf_counter()
+        try:
+            async for event in super()._execute(
+                agent, tool_uses, tool_results, cycle_trace, cycle_span, invocation_state, structured_output_context
+            ):
+                yield event
+        finally:
+            self._record_batch(len(tool_uses), (time.perf_counter() - start) * 1000)
+
+    async def _task(self, agent: "Agent", tool_use: Dict[str, Any], tool_results: List[Dict[str, Any]],
+                    cycle_trace: Any, cycle_span: Any, invocation_state: Dict[str, Any], task_id: int,
+                    task_queue: asyncio.Queue, task_event: asyncio.Event, stop_event: object,
+                    structured_output_context: Any) -> None:
+        """Execute a single tool call once any earlier ordered call has finished."""
+        previous, finished = self._order.get(task_id, (None, None))
+        try:
+            if previous is not None:
+                await previous.wait()
+
+            start = time.perf_counter()
+            await super()._task(
+                agent, tool_use, tool_results, cycle_trace, cycle_span, invocation_state, task_id,
+                task_queue, task_event, stop_event, structured_output_context
+            )
+            self._tool_ms.append((time.perf_counter() - start) * 1000)
+        finally:
+            if finished is not None:
+                finished.set()
+
+    def _record_batch(self, tool_calls: int, wall_ms: float):
+        """Accumulate timing for a finished batch."""
+        tool_ms = sum(self._tool_ms)
+        with _totals_lock:
+            _totals['batches'] += 1
+            _totals['parallel_batches'] += int(tool_calls > 1)
+            _totals['tool_calls'] += tool_calls
+            _totals['tool_ms'] += tool_ms
+            _totals['wall_ms'] += wall_ms
+
+        if tool_calls > 1:
+            logger.debug(f"Ran {tool_calls} tool calls in {wall_ms:.1f}ms (sequential total {tool_ms:.1f}ms)")
+
+
+def get_tool_execution_stats() -> Dict[str, Any]:
+    """Get process-wide tool execution statistics.
+
+    Returns:
+        Dictionary of batch counts, summed tool time, wall clock time and time saved by running in parallel
+    """
+    with _totals_lock:
+        totals = dict(_totals)
+
+    return {
+        'batches': totals['batches'],
+        'parallel_batches': totals['parallel_batches'],
+        'tool_calls': totals['tool_calls'],
+        'tool_ms': round(totals['tool_ms'], 2),
+        'wall_ms': round(totals['wall_ms'], 2),
+        'saved_ms': round(max(0.0, totals['tool_ms'] - totals['wall_ms']), 2)
+    }
@@ -3,21 +3,191 @@
 This module provides tools that allow the agent to interact with the backend e-commerce API.
 """
 
+import contextvars
 import logging
+import random
+import re
+import threading
+import time
 import requests
-from typing import Dict, List, Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from requests.adapters import HTTPAdapter
 from strands import tool
+from chatbot.cart_mirror import (
+    CartMirror,
+    CartMirrors,
+    cart_totals,
+    current_cart_session,
+    record_read,
+    version_from_etag
+)
+from chatbot.catalog_cache import CatalogCache
 from chatbot.config import get_config
+from chatbot.metrics import BACKEND_REQUEST_SECONDS
+from chatbot.recommendations import RecommendationEngine, RecommendationsNotReadyError
+from chatbot.search_index import ProductSearchIndex
+from chatbot.tracing import start_span
 
 logger = logging.getLogger(__name__)
 
 
-def _make_api_request(method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+# HTTP methods that are safe to retry because repeating them has the same effect
+_IDEMPOTENT_METHODS = {'GET', 'PUT', 'DELETE'}
+
+# Status codes that indicate a transient backend failure worth retrying
+_RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+# Numeric path segments collapsed into "{id}" when grouping endpoint stats
+_NUMERIC_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+# Number of recent latency samples kept per endpoint for percentile estimates
+_LATENCY_SAMPLE_SIZE = 256
+
+# Shared HTTP session for backend API calls
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+# Shared catalog cache for product list and product detail lookups
+_catalog_cache: Optional[CatalogCache] = None
+_catalog_cache_lock = threading.Lock()
+
+# Bounded pool for fetching several products in parallel (created lazily from configuration)
+_fanout_executor: Optional[ThreadPoolExecutor] = None
+_fanout_executor_lock = threading.Lock()
+
+# In-memory search index over the cached product list
+_search_index = ProductSearchIndex()
+
+# Precomputed recommendation model (created lazily from configuration)
+_recommender: Optional[RecommendationEngine] = None
+_recommender_lock = threading.Lock()
+
+# Per-session cart mirrors (created lazily from configuration)
+_cart_mirrors: Optional[CartMirrors] = None
+_cart_mirrors_lock = threading.Lock()
+
+# Product fields kept for cart items, as returned by GET /api/cart
+_CART_PRODUCT_FIELDS = ('id', 'emoji', 'name', 'price', 'description')
+
+# Most changes accepted in one apply_cart_changes call (matches the backend's batch limit)
+_MAX_CART_CHANGES = 50
+
+# Per-endpoint latency statistics
+_endpoint_stats: Dict[str, Dict[str, Any]] = {}
+_endpoint_stats_lock = threading.Lock()
+
+
+def _get_http_session() -> requests.Session:
+    """Get the shared, pooled HTTP session for the backend API.
+
+    Returns:
+        requests.Session with a keep-alive connection pool mounted
+    """
+    global _http_session
+
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                config = get_config()
+                adapter = HTTPAdapter(
+                    pool_connections=config.backend_pool_size,
+                    pool_maxsize=config.backend_pool_size
+                )
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _http_session = session
+
+    return _http_session
+
+
+def _endpoint_key(method: str, endpoint: str) -> str:
+    """Normalize an endpoint into a stats key with numeric IDs collapsed.
+
+    Args:
+        method: HTTP method
+        endpoint: API endpoint path
+
+    Returns:
+        Key such as "GET /api/products/{id}"
+    """
+    return f"{method} {_NUMERIC_SEGMENT.sub('/{id}', endpoint)}"
+
+
+def _record_latency(method: str, endpoint: str, elapsed_ms: float, error: bool, retries: int):
+    """Record the outcome of a backend API call.
+
+    Args:
+        method: HTTP method
+        endpoint: API endpoint path
+        elapsed_ms: Total time spent on the call including retries
+        error: Whether the call ultimately failed
+        retries: Number of retries performed
+    """
+    key = _endpoint_key(method, endpoint)
+    BACKEND_REQUEST_SECONDS.observe(
+        elapsed_ms / 1000,
+        method=method,
+        endpoint=_NUMERIC_SEGMENT.sub('/{id}', endpoint),
+        outcome='error' if error else 'success'
+    )
+    with _endpoint_stats_lock:
+        stats = _endpoint_stats.get(key)
+        if stats is None:
+            stats = _endpoint_stats[key] = {
+                'count': 0,
+                'errors': 0,
+                'retries': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'samples': deque(maxlen=_LATENCY_SAMPLE_SIZE)
+            }
+        stats['count'] += 1
+        stats['errors'] += int(error)
+        stats['retries'] += retries
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        stats['samples'].append(elapsed_ms)
+
+
+def get_api_stats() -> Dict[str, Dict[str, Any]]:
+    """Get per-endpoint latency statistics for backend API calls.
+
+    Returns:
+        Dictionary keyed by "METHOD /path" with counts and latency figures in milliseconds
+    """
+    with _endpoint_stats_lock:
+        snapshot = {key: dict(stats, samples=sorted(stats['samples'])) for key, stats in _endpoint_stats.items()}
+
+    result = {}
+    for key, stats in snapshot.items():
+        samples = stats['samples']
+        result[key] = {
+            'count': stats['count'],
+            'errors': stats['errors'],
+            'retries': stats['retries'],
+            'avg_ms': round(stats['total_ms'] / stats['count'], 2),
+            'p50_ms': round(samples[int(0.50 * (len(samples) - 1))], 2),
+            'p95_ms': round(samples[int(0.95 * (len(samples) - 1))], 2),
+            'max_ms': round(stats['max_ms'], 2)
+        }
+    return result
+
+
+def _make_api_request(method: str, endpoint: str, response_headers: Optional[Dict[str, str]] = None,
+                      **kwargs) -> Dict[str, Any]:
     """Make an API request to the backend with error handling.
     
+    Requests go through a shared keep-alive connection pool. Idempotent
+    methods (GET, PUT, DELETE) are retried with jittered exponential backoff
+    on timeouts, connection errors and 502/503/504 responses.
+    
     Args:
         method: HTTP method (GET, POST, PUT, DELETE)
         endpoint: API endpoint path
+        response_headers: Optional dictionary filled with the final response's headers
         **kwargs: Additional arguments to pass to requests
     
     Returns:
@@ -25,44 +195,367 @@ def _make_api_request(method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
     """
     config = get_config()
     url = f"{config.backend_api_url}{endpoint}"
+    session = _get_http_session()
+    timeout = (config.backend_connect_timeout, config.backend_read_timeout)
+    max_retries = config.backend_max_retries if method.upper() in _IDEMPOTENT_METHODS else 0
     
-    try:
-        logger.info(f"Making {method} request to {url}")
-        response = requests.request(method, url, timeout=10, **kwargs)
-        response.raise_for_status()
-        
-        # Return JSON response if available
+    attempt = 0
+    started = time.perf_counter()
+    result: Dict[str, Any] = {}
+    request_span = start_span(f"backend {method} {_NUMERIC_SEGMENT.sub('/{id}', endpoint)}", endpoint=endpoint)
+    
+    while True:
+        retryable = False
         try:
-            return response.json()
-        except ValueError:
-            return {"message": "Success", "status_code": response.status_code}
-    
-    except requests.exceptions.Timeout:
-        error_msg = f"Request to {url} timed out"
-        logger.error(error_msg)
-        return {"error": error_msg, "error_type": "network"}
-    
-    except requests.exceptions.ConnectionError:
-        error_msg = f"Could not connect to backend API at {url}"
-        logger.error(error_msg)
-        return {"error": error_msg, "error_type": "network"}
-    
-    except requests.exceptions.HTTPError as e:
-        error_msg = f"API returned error: {e.response.status_code}"
-        if e.response.text:
+            logger.info(f"Making {method} request to {url}", extra={'category': 'backend'})
+            response = session.request(method, url, timeout=timeout, **kwargs)
+            if response_headers is not None:
+                response_headers.clear()
+                response_headers.update(response.headers)
+            response.raise_for_status()
+            
+            # Return JSON response if available
             try:
-                error_data = e.response.json()
-                error_msg = error_data.get('error', error_msg)
+                result = response.json()
             except ValueError:
-                error_msg = e.response.text
+                result = {"message": "Success", "status_code": response.status_code}
+        
+        except requests.exceptions.Timeout:
+            error_msg = f"Request to {url} timed out"
+            logger.error(error_msg)
+            result = {"error": error_msg, "error_type": "network"}
+            retryable = True
+        
+        except requests.exceptions.ConnectionError:
+            error_msg = f"Could not connect to backend API at {url}"
+            logger.error(error_msg)
+            result = {"error": error_msg, "error_type": "network"}
+            retryable = True
+        
+        except requests.exceptions.HTTPError as e:
+            error_msg = f"API returned error: {e.response.status_code}"
+            if e.response.text:
+                try:
+                    error_data = e.response.json()
+                    error_msg = error_data.get('error', error_msg)
+                except ValueError:
+                    error_msg = e.response.text
+            
+            logger.error(f"HTTP error: {error_msg}")
+            result = {"error": error_msg, "error_type": "api", "status_code": e.response.status_code}
+            retryable = e.response.status_code in _RETRYABLE_STATUS_CODES
         
-        logger.error(f"HTTP error: {error_msg}")
-        return {"error": error_msg, "error_type": "api", "status_code": e.response.status_code}
+        except Exception as e:
+            error_msg = f"Unexpected error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            result = {"error": error_msg, "error_type": "unknown"}
+        
+        if not retryable or attempt >= max_retries:
+            break
+        
+        # Full-jitter exponential backoff
+        delay = random.uniform(0, config.backend_retry_backoff * (2 ** attempt))
+        attempt += 1
+        logger.warning(f"Retrying {method} {url} in {delay:.2f}s (attempt {attempt} of {max_retries})")
+        time.sleep(delay)
     
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return {"error": error_msg, "error_type": "unknown"}
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _record_latency(method, endpoint, elapsed_ms, 'error' in result, attempt)
+    if request_span is not None:
+        request_span.set_attribute('retries', attempt)
+        if 'error' in result:
+            request_span.status = 'error'
+            request_span.set_attribute('error', result['error'])
+        request_span.finish()
+    return result
+
+
+def _load_catalog_endpoint(endpoint: str, etag: Optional[str]) -> Tuple[Any, Optional[str], bool]:
+    """Fetch a catalog endpoint, revalidating with If-None-Match when an ETag is known.
+    
+    Args:
+        endpoint: Catalog endpoint path
+        etag: ETag of the cached copy, if any
+    
+    Returns:
+        Tuple of (response data, response ETag, whether the backend answered 304 Not Modified)
+    """
+    headers = {'If-None-Match': etag} if etag else {}
+    response_headers: Dict[str, str] = {}
+    result = _make_api_request('GET', endpoint, response_headers=response_headers, headers=headers)
+    
+    if isinstance(result, dict) and result.get('status_code') == 304:
+        return None, etag, True
+    
+    return result, response_headers.get('ETag'), False
+
+
+def _get_catalog_cache() -> CatalogCache:
+    """Get the shared catalog cache, creating it on first use.
+    
+    Returns:
+        CatalogCache for product list and product detail endpoints
+    """
+    global _catalog_cache
+    
+    if _catalog_cache is None:
+        with _catalog_cache_lock:
+            if _catalog_cache is None:
+                config = get_config()
+                _catalog_cache = CatalogCache(
+                    loader=_load_catalog_endpoint,
+                    ttl=config.catalog_cache_ttl_seconds,
+                    stale_ttl=config.catalog_cache_stale_seconds,
+                    max_entries=config.catalog_cache_max_entries
+                )
+    
+    return _catalog_cache
+
+
+def invalidate_catalog_cache(product_id: Optional[int] = None):
+    """Invalidate cached catalog data.
+    
+    Args:
+        product_id: Product whose details (and the product list) should be dropped;
+            when omitted the whole catalog cache is cleared
+    """
+    cache = _get_catalog_cache()
+    if product_id is None:
+        cache.invalidate()
+    else:
+        cache.invalidate(f'/api/products/{product_id}')
+        cache.invalidate('/api/products')
+
+
+def get_catalog_cache_stats() -> Dict[str, Any]:
+    """Get catalog cache statistics.
+    
+    Returns:
+        Dictionary of catalog cache hit/miss counters
+    """
+    return _get_catalog_cache().get_stats()
+
+
+def _get_fanout_executor() -> ThreadPoolExecutor:
+    """Get the shared fan-out thread pool, creating it on first use.
+    
+    Returns:
+        ThreadPoolExecutor bounded by BACKEND_FANOUT_WORKERS
+    """
+    global _fanout_executor
+    
+    if _fanout_executor is None:
+        with _fanout_executor_lock:
+            if _fanout_executor is None:
+                _fanout_executor = ThreadPoolExecutor(
+                    max_workers=get_config().backend_fanout_workers,
+                    thread_name_prefix='backend-fanout'
+                )
+    
+    return _fanout_executor
+
+
+def _fetch_product_details(product_ids: List[int]) -> Dict[int, Any]:
+    """Fetch several products' details, in parallel for those not already cached.
+    
+    Args:
+        product_ids: IDs of the products to fetch
+    
+    Returns:
+        Dictionary mapping each product ID to its details or an error dict
+    """
+    cache = _get_catalog_cache()
+    endpoints = {product_id: f'/api/products/{product_id}' for product_id in product_ids}
+    
+    # Cached entries are served inline; only misses take a pool thread (carrying the trace context)
+    missing = [product_id for product_id, endpoint in endpoints.items() if cache.peek(endpoint) is None]
+    futures = {
+        product_id: _get_fanout_executor().submit(contextvars.copy_context().run, cache.get, endpoints[product_id])
+        for product_id in missing
+    }
+    
+    results = {}
+    for product_id, endpoint in endpoints.items():
+        future = futures.get(product_id)
+        results[product_id] = future.result() if future else cache.get(endpoint)
+    
+    return results
+
+
+def _load_recommendation_data() -> Tuple[List[Dict[str, Any]], Dict[int, List[Dict[str, Any]]], List[int]]:
+    """Fetch the catalog, every product's reviews and the cart for the recommendation model.
+    
+    Returns:
+        Tuple of (products, reviews keyed by product ID, product IDs in the cart)
+    
+    Raises:
+        RuntimeError: If the product list cannot be retrieved
+    """
+    cache = _get_catalog_cache()
+    products = cache.get('/api/products')
+    if 'error' in products:
+        raise RuntimeError(f"Could not load products: {products['error']}")
+    
+    details = _fetch_product_details([product.get('id') for product in products])
+    reviews = {
+        product_id: result.get('reviews', [])
+        for product_id, result in details.items() if 'error' not in result
+    }
+    
+    cart = _make_api_request('GET', '/api/cart')
+    cart_product_ids = [item.get('product_id') for item in cart] if isinstance(cart, list) else []
+    
+    return products, reviews, cart_product_ids
+
+
+def _get_recommender() -> RecommendationEngine:
+    """Get the shared recommendation engine, creating it on first use.
+    
+    Returns:
+        RecommendationEngine fed from the catalog cache
+    """
+    global _recommender
+    
+    if _recommender is None:
+        with _recommender_lock:
+            if _recommender is None:
+                config = get_config()
+                _recommender = RecommendationEngine(
+                    loader=_load_recommendation_data,
+                    refresh_interval=config.recommendation_refresh_seconds,
+                    max_baskets=config.recommendation_max_baskets
+                )
+    
+    return _recommender
+
+
+def start_recommendations():
+    """Start building the recommendation model in the background.
+    
+    Called at server startup so the first recommend_products call finds a
+    model instead of waiting for the catalog and reviews to load.
+    """
+    _get_recommender().start()
+
+
+def get_recommendation_stats() -> Dict[str, Any]:
+    """Get recommendation engine statistics.
+    
+    Returns:
+        Dictionary of model build and request counters
+    """
+    return _get_recommender().get_stats()
+
+
+def _get_cart_mirrors() -> Optional[CartMirrors]:
+    """Get the per-session cart mirrors, creating them on first use.
+    
+    Returns:
+        CartMirrors, or None when CART_MIRROR_TTL_SECONDS is 0
+    """
+    global _cart_mirrors
+    
+    config = get_config()
+    if config.cart_mirror_ttl_seconds <= 0:
+        return None
+    
+    if _cart_mirrors is None:
+        with _cart_mirrors_lock:
+            if _cart_mirrors is None:
+                _cart_mirrors = CartMirrors(config.cart_mirror_ttl_seconds, config.cart_mirror_max_sessions)
+    
+    return _cart_mirrors
+
+
+def _session_cart_mirror() -> Optional[CartMirror]:
+    """Get the cart mirror of the session whose turn is running, if any."""
+    session_id = current_cart_session()
+    mirrors = _get_cart_mirrors()
+    return mirrors.get(session_id) if session_id is not None and mirrors is not None else None
+
+
+def get_cart_mirror_stats() -> Dict[str, Any]:
+    """Get cart mirror statistics.
+    
+    Returns:
+        Dictionary of mirrored sessions, cart reads by source and reconciles, or {'enabled': False}
+    """
+    mirrors = _get_cart_mirrors()
+    return dict(mirrors.get_stats(), enabled=True) if mirrors is not None else {'enabled': False}
+
+
+def _fetch_cart(mirror: Optional[CartMirror]) -> Any:
+    """Get the cart items, from the session's mirror while it is fresh.
+    
+    An expired mirror is revalidated with the backend by cart version, and a
+    changed or missing one is reloaded.
+    
+    Args:
+        mirror: The session's cart mirror, or None to read the backend directly
+    
+    Returns:
+        List of cart items, or an error dict
+    """
+    if mirror is None:
+        record_read('backend')
+        return _make_api_request('GET', '/api/cart')
+    
+    with mirror.lock:
+        if mirror.fresh:
+            record_read('mirror')
+            return mirror.snapshot()
+        
+        headers = {'If-None-Match': f'"{mirror.version}"'} if mirror.loaded and mirror.version else {}
+        response_headers: Dict[str, str] = {}
+        result = _make_api_request('GET', '/api/cart', response_headers=response_headers, headers=headers)
+        
+        if isinstance(result, dict) and result.get('status_code') == 304 and mirror.loaded:
+            mirror.touch()
+            record_read('revalidated')
+            return mirror.snapshot()
+        
+        record_read('backend')
+        if isinstance(result, list):
+            mirror.load(result, version_from_etag(response_headers.get('ETag')))
+        else:
+            mirror.invalidate()
+        return result
+
+
+def _cart_product(product_id: int) -> Optional[Dict[str, Any]]:
+    """Get a product's details as they appear in cart items, from the catalog cache."""
+    product = _get_catalog_cache().get(f'/api/products/{product_id}')
+    if not isinstance(product, dict) or 'error' in product:
+        return None
+    return {field: product.get(field) for field in _CART_PRODUCT_FIELDS}
+
+
+def _sync_cart_mirror(mirror: Optional[CartMirror], change: Dict[str, Any],
+                      apply: Callable[[CartMirror], bool]) -> str:
+    """Apply an accepted cart mutation to the session's mirror and describe the new cart.
+    
+    The mutation is applied locally when the mirror was current before it;
+    otherwise the cart is reloaded once to reconcile.
+    
+    Args:
+        mirror: The session's cart mirror, if any
+        change: Backend response of the mutation, with the cart versions before and after it
+        apply: Applies the mutation's effect to the mirror, returning False if it cannot
+    
+    Returns:
+        Sentence with the cart's item count and total, or an empty string if unknown
+    """
+    if mirror is None:
+        return ""
+    
+    with mirror.lock:
+        if not (mirror.confirm(change) and apply(mirror)):
+            mirror.invalidate()
+            if not isinstance(_fetch_cart(mirror), list):
+                return ""
+        units, total = mirror.totals()
+    
+    return f" Your cart now has {units} item(s), total ${total:.2f}."
 
 
 @tool
@@ -72,9 +565,9 @@ def list_products() -> str:
     Returns:
         A formatted string containing all products with their details.
     """
-    logger.info("Tool invoked: list_products")
+    logger.info("Tool invoked: list_products", extra={'category': 'tool'})
     
-    result = _make_api_request('GET', '/api/products')
+    result = _get_catalog_cache().get('/api/products')
     
     if 'error' in result:
         return f"I'm sorry, I couldn't retrieve the products right now. Error: {result['error']}"
@@ -105,9 +598,9 @@ def get_product_details(product_id: int) -> str:
     Returns:
         A formatted string containing product details and reviews.
     """
-    logger.info(f"Tool invoked: get_product_details with product_id={product_id}")
+    logger.info(f"Tool invoked: get_product_details with product_id={product_id}", extra={'category': 'tool'})
     
-    result = _make_api_request('GET', f'/api/products/{product_id}')
+    result = _get_catalog_cache().get(f'/api/products/{product_id}')
     
     if 'error' in result:
         if result.get('status_code') == 404:
@@ -115,7 +608,8 @@ def get_product_details(product_id: int) -> str:
         return f"I'm sorry, I couldn't retrieve the product details. Error: {result['error']}"
     
     # Format product details
-    product = result.get('product', {})
+    # Backend API returns product fields directly with a 'reviews' list (flat structure)
+    product = result.get('product', result)
     reviews = result.get('reviews', [])
     
     details_text = (
@@ -140,6 +634,111 @@ def get_product_details(product_id: int) -> str:
     return details_text
 
 
+@tool
+def search_products(query: str, max_price: Optional[float] = None, limit: int = 5) -> str:
+    """Search the catalog for products matching a description.
+    
+    Use this instead of list_products when the customer is looking for something specific.
+    
+    Args:
+        query: Words describing the product (e.g. "wireless headphones")
+        max_price: Only include products at or below this price
+        limit: Maximum number of matches to return (default 5)
+    
+    Returns:
+        A formatted string containing the best matching products.
+    """
+    logger.info(f"Tool invoked: search_products with query={query!r}, max_price={max_price}, limit={limit}",
+                extra={'category': 'tool'})
+    
+    result = _get_catalog_cache().get('/api/products')
+    
+    if 'error' in result:
+        return f"I'm sorry, I couldn't search the products right now. Error: {result['error']}"
+    
+    # Re-indexes only products that changed since the cached list was last seen
+    _search_index.sync(result)
+    matches = _search_index.search(query, max_price=max_price, limit=max(1, min(limit, 20)))
+    
+    if not matches:
+        price_note = f" under ${max_price:.2f}" if max_price is not None else ""
+        return f"I couldn't find any products matching \"{query}\"{price_note}."
+    
+    # Format matches for display
+    products_text = f"Products matching \"{query}\":\n\n"
+    for product in matches:
+        products_text += (
+            f"{product.get('emoji', '📦')} {product.get('name', 'Unknown')} - "
+            f"${product.get('price', 0):.2f}\n"
+            f"   {product.get('description', 'No description available')}\n"
+            f"   Product ID: {product.get('id')}\n\n"
+        )
+    
+    return products_text
+
+
+@tool
+def get_products_details(product_ids: List[int]) -> str:
+    """Get details for several products at once, as a comparison table.
+    
+    Use this instead of calling get_product_details repeatedly when comparing products.
+    
+    Args:
+        product_ids: The IDs of the products to compare
+    
+    Returns:
+        A formatted comparison of the products' prices, ratings and descriptions.
+    """
+    logger.info(f"Tool invoked: get_products_details with product_ids={product_ids}", extra={'category': 'tool'})
+    
+    # Keep the caller's order but fetch each product once
+    unique_ids = list(dict.fromkeys(product_ids))[:20]
+    if not unique_ids:
+        return "Please tell me which products you'd like to compare."
+    
+    results = _fetch_product_details(unique_ids)
+    
+    # Format comparison table
+    rows = []
+    notes = []
+    missing = []
+    for product_id in unique_ids:
+        result = results[product_id]
+        if 'error' in result:
+            if result.get('status_code') == 404:
+                missing.append(str(product_id))
+            else:
+                notes.append(f"Product ID {product_id}: couldn't retrieve details ({result['error']})")
+            continue
+        
+        product = result.get('product', result)
+        reviews = result.get('reviews', [])
+        if reviews:
+            average = sum(review.get('rating', 0) for review in reviews) / len(reviews)
+            rating = f"{average:.1f}/5 ({len(reviews)})"
+        else:
+            rating = "No reviews"
+        
+        rows.append(
+            f"| {product.get('emoji', '📦')} {product.get('name', 'Unknown Product')} | "
+            f"${product.get('price', 0):.2f} | {rating} | {product_id} |"
+        )
+        notes.append(f"{product.get('name', 'Unknown Product')}: {product.get('description', 'No description available')}")
+    
+    if missing:
+        notes.append(f"No products found with ID(s): {', '.join(missing)}")
+    
+    if not rows:
+        return "I couldn't retrieve any of those products.\n" + "\n".join(notes)
+    
+    comparison_text = (
+        "| Product | Price | Rating (reviews) | Product ID |\n"
+        "|---|---|---|---|\n" + "\n".join(rows) + "\n\n" + "\n".join(notes)
+    )
+    
+    return comparison_text
+
+
 @tool
 def get_cart() -> str:
     """View the current shopping cart contents.
@@ -147,9 +746,9 @@ def get_cart() -> str:
     Returns:
         A formatted string containing cart items with product details and quantities.
     """
-    logger.info("Tool invoked: get_cart")
+    logger.info("Tool invoked: get_cart", extra={'category': 'tool'})
     
-    result = _make_api_request('GET', '/api/cart')
+    result = _fetch_cart(_session_cart_mirror())
     
     if 'error' in result:
         return f"I'm sorry, I couldn't retrieve your cart. Error: {result['error']}"
@@ -157,6 +756,8 @@ def get_cart() -> str:
     if not result or len(result) == 0:
         return "Your shopping cart is empty."
     
+    _get_recommender().record_basket(item.get('product_id') for item in result)
+    
     # Format cart items
     cart_text = "Your Shopping Cart:\n\n"
     total = 0.0
@@ -181,6 +782,55 @@ def get_cart() -> str:
     return cart_text
 
 
+@tool
+def recommend_products(product_id: Optional[int] = None, limit: int = 3) -> str:
+    """Recommend products, either related to one product or to the current cart.
+    
+    Args:
+        product_id: Product to find related items for; when omitted, recommendations
+            are based on the customer's cart (or the best rated products if it is empty)
+        limit: Maximum number of recommendations (default 3)
+    
+    Returns:
+        A formatted string containing recommended products and why they fit.
+    """
+    logger.info(f"Tool invoked: recommend_products with product_id={product_id}, limit={limit}",
+                extra={'category': 'tool'})
+    
+    if product_id is not None:
+        seed_ids = [product_id]
+    else:
+        cart = _fetch_cart(_session_cart_mirror())
+        if 'error' in cart:
+            return f"I'm sorry, I couldn't retrieve your cart for recommendations. Error: {cart['error']}"
+        seed_ids = [item.get('product_id') for item in cart]
+        _get_recommender().record_basket(seed_ids)
+    
+    try:
+        recommendations = _get_recommender().recommend(seed_ids, limit=max(1, min(limit, 10)))
+    except RecommendationsNotReadyError:
+        return "I'm still preparing recommendations. Please ask again in a moment."
+    except Exception as e:
+        logger.error(f"Recommendation failed: {str(e)}", exc_info=True)
+        return f"I'm sorry, I couldn't generate recommendations right now. Error: {str(e)}"
+    
+    if not recommendations:
+        return "I don't have any recommendations to offer right now."
+    
+    # Format recommendations
+    recommendations_text = "Recommended products:\n\n"
+    for recommendation in recommendations:
+        product = recommendation['product']
+        recommendations_text += (
+            f"{product.get('emoji', '📦')} {product.get('name', 'Unknown')} - "
+            f"${product.get('price', 0):.2f}\n"
+            f"   Why: {recommendation['reason']}\n"
+            f"   Product ID: {product.get('id')}\n\n"
+        )
+    
+    return recommendations_text
+
+
 @tool
 def add_to_cart(product_id: int, quantity: int = 1) -> str:
     """Add a product to the shopping cart.
@@ -192,11 +842,13 @@ def add_to_cart(product_id: int, quantity: int = 1) -> str:
     Returns:
         A confirmation message.
     """
-    logger.info(f"Tool invoked: add_to_cart with product_id={product_id}, quantity={quantity}")
+    logger.info(f"Tool invoked: add_to_cart with product_id={product_id}, quantity={quantity}",
+                extra={'category': 'tool'})
     
     if quantity <= 0:
         return "The quantity must be greater than 0."
     
+    mirror = _session_cart_mirror()
     result = _make_api_request(
         'POST',
         '/api/cart',
@@ -208,7 +860,9 @@ def add_to_cart(product_id: int, quantity: int = 1) -> str:
             return f"I couldn't find a product with ID {product_id}. Please check the product ID and try again."
         return f"I'm sorry, I couldn't add the item to your cart. Error: {result['error']}"
     
-    return f"Successfully added {quantity} item(s) to your cart! (Product ID: {product_id})"
+    cart_note = _sync_cart_mirror(mirror, result, lambda cart: cart.apply_add(
+        product_id, quantity, result.get('id'), lambda: _cart_product(product_id)))
+    return f"Successfully added {quantity} item(s) to your cart! (Product ID: {product_id}){cart_note}"
 
 
 @tool
@@ -222,11 +876,13 @@ def update_cart_item(cart_item_id: int, quantity: int) -> str:
     Returns:
         A confirmation message.
     """
-    logger.info(f"Tool invoked: update_cart_item with cart_item_id={cart_item_id}, quantity={quantity}")
+    logger.info(f"Tool invoked: update_cart_item with cart_item_id={cart_item_id}, quantity={quantity}",
+                extra={'category': 'tool'})
     
     if quantity <= 0:
         return "The quantity must be greater than 0. To remove an item, use the remove_from_cart function."
     
+    mirror = _session_cart_mirror()
     result = _make_api_request(
         'PUT',
         f'/api/cart/{cart_item_id}',
@@ -238,7 +894,8 @@ def update_cart_item(cart_item_id: int, quantity: int) -> str:
             return f"I couldn't find a cart item with ID {cart_item_id}. Please check your cart and try again."
         return f"I'm sorry, I couldn't update the cart item. Error: {result['error']}"
     
-    return f"Successfully updated cart item {cart_item_id} to quantity {quantity}!"
+    cart_note = _sync_cart_mirror(mirror, result, lambda cart: cart.apply_update(cart_item_id, quantity))
+    return f"Successfully updated cart item {cart_item_id} to quantity {quantity}!{cart_note}"
 
 
 @tool
@@ -251,8 +908,9 @@ def remove_from_cart(cart_item_id: int) -> str:
     Returns:
         A confirmation message.
     """
-    logger.info(f"Tool invoked: remove_from_cart with cart_item_id={cart_item_id}")
+    logger.info(f"Tool invoked: remove_from_cart with cart_item_id={cart_item_id}", extra={'category': 'tool'})
     
+    mirror = _session_cart_mirror()
     result = _make_api_request('DELETE', f'/api/cart/{cart_item_id}')
     
     if 'error' in result:
@@ -260,15 +918,126 @@ def remove_from_cart(cart_item_id: int) -> str:
             return f"I couldn't find a cart item with ID {cart_item_id}. It may have already been removed."
         return f"I'm sorry, I couldn't remove the item from your cart. Error: {result['error']}"
     
-    return f"Successfully removed item {cart_item_id} from your cart!"
+    cart_note = _sync_cart_mirror(mirror, result, lambda cart: cart.apply_remove(cart_item_id))
+    return f"Successfully removed item {cart_item_id} from your cart!{cart_note}"
+
+
+def _validate_cart_change(index: int, change: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Check one apply_cart_changes entry and normalize it for the backend.
+    
+    Returns:
+        Tuple of (normalized operation, None) or (None, problem description)
+    """
+    label = f"Change {index}"
+    if not isinstance(change, dict) or change.get('op') not in ('add', 'update', 'remove'):
+        return None, f"{label}: op must be add, update or remove"
+    
+    op = change['op']
+    try:
+        if op == 'add':
+            operation = {'op': op, 'product_id': int(change['product_id']), 'quantity': int(change.get('quantity', 1))}
+        elif op == 'update':
+            operation = {'op': op, 'cart_item_id': int(change['cart_item_id']), 'quantity': int(change['quantity'])}
+        else:
+            operation = {'op': op, 'cart_item_id': int(change['cart_item_id'])}
+    except KeyError as e:
+        return None, f"{label}: {e.args[0]} is required for {op}"
+    except (TypeError, ValueError):
+        return None, f"{label}: IDs and quantities must be whole numbers"
+    
+    if operation.get('quantity', 1) <= 0:
+        hint = " To remove an item, use op remove." if op == 'update' else ""
+        return None, f"{label}: the quantity must be greater than 0.{hint}"
+    return operation, None
+
+
+@tool
+def apply_cart_changes(ops: List[Dict[str, Any]]) -> str:
+    """Apply several cart changes at once; either all of them take effect or none do.
+    
+    Use this instead of separate add_to_cart, update_cart_item and remove_from_cart
+    calls whenever a request changes more than one cart item.
+    
+    Args:
+        ops: Changes applied in order, each one of
+            {"op": "add", "product_id": 7, "quantity": 1},
+            {"op": "update", "cart_item_id": 3, "quantity": 2} or
+            {"op": "remove", "cart_item_id": 4}
+    
+    Returns:
+        A summary of every change and the updated cart total.
+    """
+    logger.info(f"Tool invoked: apply_cart_changes with {len(ops) if isinstance(ops, list) else 0} change(s)",
+                extra={'category': 'tool'})
+    
+    if not isinstance(ops, list) or not ops:
+        return "Please provide at least one cart change."
+    if len(ops) > _MAX_CART_CHANGES:
+        return f"I can apply at most {_MAX_CART_CHANGES} cart changes at once."
+    
+    operations = []
+    problems = []
+    for index, change in enumerate(ops, start=1):
+        operation, problem = _validate_cart_change(index, change)
+        if problem:
+            problems.append(problem)
+        else:
+            operations.append(operation)
+    if problems:
+        return "I didn't change your cart because some changes were invalid:\n" + "\n".join(problems)
+    
+    mirror = _session_cart_mirror()
+    result = _make_api_request('POST', '/api/cart/batch', json={'operations': operations})
+    
+    if 'error' in result:
+        if result.get('status_code') in (400, 404):
+            return f"I didn't change your cart: {result['error']}. Please check your cart and try again."
+        return f"I'm sorry, I couldn't update your cart. Error: {result['error']}"
+    
+    # The response carries the whole cart after the batch, so the mirror is replaced outright
+    items = result.get('cart', [])
+    if mirror is not None:
+        with mirror.lock:
+            mirror.load(items, result.get('version'))
+    
+    summary = f"Applied {len(operations)} cart change(s):\n"
+    for change in result.get('results', []):
+        name = change.get('name') or f"Product {change.get('product_id')}"
+        if change.get('op') == 'add':
+            summary += f"- Added {change.get('quantity')} x {name} (Cart Item ID: {change.get('cart_item_id')})\n"
+        elif change.get('op') == 'update':
+            summary += (
+                f"- Set {name} (Cart Item ID: {change.get('cart_item_id')}) to quantity {change.get('quantity')}\n"
+            )
+        else:
+            summary += f"- Removed {name} (Cart Item ID: {change.get('cart_item_id')})\n"
+    
+    units, total = cart_totals(items)
+    summary += f"Your cart now has {units} item(s), total ${total:.2f}."
+    
+    return summary
 
 
 # Export all tools as a list for easy registration
 ALL_TOOLS = [
     list_products,
+    search_products,
     get_product_details,
+    get_products_details,
+    recommend_products,
+    get_cart,
+    add_to_cart,
+    update_cart_item,
+    remove_from_cart,
+    apply_cart_changes
+]
+
+# Tools that read or change the cart; within a turn they run in the order the model emitted them
+CART_TOOLS = [
     get_cart,
+    recommend_products,
     add_to_cart,
     update_cart_item,
-    remove_from_cart
+    remove_from_cart,
+    apply_cart_changes
 ]
@@ -0,0 +1,492 @@
+"""Tracing module for the Shopping Assistant Chatbot.
+
+This module records a tree of timed spans for each chat request: the server
+handler, message processing, session lookup, model calls, tool calls, backend
+HTTP requests and session writes. The current span is carried in a context
+variable, so spans started in coroutines, asyncio tasks and worker threads
+(via asyncio.to_thread or copied contexts) attach to the right parent.
+Completed traces are kept in a bounded in-memory ring buffer for the
+/debug/traces endpoint and can also be appended to a JSONL file.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from strands.hooks import (
+    AfterModelCallEvent,
+    AfterToolCallEvent,
+    BeforeModelCallEvent,
+    BeforeToolCallEvent,
+    HookProvider,
+    HookRegistry
+)
+from chatbot.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Span that new spans in the current context are attached to
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('chatbot_current_span', default=None)
+
+
+def new_trace_id() -> str:
+    """Generate a trace ID.
+
+    Returns:
+        32-character hexadecimal trace ID
+    """
+    return uuid.uuid4().hex
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, trace_id: str, session_id: Optional[str]):
+        """Initialize an empty trace.
+
+        Args:
+            trace_id: Unique identifier for the trace
+            session_id: Conversation session the request belongs to
+        """
+        self.trace_id = trace_id
+        self.session_id = session_id
+        self.spans: List['Span'] = []
+        self.root: Optional['Span'] = None
+        self._lock = threading.Lock()
+
+    def add(self, span: 'Span'):
+        """Attach a span to the trace."""
+        with self._lock:
+            self.spans.append(span)
+            if self.root is None:
+                self.root = span
+
+    @property
+    def duration_ms(self) -> float:
+        """Duration of the root span (0 while it is still open)."""
+        return self.root.duration_ms if self.root else 0.0
+
+    def span_tree(self) -> Optional[Dict[str, Any]]:
+        """Build the nested span tree, children ordered by start time.
+
+        Returns:
+            Root span dictionary with nested 'children', or None if the trace is empty
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        nodes = {span.span_id: dict(span.to_dict(), children=[]) for span in spans}
+        for span in sorted(spans, key=lambda span: span.start):
+            parent = nodes.get(span.parent_id)
+            if parent is not None:
+                parent['children'].append(nodes[span.span_id])
+        return nodes.get(self.root.span_id) if self.root else None
+
+    def critical_path(self) -> List[Dict[str, Any]]:
+        """Find the chain of spans that determined the trace's duration.
+
+        Walking back from each span's end, the child that finished last is on
+        the critical path, then the child that finished last before that one
+        started, and so on; children running in parallel with a critical child
+        are skipped. Each critical child is expanded the same way.
+
+        Returns:
+            List of {'name', 'depth', 'start_offset_ms', 'duration_ms', 'self_ms'} in start order,
+            where self_ms is time not covered by critical children
+        """
+        with self._lock:
+            spans = [span for span in self.spans if span.end is not None]
+        if self.root is None or self.root.end is None:
+            return []
+
+        children: Dict[str, List[Span]] = {}
+        for span in spans:
+            children.setdefault(span.parent_id, []).append(span)
+
+        path: List[Dict[str, Any]] = []
+
+        def visit(span: Span, depth: int):
+            critical = []
+            cursor = span.end
+            for child in sorted(children.get(span.span_id, []), key=lambda child: child.end, reverse=True):
+                if child.end <= cursor:
+                    critical.append(child)
+                    cursor = child.start
+            critical.reverse()
+
+            covered_ms = sum(child.duration_ms for child in critical)
+            path.append({
+                'name': span.name,
+                'depth': depth,
+                'start_offset_ms': round((span.start - self.root.start) * 1000, 2),
+                'duration_ms': round(span.duration_ms, 2),
+                'self_ms': round(max(0.0, span.duration_ms - covered_ms), 2)
+            })
+            for child in critical:
+                visit(child, depth + 1)
+
+        visit(self.root, 0)
+        return path
+
+    def summary(self, include_spans: bool = True) -> Dict[str, Any]:
+        """Summarize the trace for the /debug/traces endpoint.
+
+        Args:
+            include_spans: Whether to include the full span tree
+
+        Returns:
+            Dictionary of trace fields, critical path and optionally the span tree
+        """
+        root = self.root
+        result = {
+            'trace_id': self.trace_id,
+            'session_id': self.session_id,
+            'name': root.name if root else None,
+            'start_time': root.start_time if root else None,
+            'duration_ms': round(self.duration_ms, 2),
+            'status': root.status if root else None,
+            'span_count': len(self.spans),
+            'critical_path': self.critical_path()
+        }
+        if include_spans:
+            result['spans'] = self.span_tree()
+        return result
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    def __init__(self, name: str, trace: Trace, parent_id: Optional[str], attributes: Dict[str, Any]):
+        """Start a span.
+
+        Args:
+            name: Operation name
+            trace: Trace the span belongs to
+            parent_id: ID of the parent span, or None for the root
+            attributes: Initial span attributes
+        """
+        self.name = name
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = 'ok'
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        trace.add(self)
+
+    @property
+    def duration_ms(self) -> float:
+        """Elapsed time of the span, up to now if still open."""
+        return ((self.end if self.end is not None else time.perf_counter()) - self.start) * 1000
+
+    def set_attribute(self, key: str, value: Any):
+        """Set a span attribute."""
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None):
+        """End the span.
+
+        Args:
+            error: Exception that ended the operation, if it failed
+        """
+        if self.end is not None:
+            return
+        self.end = time.perf_counter()
+        if isinstance(error, (GeneratorExit, asyncio.CancelledError)):
+            # Client went away mid-stream or the turn was cancelled
+            self.status = 'cancelled'
+        elif error is not None:
+            self.status = 'error'
+            self.attributes['error'] = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the span without its children."""
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_offset_ms': round((self.start - self.trace.root.start) * 1000, 2) if self.trace.root else 0.0,
+            'duration_ms': round(self.duration_ms, 2),
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+
+class TraceBuffer:
+    """Bounded ring buffer of completed traces with optional JSONL export."""
+
+    def __init__(self, max_traces: int, export_path: Optional[str] = None):
+        """Initialize the buffer.
+
+        Args:
+            max_traces: Number of most recent traces to keep
+            export_path: JSONL file each completed trace is appended to, if set
+        """
+        self.max_traces = max_traces
+        self.export_path = export_path
+        self._traces: deque = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self.recorded = 0
+        self.exported = 0
+        self.export_errors = 0
+
+    def add(self, trace: Trace):
+        """Store a completed trace and export it if configured."""
+        with self._lock:
+            self._traces.append(trace)
+            self.recorded += 1
+
+        if self.export_path:
+            self._export(trace)
+
+    def _export(self, trace: Trace):
+        """Append a trace to the JSONL export file."""
+        try:
+            line = json.dumps(trace.summary(), default=str)
+            with self._export_lock:
+                with open(self.export_path, 'a', encoding='utf-8') as export_file:
+                    export_file.write(line + '\n')
+                self.exported += 1
+        except (OSError, TypeError, ValueError) as e:
+            self.export_errors += 1
+            logger.warning(f"Failed to export trace {trace.trace_id}: {str(e)}")
+
+    def slowest(self, session_id: Optional[str] = None, limit: int = 10) -> List[Trace]:
+        """Get the slowest recent traces.
+
+        Args:
+            session_id: Only include traces for this session, if given
+            limit: Maximum number of traces to return
+
+        Returns:
+            Traces ordered from slowest to fastest
+        """
+        with self._lock:
+            traces = [trace for trace in self._traces if session_id is None or trace.session_id == session_id]
+        traces.sort(key=lambda trace: trace.duration_ms, reverse=True)
+        return traces[:limit]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffer counters for monitoring.
+
+        Returns:
+            Dictionary of buffered, recorded and exported trace counts
+        """
+        with self._lock:
+            stats = {
+                'buffered': len(self._traces),
+                'max_traces': self.max_traces,
+                'recorded': self.recorded
+            }
+        if self.export_path:
+            stats['exported'] = self.exported
+            stats['export_errors'] = self.export_errors
+        return stats
+
+
+# Global trace buffer (created lazily from configuration)
+_trace_buffer: Optional[TraceBuffer] = None
+_trace_buffer_lock = threading.Lock()
+
+
+def _get_trace_buffer() -> Optional[TraceBuffer]:
+    """Get the global trace buffer, creating it on first use.
+
+    Returns:
+        The trace buffer, or None if tracing is disabled
+    """
+    global _trace_buffer
+
+    if _trace_buffer is None:
+        with _trace_buffer_lock:
+            if _trace_buffer is None:
+                config = get_config()
+                _trace_buffer = TraceBuffer(
+                    max_traces=max(0, config.trace_buffer_size),
+                    export_path=config.trace_export_path or None
+                )
+
+    return _trace_buffer if _trace_buffer.max_traces else None
+
+
+def current_span() -> Optional[Span]:
+    """Get the span active in the current context, if any."""
+    return _current_span.get()
+
+
+@contextmanager
+def start_trace(name: str, session_id: Optional[str] = None, trace_id: Optional[str] = None,
+                **attributes: Any) -> Iterator[Optional[Span]]:
+    """Start a new trace with a root span for the duration of a block.
+
+    Args:
+        name: Root span name, such as the HTTP route
+        session_id: Conversation session the request belongs to
+        trace_id: Trace ID to use (default: a new one)
+        **attributes: Root span attributes
+
+    Yields:
+        The root span, or None if tracing is disabled
+    """
+    buffer = _get_trace_buffer()
+    if buffer is None:
+        yield None
+        return
+
+    worker = get_config().cluster_worker_id
+    if worker:
+        attributes.setdefault('worker', worker)
+    trace = Trace(trace_id or new_trace_id(), session_id)
+    root = Span(name, trace, None, attributes)
+    previous = _current_span.get()
+    _current_span.set(root)
+    error = None
+    try:
+        yield root
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        # Restore rather than reset: a streaming generator may be closed from another context
+        _current_span.set(previous)
+        root.finish(error)
+        buffer.add(trace)
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Span]:
+    """Start a child of the current span without making it current.
+
+    Args:
+        name: Operation name
+        **attributes: Span attributes
+
+    Returns:
+        The new span, or None if there is no active trace
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(name, parent.trace, parent.span_id, attributes)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a child of the current span for the duration of a block.
+
+    Args:
+        name: Operation name
+        **attributes: Span attributes
+
+    Yields:
+        The span, or None if there is no active trace
+    """
+    child = start_span(name, **attributes)
+    if child is None:
+        yield None
+        return
+
+    previous = _current_span.get()
+    _current_span.set(child)
+    error = None
+    try:
+        yield child
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.set(previous)
+        child.finish(error)
+
+
+def get_recent_traces(session_id: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+    """Get the slowest recent traces with their critical paths and span trees.
+
+    Args:
+        session_id: Only include traces for this session, if given
+        limit: Maximum number of traces to return
+
+    Returns:
+        List of trace summaries, slowest first
+    """
+    buffer = _get_trace_buffer()
+    if buffer is None:
+        return []
+    return [trace.summary() for trace in buffer.slowest(session_id, limit)]
+
+
+def get_trace_stats() -> Dict[str, Any]:
+    """Get trace buffer statistics.
+
+    Returns:
+        Dictionary of buffered, recorded and exported trace counts
+    """
+    buffer = _get_trace_buffer()
+    return buffer.get_stats() if buffer else {'enabled': False}
+
+
+class TracingHooks(HookProvider):
+    """Agent hooks that record model calls and tool calls as spans.
+
+    Each span is made current while its call runs, so backend requests made
+    by a tool are recorded as children of that tool's span.
+    """
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        """Register the tracing callbacks on an agent.
+
+        Args:
+            registry: The agent's hook registry
+            **kwargs: Additional keyword arguments for future extensibility
+        """
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+        registry.add_callback(AfterModelCallEvent, self._after_model_call)
+        registry.add_callback(BeforeToolCallEvent, self._before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _before_model_call(self, event: BeforeModelCallEvent):
+        """Open a model call span."""
+        model_span = start_span('model.call')
+        if model_span is not None:
+            event.invocation_state['trace_model_span'] = (model_span, _current_span.get())
+            _current_span.set(model_span)
+
+    def _after_model_call(self, event: AfterModelCallEvent):
+        """Close the model call span."""
+        entry = event.invocation_state.pop('trace_model_span', None)
+        if entry is None:
+            return
+        model_span, parent = entry
+        if event.stop_response is not None:
+            model_span.set_attribute('stop_reason', event.stop_response.stop_reason)
+        model_span.finish(event.exception)
+        _current_span.set(parent)
+
+    def _before_tool_call(self, event: BeforeToolCallEvent):
+        """Open a tool call span."""
+        tool_span = start_span(f"tool.{event.tool_use['name']}", tool_use_id=event.tool_use['toolUseId'])
+        if tool_span is not None:
+            spans = event.invocation_state.setdefault('trace_tool_spans', {})
+            spans[event.tool_use['toolUseId']] = (tool_span, _current_span.get())
+            _current_span.set(tool_span)
+
+    def _after_tool_call(self, event: AfterToolCallEvent):
+        """Close the tool call span."""
+        entry = event.invocation_state.get('trace_tool_spans', {}).pop(event.tool_use['toolUseId'], None)
+        if entry is None:
+            return
+        tool_span, parent = entry
+        status = 'error' if event.exception else event.result.get('status', 'success')
+        tool_span.set_attribute('status', status)
+        tool_span.finish(event.exception)
+        if status == 'error':
+            tool_span.status = 'error'
+        _current_span.set(parent)
@@ -0,0 +1,207 @@
+"""Turn queue module for the Shopping Assistant Chatbot.
+
+This module serializes agent turns per session so that concurrent requests
+for the same session never run the same Agent at once, and coalesces
+identical messages re-sent within a short window (double-clicks, client
+retries) into a single model call whose response every caller shares.
+
+Turn completion is signalled with concurrent.futures.Future objects, so the
+queue works across event loops and threads (async and threaded server modes).
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class TurnQueueFullError(Exception):
+    """Raised when a session already has the maximum number of pending turns."""
+    pass
+
+
+class TurnTicket:
+    """A caller's place in a session's turn queue."""
+
+    def __init__(self, queue: "SessionTurnQueue", session_id: str, future: concurrent.futures.Future,
+                 duplicate: bool):
+        """Initialize the ticket.
+
+        Args:
+            queue: Queue that issued the ticket
+            session_id: Session the turn belongs to
+            future: Future resolved with the turn's response
+            duplicate: Whether this ticket shares another caller's turn
+        """
+        self._queue = queue
+        self.session_id = session_id
+        self.future = future
+        self.duplicate = duplicate
+
+    async def wait(self) -> Any:
+        """Wait for the shared turn's response (duplicate tickets only).
+
+        Returns:
+            The response produced by the turn this ticket was coalesced into
+        """
+        # Shield so that a cancelled waiter does not cancel the shared future
+        return await asyncio.shield(asyncio.wrap_future(self.future))
+
+    def finish(self, response: Any):
+        """Publish the turn's response and let the next queued turn run.
+
+        Safe to call more than once; only the first call has an effect.
+
+        Args:
+            response: Response to share with coalesced duplicate requests
+        """
+        if self.duplicate or self.future.done():
+            return
+
+        self.future.set_result(response)
+        self._queue._turn_finished(self.session_id)
+
+
+class SessionTurnQueue:
+    """Per-session FIFO of agent turns with duplicate-submit coalescing."""
+
+    def __init__(self, max_pending: int, coalesce_window: float):
+        """Initialize the turn queue.
+
+        Args:
+            max_pending: Maximum turns (running plus waiting) allowed per session
+            coalesce_window: Seconds during which an identical message shares the earlier turn
+        """
+        self.max_pending = max_pending
+        self.coalesce_window = coalesce_window
+
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+        self._stats = {'turns': 0, 'coalesced': 0, 'rejected': 0, 'max_depth': 0}
+
+    async def join(self, session_id: str, message: str) -> TurnTicket:
+        """Join a session's turn queue and wait until it is this caller's turn.
+
+        Duplicate tickets return immediately; the caller should await
+        ticket.wait(). Owner tickets return once all earlier turns for the
+        session have finished; the caller must call ticket.finish().
+
+        Args:
+            session_id: Unique identifier for the conversation session
+            message: The user's message
+
+        Returns:
+            TurnTicket for this request
+
+        Raises:
+            TurnQueueFullError: If the session already has max_pending turns
+        """
+        key = message.strip()
+        now = time.monotonic()
+
+        with self._lock:
+            self._sweep(now)
+            state = self._sessions.setdefault(session_id, {'tail': None, 'depth': 0, 'recent': {}})
+            self._prune_recent(state, now)
+
+            recent = state['recent'].get(key)
+            if recent is not None:
+                self._stats['coalesced'] += 1
+                logger.info(f"Coalescing duplicate message for session {session_id}", extra={'category': 'turn'})
+                return TurnTicket(self, session_id, recent[0], duplicate=True)
+
+            if state['depth'] >= self.max_pending:
+                self._stats['rejected'] += 1
+                raise TurnQueueFullError(
+                    f"Session {session_id} already has {state['depth']} pending messages"
+                )
+
+            previous = state['tail']
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            state['tail'] = future
+            state['depth'] += 1
+            state['recent'][key] = (future, now)
+            self._stats['turns'] += 1
+            self._stats['max_depth'] = max(self._stats['max_depth'], state['depth'])
+
+        ticket = TurnTicket(self, session_id, future, duplicate=False)
+
+        if previous is not None and not previous.done():
+            logger.info(f"Waiting for previous turn to finish for session {session_id}", extra={'category': 'turn'})
+            try:
+                await asyncio.shield(asyncio.wrap_future(previous))
+            except asyncio.CancelledError:
+                # Give up our place without blocking the turns queued behind us
+                ticket.finish(None)
+                raise
+            except Exception:
+                pass
+
+        return ticket
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue counters for monitoring.
+
+        Returns:
+            Dictionary of turn, coalesced and rejected counts and current pending turns
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = sum(state['depth'] for state in self._sessions.values())
+            stats['max_pending_per_session'] = self.max_pending
+        return stats
+
+    def wait_idle(self, predicate: Callable[[str], bool], timeout: float) -> bool:
+        """Wait until matching sessions have no running or queued turns.
+
+        Blocks the calling thread, so it must not be called on the event loop
+        running the turns.
+
+        Args:
+            predicate: Function returning True for session IDs to wait for
+            timeout: Longest to wait, in seconds
+
+        Returns:
+            True if the sessions are idle, False if turns were still running at the timeout
+        """
+        with self._lock:
+            tails = [
+                state['tail'] for session_id, state in self._sessions.items()
+                if state['depth'] > 0 and state['tail'] is not None and predicate(session_id)
+            ]
+        _, running = concurrent.futures.wait(tails, timeout=timeout)
+        return not running
+
+    def _turn_finished(self, session_id: str):
+        """Account for a finished turn."""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                state['depth'] -= 1
+
+    def _prune_recent(self, state: Dict[str, Any], now: float):
+        """Forget messages older than the coalesce window. Must hold the lock."""
+        expired = [
+            key for key, (future, submitted) in state['recent'].items()
+            if now - submitted > self.coalesce_window or (future.done() and future.result() is None)
+        ]
+        for key in expired:
+            del state['recent'][key]
+
+    def _sweep(self, now: float):
+        """Drop idle sessions at most once per coalesce window. Must hold the lock."""
+        if now - self._last_sweep < max(self.coalesce_window, 1.0):
+            return
+
+        self._last_sweep = now
+        for session_id in list(self._sessions):
+            state = self._sessions[session_id]
+            self._prune_recent(state, now)
+            if state['depth'] == 0 and not state['recent']:
+                del self._sessions[session_id]
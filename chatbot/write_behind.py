@@ -0,0 +1,261 @@
+"""Write-behind session persistence for the Shopping Assistant Chatbot.
+
+Strands persists a session from inside the agent loop: every message added
+and every agent state sync is written before the turn can finish. This module
+wraps a session repository so those writes are only queued, then applied by a
+background writer within a configurable flush window.
+
+Writes are merged per record while they wait: repeated agent state syncs
+collapse to the latest one, and an update to a message that has not been
+written yet is folded into its creation. Records are snapshotted when queued,
+so later in-place changes to the conversation cannot leak into them. Before
+any read of a session, that session's queued writes are applied, so restoring
+an evicted session always sees its latest state. The queue is bounded; when
+it is full, callers wait for the writer. Everything queued is flushed on
+shutdown.
+"""
+
+import dataclasses
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from strands.session.session_repository import SessionRepository
+from strands.types.session import Session, SessionAgent, SessionMessage
+
+logger = logging.getLogger(__name__)
+
+RecordKey = Tuple[Any, ...]
+
+# Constructor fields used to rebuild snapshotted records
+_AGENT_FIELDS = frozenset(field.name for field in dataclasses.fields(SessionAgent))
+_MESSAGE_FIELDS = frozenset(field.name for field in dataclasses.fields(SessionMessage))
+
+
+def _snapshot_agent(session_agent: SessionAgent) -> SessionAgent:
+    """Copy an agent record so later changes to the live agent don't affect it."""
+    return SessionAgent(**{key: value for key, value in dataclasses.asdict(session_agent).items()
+                           if key in _AGENT_FIELDS})
+
+
+def _snapshot_message(session_message: SessionMessage) -> SessionMessage:
+    """Copy a message record so later in-place edits to the conversation don't affect it."""
+    return SessionMessage(**{key: value for key, value in dataclasses.asdict(session_message).items()
+                             if key in _MESSAGE_FIELDS})
+
+
+class WriteBehindSessionRepository(SessionRepository):
+    """Session repository that queues writes and applies them on a background thread."""
+
+    def __init__(self, repository: SessionRepository, flush_interval: float, max_pending: int = 10000):
+        """Initialize the write-behind layer and start its writer thread.
+
+        Args:
+            repository: Repository the writes are applied to
+            flush_interval: Longest a queued write waits before it is applied, in seconds
+            max_pending: Queued records beyond which writers wait for the queue to drain
+        """
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+
+        # Queued writes per session, in first-write order: record key -> (operation, record)
+        self._pending: "OrderedDict[str, OrderedDict[RecordKey, Tuple[str, Any]]]" = OrderedDict()
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        # Serializes access to the underlying repository so each session's writes apply in order
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+
+        self._stats = {'queued': 0, 'merged': 0, 'written': 0, 'errors': 0, 'flushes': 0,
+                       'blocked': 0, 'read_flushes': 0, 'max_flush_ms': 0.0}
+
+        self._writer = threading.Thread(target=self._run, name='session-write-behind', daemon=True)
+        self._writer.start()
+
+    def _run(self):
+        """Apply queued writes every flush interval, or sooner when woken."""
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _enqueue(self, session_id: str, key: RecordKey, operation: str, record: Any):
+        """Queue a write, merging it with a queued write to the same record.
+
+        Args:
+            session_id: Session the record belongs to
+            key: Record identity within the session
+            operation: Repository method to apply
+            record: Snapshotted record to pass to it
+        """
+        with self._lock:
+            while self._pending_count >= self.max_pending and not self._closed.is_set():
+                # Memory for queued writes is exhausted: make the writer catch up
+                self._stats['blocked'] += 1
+                self._wake.set()
+                self._space.wait(timeout=1.0)
+
+            self._stats['queued'] += 1
+            session_writes = self._pending.setdefault(session_id, OrderedDict())
+            queued = session_writes.get(key)
+            if queued is None:
+                session_writes[key] = (operation, record)
+                self._pending_count += 1
+            else:
+                # A create stays a create; an update on top of it only replaces the data
+                queued_operation, queued_record = queued
+                if queued_operation.startswith('create') and key[0] != 'session':
+                    record.created_at = queued_record.created_at
+                    operation = queued_operation
+                session_writes[key] = (operation, record)
+                self._stats['merged'] += 1
+
+            if self._pending_count >= self.max_pending // 2:
+                self._wake.set()
+
+        if self._closed.is_set():
+            self.flush()
+
+    def _apply(self, session_id: str, writes: List[Tuple[RecordKey, Tuple[str, Any]]]):
+        """Apply one session's queued writes to the underlying repository. Caller holds the I/O lock."""
+        for key, (operation, record) in writes:
+            try:
+                if key[0] == 'session':
+                    self.repository.create_session(record)
+                elif key[0] == 'agent':
+                    getattr(self.repository, operation)(session_id, record)
+                else:
+                    getattr(self.repository, operation)(session_id, key[1], record)
+                self._stats['written'] += 1
+            except Exception as e:
+                self._stats['errors'] += 1
+                logger.error(f"Failed to persist {operation} for session {session_id}: {str(e)}")
+
+    def _take(self, session_id: str) -> List[Tuple[RecordKey, Tuple[str, Any]]]:
+        """Remove and return a session's queued writes."""
+        with self._lock:
+            session_writes = self._pending.pop(session_id, None)
+            if not session_writes:
+                return []
+            self._pending_count -= len(session_writes)
+            self._space.notify_all()
+            return list(session_writes.items())
+
+    def flush_session(self, session_id: str) -> bool:
+        """Apply a session's queued writes now.
+
+        Also waits for any of the session's writes the background writer is
+        applying, so the underlying repository is current when this returns.
+
+        Returns:
+            True if there were queued writes to apply
+        """
+        with self._io_lock:
+            writes = self._take(session_id)
+            if writes:
+                self._apply(session_id, writes)
+        return bool(writes)
+
+    def flush(self):
+        """Apply every queued write now."""
+        start = time.perf_counter()
+        with self._lock:
+            session_ids = list(self._pending)
+        if not session_ids:
+            return
+
+        for session_id in session_ids:
+            self.flush_session(session_id)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._stats['flushes'] += 1
+            self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+
+    def close(self):
+        """Stop the writer after flushing everything queued."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._writer.join(timeout=30)
+        self.flush()
+        with self._lock:
+            self._space.notify_all()
+        close = getattr(self.repository, 'close', None)
+        if close is not None:
+            close()
+
+    def _before_read(self, session_id: str):
+        """Make a session's queued writes visible to a read."""
+        if self.flush_session(session_id):
+            with self._lock:
+                self._stats['read_flushes'] += 1
+
+    def has_session(self, session_id: str) -> bool:
+        """Check whether a session exists, including one whose creation is still queued."""
+        with self._lock:
+            if session_id in self._pending:
+                return True
+        return self.repository.has_session(session_id)
+
+    def create_session(self, session: Session, **kwargs: Any) -> Session:
+        """Queue the creation of a session."""
+        self._enqueue(session.session_id, ('session',), 'create_session', session)
+        return session
+
+    def read_session(self, session_id: str, **kwargs: Any) -> Optional[Session]:
+        """Read session data after applying its queued writes."""
+        self._before_read(session_id)
+        return self.repository.read_session(session_id, **kwargs)
+
+    def create_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        """Queue the creation of an agent."""
+        self._enqueue(session_id, ('agent', session_agent.agent_id), 'create_agent', _snapshot_agent(session_agent))
+
+    def read_agent(self, session_id: str, agent_id: str, **kwargs: Any) -> Optional[SessionAgent]:
+        """Read agent data after applying the session's queued writes."""
+        self._before_read(session_id)
+        return self.repository.read_agent(session_id, agent_id, **kwargs)
+
+    def update_agent(self, session_id: str, session_agent: SessionAgent, **kwargs: Any) -> None:
+        """Queue an agent state update, replacing any queued one."""
+        self._enqueue(session_id, ('agent', session_agent.agent_id), 'update_agent', _snapshot_agent(session_agent))
+
+    def create_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        """Queue the creation of a message."""
+        self._enqueue(session_id, ('message', agent_id, session_message.message_id), 'create_message',
+                      _snapshot_message(session_message))
+
+    def read_message(self, session_id: str, agent_id: str, message_id: int, **kwargs: Any) -> Optional[SessionMessage]:
+        """Read a message after applying the session's queued writes."""
+        self._before_read(session_id)
+        return self.repository.read_message(session_id, agent_id, message_id, **kwargs)
+
+    def update_message(self, session_id: str, agent_id: str, session_message: SessionMessage, **kwargs: Any) -> None:
+        """Queue a message update, folding it into a queued creation if there is one."""
+        self._enqueue(session_id, ('message', agent_id, session_message.message_id), 'update_message',
+                      _snapshot_message(session_message))
+
+    def list_messages(self, session_id: str, agent_id: str, limit: Optional[int] = None, offset: int = 0,
+                      **kwargs: Any) -> List[SessionMessage]:
+        """List messages after applying the session's queued writes."""
+        self._before_read(session_id)
+        return self.repository.list_messages(session_id, agent_id, limit=limit, offset=offset, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue counters for monitoring.
+
+        Returns:
+            Dictionary of queued, merged, written and pending record counts
+        """
+        with self._lock:
+            stats = dict(self._stats, pending=self._pending_count, pending_sessions=len(self._pending))
+        stats['max_flush_ms'] = round(stats['max_flush_ms'], 2)
+        stats['flush_interval_ms'] = round(self.flush_interval * 1000)
+        stats['max_pending'] = self.max_pending
+        return stats
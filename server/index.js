@@ -4,13 +4,67 @@ const bodyParser = require('body-parser');
 const sqlite3 = require('sqlite3').verbose();
 
 const app = express();
-const PORT = 5000;
+const PORT = process.env.PORT || 5000;
 
 app.use(cors());
 app.use(bodyParser.json());
 
 const db = new sqlite3.Database('./ecommerce.db');
 
+// Separate connection for multi-statement cart transactions, so statements from other
+// requests on the shared connection never run inside one
+const txDb = new sqlite3.Database('./ecommerce.db');
+db.configure('busyTimeout', 5000);
+txDb.configure('busyTimeout', 5000);
+
+// Most operations accepted in one cart batch
+const MAX_CART_BATCH = 50;
+
+// Cart version, bumped on every cart change so clients can detect changes made by others.
+// The epoch keeps versions from repeating across restarts.
+const CART_EPOCH = Date.now().toString(36);
+let cartRevision = 0;
+const cartVersion = () => `${CART_EPOCH}-${cartRevision}`;
+
+// Record a cart change (if anything changed) and return the versions before and after it
+function bumpCartVersion(changed = true) {
+  const previous_version = cartVersion();
+  if (changed) cartRevision += 1;
+  return { previous_version, version: cartVersion() };
+}
+
+// Promise wrappers for running statements on a connection
+const dbRun = (conn, sql, params = []) => new Promise((resolve, reject) => {
+  conn.run(sql, params, function (err) {
+    if (err) reject(err);
+    else resolve(this);
+  });
+});
+const dbAll = (conn, sql, params = []) => new Promise((resolve, reject) => {
+  conn.all(sql, params, (err, rows) => (err ? reject(err) : resolve(rows)));
+});
+
+const CART_ITEMS_SQL = `
+    SELECT c.id as cart_item_id, c.product_id, c.quantity, 
+           p.id as product_id, p.emoji, p.name, p.price, p.description
+    FROM cart c 
+    JOIN products p ON c.product_id = p.id
+  `;
+
+// Restructure cart rows to have clear cart_item_id and product details
+const toCartItems = (rows) => rows.map(row => ({
+  id: row.cart_item_id,
+  product_id: row.product_id,
+  quantity: row.quantity,
+  product: {
+    id: row.product_id,
+    emoji: row.emoji,
+    name: row.name,
+    price: row.price,
+    description: row.description
+  }
+}));
+
 // Get all products
 app.get('/api/products', (req, res) => {
   db.all('SELECT * FROM products', [], (err, rows) => {
@@ -34,27 +88,13 @@ app.get('/api/products/:id', (req, res) => {
 
 // Get cart items
 app.get('/api/cart', (req, res) => {
-  db.all(`
-    SELECT c.id as cart_item_id, c.product_id, c.quantity, 
-           p.id as product_id, p.emoji, p.name, p.price, p.description
-    FROM cart c 
-    JOIN products p ON c.product_id = p.id
-  `, [], (err, rows) => {
+  // Taken before the query, so the version is never newer than the items returned
+  res.set('ETag', `"${cartVersion()}"`);
+  if (req.fresh) return res.status(304).end();
+
+  db.all(CART_ITEMS_SQL, [], (err, rows) => {
     if (err) return res.status(500).json({ error: err.message });
-    // Restructure to have clear cart_item_id and product details
-    const cartItems = rows.map(row => ({
-      id: row.cart_item_id,
-      product_id: row.product_id,
-      quantity: row.quantity,
-      product: {
-        id: row.product_id,
-        emoji: row.emoji,
-        name: row.name,
-        price: row.price,
-        description: row.description
-      }
-    }));
-    res.json(cartItems);
+    res.json(toCartItems(rows));
   });
 });
 
@@ -69,32 +109,126 @@ app.post('/api/cart', (req, res) => {
       db.run('UPDATE cart SET quantity = quantity + ? WHERE product_id = ?', 
         [quantity, product_id], (err) => {
           if (err) return res.status(500).json({ error: err.message });
-          res.json({ message: 'Cart updated' });
+          res.json({ message: 'Cart updated', id: row.id, ...bumpCartVersion() });
         });
     } else {
       db.run('INSERT INTO cart (product_id, quantity) VALUES (?, ?)', 
-        [product_id, quantity], (err) => {
+        [product_id, quantity], function (err) {
           if (err) return res.status(500).json({ error: err.message });
-          res.json({ message: 'Added to cart' });
+          res.json({ message: 'Added to cart', id: this.lastID, ...bumpCartVersion() });
         });
     }
   });
 });
 
+// Error carrying the HTTP status to answer with
+function httpError(status, message) {
+  const err = new Error(message);
+  err.status = status;
+  return err;
+}
+
+// Check the shape of a cart batch, returning an error message or null
+function validateCartBatch(operations) {
+  if (!Array.isArray(operations) || operations.length === 0) return 'operations must be a non-empty list';
+  if (operations.length > MAX_CART_BATCH) return `At most ${MAX_CART_BATCH} operations are allowed per batch`;
+  const isId = (value) => Number.isInteger(value) && value > 0;
+  for (const [index, operation] of operations.entries()) {
+    const label = `Operation ${index + 1}`;
+    if (!operation || !['add', 'update', 'remove'].includes(operation.op)) {
+      return `${label}: op must be add, update or remove`;
+    }
+    if (operation.op === 'add' && !isId(operation.product_id)) return `${label}: product_id is required`;
+    if (operation.op !== 'add' && !isId(operation.cart_item_id)) return `${label}: cart_item_id is required`;
+    if (operation.op !== 'remove' && !isId(operation.quantity)) return `${label}: quantity must be greater than 0`;
+  }
+  return null;
+}
+
+// Apply a validated cart batch in one transaction, returning per-operation results and the new cart
+async function applyCartBatch(operations) {
+  await dbRun(txDb, 'BEGIN IMMEDIATE');
+  try {
+    const products = new Map((await dbAll(txDb, 'SELECT id, name FROM products')).map(row => [row.id, row]));
+    const cart = new Map((await dbAll(txDb, 'SELECT id, product_id, quantity FROM cart')).map(row => [row.id, row]));
+    const results = [];
+
+    for (const [index, operation] of operations.entries()) {
+      const label = `Operation ${index + 1}`;
+      if (operation.op === 'add') {
+        const product = products.get(operation.product_id);
+        if (!product) throw httpError(404, `${label}: product ${operation.product_id} not found`);
+        let item = [...cart.values()].find(entry => entry.product_id === operation.product_id);
+        if (item) {
+          await dbRun(txDb, 'UPDATE cart SET quantity = quantity + ? WHERE id = ?', [operation.quantity, item.id]);
+          item.quantity += operation.quantity;
+        } else {
+          const inserted = await dbRun(txDb, 'INSERT INTO cart (product_id, quantity) VALUES (?, ?)',
+            [operation.product_id, operation.quantity]);
+          item = { id: inserted.lastID, product_id: operation.product_id, quantity: operation.quantity };
+          cart.set(item.id, item);
+        }
+        results.push({ op: 'add', cart_item_id: item.id, product_id: product.id, name: product.name,
+          quantity: operation.quantity });
+        continue;
+      }
+
+      const item = cart.get(operation.cart_item_id);
+      if (!item) throw httpError(404, `${label}: cart item ${operation.cart_item_id} not found`);
+      const name = products.get(item.product_id) ? products.get(item.product_id).name : null;
+      if (operation.op === 'update') {
+        await dbRun(txDb, 'UPDATE cart SET quantity = ? WHERE id = ?', [operation.quantity, item.id]);
+        item.quantity = operation.quantity;
+        results.push({ op: 'update', cart_item_id: item.id, product_id: item.product_id, name,
+          quantity: operation.quantity });
+      } else {
+        await dbRun(txDb, 'DELETE FROM cart WHERE id = ?', [item.id]);
+        cart.delete(item.id);
+        results.push({ op: 'remove', cart_item_id: item.id, product_id: item.product_id, name });
+      }
+    }
+
+    const items = toCartItems(await dbAll(txDb, CART_ITEMS_SQL));
+    await dbRun(txDb, 'COMMIT');
+    return { results, items };
+  } catch (err) {
+    await dbRun(txDb, 'ROLLBACK').catch(() => {});
+    throw err;
+  }
+}
+
+// Cart batches run one at a time on txDb
+let cartBatchQueue = Promise.resolve();
+
+// Apply several cart changes at once; all of them take effect or none do
+app.post('/api/cart/batch', (req, res) => {
+  const { operations } = req.body;
+  const invalid = validateCartBatch(operations);
+  if (invalid) return res.status(400).json({ error: invalid });
+
+  const batch = cartBatchQueue.then(() => applyCartBatch(operations));
+  cartBatchQueue = batch.catch(() => {});
+  batch
+    .then(({ results, items }) => {
+      res.json({ message: 'Cart updated', results, cart: items, ...bumpCartVersion() });
+    })
+    .catch((err) => res.status(err.status || 500).json({ error: err.message }));
+});
+
 // Update cart item quantity
 app.put('/api/cart/:id', (req, res) => {
   const { quantity } = req.body;
-  db.run('UPDATE cart SET quantity = ? WHERE id = ?', [quantity, req.params.id], (err) => {
+  db.run('UPDATE cart SET quantity = ? WHERE id = ?', [quantity, req.params.id], function (err) {
     if (err) return res.status(500).json({ error: err.message });
-    res.json({ message: 'Cart updated' });
+    res.json({ message: 'Cart updated', ...bumpCartVersion(this.changes > 0) });
   });
 });
 
 // Delete cart item
 app.delete('/api/cart/:id', (req, res) => {
-  db.run('DELETE FROM cart WHERE id = ?', [req.params.id], (err) => {
+  db.run('DELETE FROM cart WHERE id = ?', [req.params.id], function (err) {
     if (err) return res.status(500).json({ error: err.message });
-    res.json({ message: 'Item removed' });
+    res.json({ message: 'Item removed', ...bumpCartVersion(this.changes > 0) });
   });
 });
 